@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Airtime budget for the senders: token-bucket pacing to a duty cycle
+Each radio (keyed by its port) gets a bucket of airtime seconds that fills
+at the duty cycle rate up to duty cycle x window (10% of an hour on UA_433,
+as the firmware and the regulations count it), or up to a smaller burst. A
+sender takes the packet's time on air (lora_radio.time_on_air) before every
+send and sleeps while the bucket is short, and consecutive sends are spaced
+by at least the previous packet's time on air so a full bucket does not
+flood the device's TX queue. The bucket lives in a small JSON file under an
+exclusive flock, so every thread and process using the same radio shares it.
+
+Only the packets the senders hand to the radio are counted: firmware
+retransmissions of unacknowledged packets, rebroadcasts and the ACKs
+themselves also use airtime, so the real duty cycle can be higher.
+
+Usage:
+    python3 airtime.py
+    python3 airtime.py --reset /dev/cu.usbserial-0001
+"""
+
+import os
+import re
+import json
+import time
+import fcntl
+import argparse
+import tempfile
+import threading
+from contextlib import contextmanager
+
+from lora_radio import MODEM_PRESETS, REGIONS, radio_from_profile, time_on_air
+
+DEFAULT_WINDOW = 3600
+DEFAULT_STATE_DIR = os.path.join(tempfile.gettempdir(), 'meshbench-airtime')
+
+
+def state_path(key, state_dir=None):
+    """Bucket file for a radio key such as a serial port"""
+    name = re.sub(r'[^A-Za-z0-9_.-]+', '_', key).strip('_') or 'radio'
+    return os.path.join(state_dir or DEFAULT_STATE_DIR, f"{name}.json")
+
+
+class AirtimeBudget:
+    """Token bucket of airtime seconds for one radio, shared through a locked state file
+
+    duty_cycle is in percent; 0 means the region's limit, as tx_power 0 means
+    the region's maximum in the LoRa config. burst caps the bucket at that
+    many seconds of airtime (default: the whole window's worth).
+    """
+
+    def __init__(self, key, region='UA_433', preset='SHORT_FAST', duty_cycle=0, window=DEFAULT_WINDOW, state_dir=None,
+                 burst=None):
+        if preset not in MODEM_PRESETS:
+            raise ValueError(f"Unknown modem preset: {preset}")
+        if region not in REGIONS:
+            raise ValueError(f"Unknown region: {region}")
+        self.key = key
+        self.region = region
+        self.preset = preset
+        self.duty_cycle = duty_cycle or REGIONS[region]['duty_cycle']
+        self.window = window
+        self.rate = self.duty_cycle / 100
+        self.capacity = min(self.rate * window, burst) if burst else self.rate * window
+        self.path = state_path(key, state_dir)
+        self.lock = threading.Lock()
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+
+    @classmethod
+    def for_radio(cls, key, region=None, preset=None, duty_cycle=0, window=DEFAULT_WINDOW, state_dir=None, burst=None):
+        """Budget for a radio; region and preset not known from the device come from the base profile"""
+        if region not in REGIONS or preset not in MODEM_PRESETS:
+            radio = radio_from_profile()
+            region = region if region in REGIONS else radio.region
+            preset = preset if preset in MODEM_PRESETS else radio.preset
+        return cls(key, region, preset, duty_cycle, window, state_dir, burst)
+
+    @contextmanager
+    def _state(self):
+        """The bucket state, refilled to now, under the thread lock and an exclusive flock"""
+        with self.lock, open(self.path, 'a+') as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                f.seek(0)
+                try:
+                    state = json.loads(f.read() or '{}')
+                except ValueError:
+                    state = {}
+                now = time.time()
+                tokens = state.get('tokens', self.capacity)
+                elapsed = max(0.0, now - state.get('updated', now))
+                state['tokens'] = min(self.capacity, tokens + elapsed * self.rate)
+                state['updated'] = now
+                state.setdefault('airtime_s', 0.0)
+                state.setdefault('packets', 0)
+                state.setdefault('waited_s', 0.0)
+                state.setdefault('since', now)
+                state.setdefault('busy_until', 0.0)
+                state.update(key=self.key, region=self.region, preset=self.preset,
+                             duty_cycle=self.duty_cycle, window_s=self.window, capacity_s=self.capacity)
+                yield state
+                f.seek(0)
+                f.truncate()
+                json.dump(state, f)
+                f.flush()
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def acquire(self, seconds, block=True):
+        """Take seconds of airtime, sleeping until the bucket has them and the previous packet is off the air
+
+        Returns the seconds waited, or None without block when it would wait.
+        """
+        # A packet longer than the whole bucket only needs a full bucket
+        need = min(seconds, self.capacity)
+        waited = 0.0
+        while True:
+            with self._state() as state:
+                busy = state['busy_until'] - state['updated']
+                if state['tokens'] >= need and busy <= 0:
+                    state['tokens'] -= seconds
+                    state['busy_until'] = state['updated'] + seconds
+                    state['airtime_s'] += seconds
+                    state['packets'] += 1
+                    state['waited_s'] += waited
+                    return waited
+                delay = max(busy, (need - state['tokens']) / self.rate)
+            if not block:
+                return None
+            # Other senders may take the refill first, so check again after sleeping
+            time.sleep(delay)
+            waited += delay
+
+    def time_on_air(self, payload_bytes):
+        return time_on_air(self.preset, payload_bytes)
+
+    def acquire_packet(self, payload_bytes, block=True):
+        """acquire() the time on air of one packet with this payload"""
+        return self.acquire(self.time_on_air(payload_bytes), block)
+
+    def usage(self):
+        """Current budget use of this radio, across every process using it"""
+        with self._state() as state:
+            return {
+                'key': self.key,
+                'region': self.region,
+                'preset': self.preset,
+                'duty_cycle': self.duty_cycle,
+                'window_s': self.window,
+                'capacity_s': self.capacity,
+                'available_s': state['tokens'],
+                'used_percent': (1 - state['tokens'] / self.capacity) * 100 if self.capacity else None,
+                'airtime_s': state['airtime_s'],
+                'packets': state['packets'],
+                'waited_s': state['waited_s'],
+                'since': state['since'],
+            }
+
+    def reset(self):
+        """Forget the bucket: full again, counters cleared"""
+        with self.lock:
+            if os.path.exists(self.path):
+                os.remove(self.path)
+
+
+def load_states(state_dir=None):
+    """{radio key: bucket state, refilled to now} of every radio that has used a budget"""
+    state_dir = state_dir or DEFAULT_STATE_DIR
+    states = {}
+    if not os.path.isdir(state_dir):
+        return states
+    for name in sorted(os.listdir(state_dir)):
+        if name.endswith('.json'):
+            try:
+                with open(os.path.join(state_dir, name), 'r') as f:
+                    state = json.load(f)
+            except (OSError, ValueError):
+                continue
+            rate = state.get('duty_cycle', 0) / 100
+            capacity = state.get('capacity_s', rate * state.get('window_s', DEFAULT_WINDOW))
+            elapsed = max(0.0, time.time() - state.get('updated', time.time()))
+            state['tokens'] = min(capacity, state.get('tokens', 0) + elapsed * rate)
+            states[state.get('key', name[:-5])] = state
+    return states
+
+
+def print_time_on_air(payload_bytes):
+    print(f"Time on air of a {payload_bytes} byte payload:")
+    for preset in MODEM_PRESETS:
+        toa = time_on_air(preset, payload_bytes)
+        print(f"  {preset:<15} {toa * 1000:>8.1f} ms  (10% duty cycle: {0.1 * 3600 / toa:>7.0f} packets/hour)")
+    print()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Show the airtime budget use of each radio and packet time on air per preset")
+    parser.add_argument("--state-dir", default=DEFAULT_STATE_DIR, help=f"Bucket state directory (default: {DEFAULT_STATE_DIR})")
+    parser.add_argument("--size", type=int, default=200, help="Payload bytes for the time on air table (default: 200)")
+    parser.add_argument("--reset", nargs="+", metavar="PORT", help="Refill the buckets of these radios and clear their counters")
+    parser.add_argument("--json", action="store_true", help="Output the bucket states as JSON")
+    args = parser.parse_args()
+
+    if args.reset:
+        for key in args.reset:
+            AirtimeBudget(key, state_dir=args.state_dir).reset()
+            print(f"Reset {key}")
+        raise SystemExit(0)
+
+    states = load_states(args.state_dir)
+    if args.json:
+        print(json.dumps(states, indent=2))
+        raise SystemExit(0)
+
+    print_time_on_air(args.size)
+    if not states:
+        print(f"No airtime budgets in use ({args.state_dir})")
+        raise SystemExit(0)
+    now = time.time()
+    print(f"{'Radio':<30} {'Preset':<12} {'Duty':>5} {'Packets':>8} {'Airtime':>9} {'Waited':>8} {'Bucket':>14} {'Since':>7}")
+    print("-" * 100)
+    for key, state in states.items():
+        since = (now - state.get('since', now)) / 60
+        capacity = state.get('capacity_s', state.get('duty_cycle', 0) / 100 * state.get('window_s', DEFAULT_WINDOW))
+        bucket = f"{state['tokens']:.0f}/{capacity:.0f}s"
+        print(f"{key[:29]:<30} {state.get('preset', '?'):<12} {state.get('duty_cycle', 0):>4g}% {state.get('packets', 0):>8} "
+              f"{state.get('airtime_s', 0):>8.1f}s {state.get('waited_s', 0):>7.1f}s {bucket:>14} {since:>4.0f}min")
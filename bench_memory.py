@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Memory benchmark: nested-dict node/packet/latency representation vs the
+compact records in mesh_records.py
+
+Usage:
+    python3 bench_memory.py
+    python3 bench_memory.py --nodes 500 --packets 100000 --samples 100000
+"""
+
+import argparse
+import random
+import tracemalloc
+
+from mesh_records import NodeRecord, PacketRecord, LatencySamples, NodeTable, PacketLog
+
+
+def make_nodes(count):
+    """Synthetic iface.nodes values shaped like the real node DB"""
+    nodes = []
+    for i in range(count):
+        num = 0x9ee80000 + i
+        nodes.append({
+            'num': num,
+            'user': {
+                'id': f"!{num:08x}",
+                'longName': f"Meshtastic {num & 0xffff:04x}",
+                'shortName': f"{num & 0xffff:04x}"
+            },
+            'snr': random.uniform(-20, 12),
+            'deviceMetrics': {
+                'batteryLevel': random.randint(0, 101),
+                'voltage': random.uniform(3.3, 4.2),
+                'channelUtilization': random.uniform(0, 30),
+                'airUtilTx': random.uniform(0, 5)
+            }
+        })
+    return nodes
+
+
+def make_packets(count):
+    """Synthetic received-packet header dictionaries"""
+    packets = []
+    for i in range(count):
+        packets.append({
+            'rxTime': 1700000000 + i * 0.1,
+            'id': random.getrandbits(32),
+            'from': 0x9ee80000 + random.randint(0, 255),
+            'to': 0xffffffff,
+            'rxSnr': random.uniform(-20, 12),
+            'rxRssi': random.randint(-120, -30),
+            'hopLimit': 3
+        })
+    return packets
+
+
+def measure(build):
+    """Bytes still allocated by the object build() returns"""
+    tracemalloc.start()
+    obj = build()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del obj
+    return current
+
+
+def dict_nodes(nodes):
+    # Same shape get_device_info() builds
+    result = {}
+    for node in nodes:
+        result[node['user']['id']] = {
+            'name': node['user']['longName'],
+            'short': node['user']['shortName'],
+            'snr': node.get('snr'),
+            'deviceMetrics': dict(node.get('deviceMetrics', {}))
+        }
+    return result
+
+
+def table_nodes(nodes):
+    table = NodeTable()
+    for node in nodes:
+        table.add_node(node)
+    return table
+
+
+def dict_packets(packets):
+    return [{
+        'rx_time': p['rxTime'], 'packet_id': p['id'], 'from_num': p['from'], 'to_num': p['to'],
+        'portnum': 1, 'rx_snr': p['rxSnr'], 'rx_rssi': p['rxRssi'], 'hop_limit': p['hopLimit'], 'size': 0
+    } for p in packets]
+
+
+def record_packets(packets):
+    return [PacketRecord(p['rxTime'], p['id'], p['from'], p['to'], 1, p['rxSnr'], p['rxRssi'], p['hopLimit'], 0)
+            for p in packets]
+
+
+def log_packets(packets):
+    log = PacketLog()
+    for p in packets:
+        log.append(p, p['rxTime'])
+    return log
+
+
+def print_row(name, baseline, compact, count):
+    ratio = baseline / compact if compact else 0
+    print(f"{name:<30} {baseline/1024:>12,.1f} KB {compact/1024:>12,.1f} KB "
+          f"{baseline/count:>8.1f} B {compact/count:>8.1f} B {ratio:>6.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare memory of dict vs compact record representations")
+    parser.add_argument("--nodes", type=int, default=250, help="Number of nodes (default: 250)")
+    parser.add_argument("--packets", type=int, default=50000, help="Number of packets (default: 50000)")
+    parser.add_argument("--samples", type=int, default=50000, help="Number of latency samples (default: 50000)")
+    args = parser.parse_args()
+
+    random.seed(1)
+    nodes = make_nodes(args.nodes)
+    packets = make_packets(args.packets)
+    samples = [random.uniform(0.09, 0.2) for _ in range(args.samples)]
+
+    print("="*90)
+    print("MEMORY BENCHMARK: dict representation vs compact records")
+    print("="*90)
+    print(f"{'Data':<30} {'Dicts':>15} {'Compact':>15} {'Dict/item':>10} {'Cmp/item':>10} {'Saving':>7}")
+    print("-"*90)
+
+    # Name strings are shared by both sides, so only the containers are measured
+    print_row(f"Nodes ({args.nodes}) slotted records", measure(lambda: dict_nodes(nodes)),
+              measure(lambda: [NodeRecord.from_node(n) for n in nodes]), args.nodes)
+    print_row(f"Nodes ({args.nodes}) NodeTable", measure(lambda: dict_nodes(nodes)),
+              measure(lambda: table_nodes(nodes)), args.nodes)
+    print_row(f"Packets ({args.packets}) records", measure(lambda: dict_packets(packets)),
+              measure(lambda: record_packets(packets)), args.packets)
+    print_row(f"Packets ({args.packets}) PacketLog", measure(lambda: dict_packets(packets)),
+              measure(lambda: log_packets(packets)), args.packets)
+    print_row(f"Latency ({args.samples}) samples", measure(lambda: [s * 1.0 for s in samples]),
+              measure(lambda: LatencySamples(samples)), args.samples)
+    print("-"*90)
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Startup-time benchmark for the meshbench CLI
+Runs `python3 -m meshbench <command> ...` in fresh interpreters and reports
+the median wall time and the modules each command imported. Offline commands
+must stay under the time budget and must not import any radio module; the
+exit status is 1 if either check fails, so it can guard against regressions.
+
+Usage:
+    python3 bench_startup.py
+    python3 bench_startup.py --runs 20 --budget-ms 80 --json
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+import subprocess
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# Modules that only radio commands may load
+RADIO_MODULES = ('meshtastic', 'serial', 'pubsub', 'google.protobuf')
+
+# (label, argv, offline)
+CASES = (
+    ('meshbench --help', ['--help'], True),
+    ('stats', ['stats', 'results.json'], True),
+    ('capacity', ['capacity'], True),
+    ('airtime', ['airtime'], True),
+    ('table (usage)', ['table'], True),
+    ('pair-matrix --help', ['pair-matrix', '--help'], False),
+    ('discover --help', ['discover', '--help'], False),
+    ('sweep --help', ['sweep', '--help'], False),
+)
+
+
+def imported_modules(argv):
+    """Top-level module names imported by one run (from -X importtime)"""
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-m', 'meshbench'] + argv,
+                          cwd=ROOT, capture_output=True, text=True)
+    modules = set()
+    for line in proc.stderr.splitlines():
+        if line.startswith('import time:') and '|' in line:
+            name = line.rsplit('|', 1)[1].strip()
+            if name != 'package':
+                modules.add(name)
+    return modules
+
+
+def time_command(argv, runs):
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, '-m', 'meshbench'] + argv, cwd=ROOT,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def baseline(runs):
+    """Bare interpreter startup, to separate our cost from Python's"""
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, '-c', 'pass'])
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark meshbench CLI startup time")
+    parser.add_argument("--runs", type=int, default=10, help="Runs per command (default: 10)")
+    parser.add_argument("--budget-ms", type=float, default=100.0,
+                        help="Max median time for offline commands above bare interpreter startup (default: 100)")
+    parser.add_argument("--json", action="store_true", help="Output results as JSON")
+    args = parser.parse_args()
+
+    python_ms = baseline(args.runs)
+    results = []
+    for label, argv, offline in CASES:
+        samples = time_command(argv, args.runs)
+        modules = imported_modules(argv)
+        radio = sorted(m for m in modules if m.split('.')[0] in RADIO_MODULES or m in RADIO_MODULES)
+        median = statistics.median(samples)
+        result = {
+            'command': label,
+            'offline': offline,
+            'median_ms': median,
+            'min_ms': min(samples),
+            'overhead_ms': median - python_ms,
+            'modules': len(modules),
+            'radio_modules': radio[:5],
+            'ok': True
+        }
+        if offline:
+            result['ok'] = not radio and result['overhead_ms'] <= args.budget_ms
+        results.append(result)
+
+    if args.json:
+        print(json.dumps({'python_startup_ms': python_ms, 'budget_ms': args.budget_ms, 'results': results}, indent=2))
+    else:
+        print(f"Python startup: {python_ms:.1f} ms (subtracted for the budget check)")
+        print(f"{'Command':<23} {'Median':>9} {'Min':>9} {'Overhead':>9} {'Modules':>8}  Radio imports")
+        for r in results:
+            status = ('✅' if r['ok'] else '❌') if r['offline'] else '  '
+            radio = ', '.join(r['radio_modules']) or '-'
+            print(f"{status} {r['command']:<20} {r['median_ms']:>7.1f}ms {r['min_ms']:>7.1f}ms "
+                  f"{r['overhead_ms']:>7.1f}ms {r['modules']:>8}  {radio}")
+
+    if not all(r['ok'] for r in results):
+        sys.exit(1)
@@ -4,7 +4,9 @@ Calculate maximum file size that can be transmitted in 3 minutes
 Based on actual measured Meshtastic performance
 """
 
+import os
 import json
+import math
 
 # Measured performance from speed tests
 MEASURED_THROUGHPUT_KBPS = 11.48  # From speed test results
@@ -21,6 +23,10 @@ MESSAGE_OVERHEAD = 50  # bytes (approximate overhead per message)
 TIME_MINUTES = 3
 TIME_SECONDS = TIME_MINUTES * 60
 
+# Calibrated path loss model (path_loss_calibration.py), used for per-link capacity if present
+MODEL_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "path_loss_model.json")
+LINK_MARGIN_DB = 3  # fade margin a link must keep above the demodulation limit
+
 print("="*70)
 print("MESHTASTIC 3-MINUTE TRANSMISSION CAPACITY CALCULATION")
 print("="*70)
@@ -87,6 +93,43 @@ print(f"  KB:       {theoretical_kb:,.2f}")
 print(f"  MB:       {theoretical_mb:.4f}")
 print()
 
+# Calculation 4: Per link, from the calibrated path loss model
+if os.path.exists(MODEL_FILE):
+    from lora_radio import MODEM_PRESETS, DEMOD_SNR, REGIONS, time_on_air
+
+    with open(MODEL_FILE, 'r') as f:
+        calibration = json.load(f)
+    calibrated_bw = calibration['radio']['bandwidth_khz']
+    region = calibration['radio'].get('region', 'UA_433')
+    duty_cycle = REGIONS.get(region, REGIONS['UA_433'])['duty_cycle']
+    payload = MAX_MESSAGE_SIZE - MESSAGE_OVERHEAD
+
+    print("="*70)
+    print("CALCULATION 4: Per Link (calibrated path loss model)")
+    print("="*70)
+    print(f"Fastest preset keeping {LINK_MARGIN_DB} dB margin on each calibrated link, sending {payload} byte")
+    print(f"messages back to back within the {region} duty cycle ({duty_cycle}%):")
+    for link in calibration.get('links', []):
+        best = None
+        for preset, (sf, bw, cr) in MODEM_PRESETS.items():
+            # Path loss does not depend on the preset; the noise floor follows the bandwidth
+            snr = link['predicted_snr_db'] + 10 * math.log10(calibrated_bw / bw)
+            if snr - DEMOD_SNR[sf] >= LINK_MARGIN_DB and (best is None or time_on_air(preset, payload) < time_on_air(best[0], payload)):
+                best = (preset, snr - DEMOD_SNR[sf])
+        name = f"{link['from']} <-> {link['to']}"
+        if best is None:
+            print(f"  {name:<20} no preset closes the link")
+            continue
+        # Whole packets on air, at most duty_cycle % of the period
+        toa = time_on_air(best[0], payload)
+        messages = math.floor(TIME_SECONDS * duty_cycle / 100 / toa)
+        link_bytes = messages * payload
+        link_kbps = link_bytes * 8 / TIME_SECONDS / 1000
+        link_mb = link_bytes / 1024 / 1024
+        print(f"  {name:<20} {best[0]:<15} {toa * 1000:>6.0f} ms/msg  {messages:>5} msgs  {link_kbps:>6.2f} kbps  "
+              f"{link_mb:.4f} MB  (margin {best[1]:.1f} dB)")
+    print()
+
 # Summary
 print("="*70)
 print("SUMMARY")
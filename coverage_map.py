@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+"""
+Coverage heatmap of a repeater site
+Predicts SNR from a site (position and antenna height) to every cell of a
+square grid around it with the link_predictor.py model, and writes the link
+margin as a colour PNG and as GeoJSON bands.
+
+The terrain of the whole area is looked up once (local SRTM tiles, falling
+back to get_altitude.py's cached web lookups) into a raster placed in shared
+memory; a process pool then evaluates blocks of grid rows, each worker
+sampling its terrain profiles from that raster without copying it.
+
+Usage:
+    python3 coverage_map.py 50.5183,30.5180 --height 12
+    python3 coverage_map.py 50.5183,30.5180 --height 12 --radius 15 --grid 500 --out bb14.png --geojson bb14.geojson
+"""
+
+import os
+import sys
+import json
+import math
+import time
+import zlib
+import struct
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+try:
+    import numpy as np
+except ImportError:
+    raise ImportError("numpy module not found. Install with: pip3 install numpy")
+
+from dem import DEFAULT_DEM_DIR
+from lora_radio import MODEM_PRESETS, DEFAULT_PROFILES_FILE, radio_from_profile
+from link_predictor import (LinkPredictor, PathLossModel, dem_elevation, haversine_m, parse_position,
+                            DEFAULT_ANTENNA_HEIGHT, K_FACTOR)
+
+DEFAULT_GRID = 500
+DEFAULT_RADIUS_KM = 10.0
+DEFAULT_SAMPLES = 128
+METERS_PER_DEGREE = 111320.0
+
+# Link margin (dB) colour stops, the report colours from red to green
+MARGIN_STOPS = (0.0, 5.0, 10.0, 20.0)
+MARGIN_COLORS = ((239, 68, 68), (245, 158, 11), (132, 204, 22), (16, 185, 129))
+# (lowest margin, highest margin, colour) of the GeoJSON bands
+MARGIN_BANDS = ((0.0, 5.0, '#ef4444'), (5.0, 10.0, '#f59e0b'), (10.0, 20.0, '#84cc16'), (20.0, None, '#10b981'))
+
+
+class Grid:
+    """size x size cells of equal angular size centred on a position, row 0 to the north"""
+
+    def __init__(self, latitude, longitude, radius_km=DEFAULT_RADIUS_KM, size=DEFAULT_GRID):
+        self.size = size
+        half_lat = radius_km * 1000 / METERS_PER_DEGREE
+        half_lon = half_lat / math.cos(math.radians(latitude))
+        self.north = latitude + half_lat
+        self.south = latitude - half_lat
+        self.west = longitude - half_lon
+        self.east = longitude + half_lon
+        self.dlat = 2 * half_lat / size
+        self.dlon = 2 * half_lon / size
+
+    def centers(self, rows=None):
+        """Cell centre latitudes and longitudes, (rows x size) arrays"""
+        rows = np.arange(self.size) if rows is None else np.asarray(rows)
+        lats = self.north - (rows + 0.5) * self.dlat
+        lons = self.west + (np.arange(self.size) + 0.5) * self.dlon
+        return np.broadcast_to(lats[:, None], (len(rows), self.size)), np.broadcast_to(lons, (len(rows), self.size))
+
+    def bounds(self):
+        return {'north': self.north, 'south': self.south, 'west': self.west, 'east': self.east}
+
+
+class TerrainRaster:
+    """Bilinear heights from a (size x size) array of cell-centre heights of a Grid"""
+
+    def __init__(self, heights, grid):
+        self.heights = heights
+        self.grid = grid
+
+    def __call__(self, lats, lons):
+        grid = self.grid
+        last = grid.size - 1
+        row = np.clip((grid.north - lats) / grid.dlat - 0.5, 0, last)
+        col = np.clip((lons - grid.west) / grid.dlon - 0.5, 0, last)
+        r0 = np.minimum(row.astype(np.intp), last - 1)
+        c0 = np.minimum(col.astype(np.intp), last - 1)
+        dr = row - r0
+        dc = col - c0
+        h = self.heights
+        top = h[r0, c0] + (h[r0, c0 + 1] - h[r0, c0]) * dc
+        bottom = h[r0 + 1, c0] + (h[r0 + 1, c0 + 1] - h[r0 + 1, c0]) * dc
+        return top + (bottom - top) * dr
+
+
+# Per-process state, set up once by _init_worker
+_worker = {}
+
+
+def _init_worker(shm_name, grid, site, radio, samples, k_factor, clutter_db, model):
+    shm = shared_memory.SharedMemory(name=shm_name)
+    heights = np.ndarray((grid.size, grid.size), dtype='f8', buffer=shm.buf)
+    _worker.update(shm=shm, grid=grid, site=site,
+                   predictor=LinkPredictor(TerrainRaster(heights, grid), radio, samples, k_factor, clutter_db,
+                                           model=model))
+
+
+def _coverage_rows(start, stop):
+    """SNR and line-of-sight flags for grid rows start..stop"""
+    grid = _worker['grid']
+    site = _worker['site']
+    lats, lons = grid.centers(range(start, stop))
+    lats = lats.ravel()
+    lons = lons.ravel()
+    out = _worker['predictor'].predict(np.full(lats.shape, site['latitude']), np.full(lats.shape, site['longitude']),
+                                       site['antenna_m'], lats, lons, site['rx_antenna_m'])
+    shape = (stop - start, grid.size)
+    return start, out['snr_db'].reshape(shape).astype('f4'), out['los_clear'].reshape(shape)
+
+
+def compute_coverage(site, grid, radio, elevation, samples=DEFAULT_SAMPLES, k_factor=K_FACTOR, clutter_db=0.0,
+                     workers=None, block_links=4096, model=None):
+    """Predict every cell of grid from site (latitude, longitude, antenna_m, rx_antenna_m)
+
+    Returns (snr_db, los_clear, terrain), each a (size x size) array.
+    """
+    lats, lons = grid.centers()
+    terrain = elevation(np.ascontiguousarray(lats).ravel(), np.ascontiguousarray(lons).ravel()).reshape(lats.shape)
+
+    snr = np.empty(terrain.shape, dtype='f4')
+    los = np.empty(terrain.shape, dtype=bool)
+    step = max(1, block_links // grid.size)
+    shm = shared_memory.SharedMemory(create=True, size=terrain.nbytes)
+    try:
+        np.ndarray(terrain.shape, dtype='f8', buffer=shm.buf)[:] = terrain
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(shm.name, grid, site, radio, samples, k_factor, clutter_db, model)) as pool:
+            futures = [pool.submit(_coverage_rows, start, min(start + step, grid.size))
+                       for start in range(0, grid.size, step)]
+            for future in futures:
+                start, block_snr, block_los = future.result()
+                snr[start:start + len(block_snr)] = block_snr
+                los[start:start + len(block_los)] = block_los
+    finally:
+        shm.close()
+        shm.unlink()
+    return snr, los, terrain
+
+
+def margin_colors(margin):
+    """RGBA image (rows x cols x 4, uint8) of a link margin array; cells without a link are transparent"""
+    rgba = np.zeros(margin.shape + (4,), dtype=np.uint8)
+    for channel in range(3):
+        rgba[..., channel] = np.interp(margin, MARGIN_STOPS, [c[channel] for c in MARGIN_COLORS]).astype(np.uint8)
+    rgba[..., 3] = np.where(margin >= 0, 170, 0)
+    return rgba
+
+
+def write_png(path, rgba):
+    """Write an RGBA uint8 array as a PNG (stdlib zlib, no imaging library needed)"""
+    height, width, _ = rgba.shape
+    raw = np.zeros((height, width * 4 + 1), dtype=np.uint8)
+    raw[:, 1:] = rgba.reshape(height, width * 4)
+
+    def chunk(kind, data):
+        return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data) & 0xFFFFFFFF)
+
+    with open(path, 'wb') as f:
+        f.write(b'\x89PNG\r\n\x1a\n')
+        f.write(chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 6, 0, 0, 0)))
+        f.write(chunk(b'IDAT', zlib.compress(raw.tobytes(), 6)))
+        f.write(chunk(b'IEND', b''))
+
+
+def write_world_file(path, grid):
+    """ESRI world file next to the PNG so GIS tools place it (.pgw)"""
+    with open(path, 'w') as f:
+        f.write(f"{grid.dlon:.10f}\n0.0\n0.0\n{-grid.dlat:.10f}\n"
+                f"{grid.west + grid.dlon / 2:.10f}\n{grid.north - grid.dlat / 2:.10f}\n")
+
+
+def margin_bands(margin, grid):
+    """GeoJSON FeatureCollection with one MultiPolygon per margin band
+
+    Horizontal runs of cells in the same band become one rectangle, which
+    keeps the file a fraction of the size of one polygon per cell.
+    """
+    features = []
+    for low, high, color in MARGIN_BANDS:
+        inside = (margin >= low) & ((margin < high) if high is not None else True)
+        polygons = []
+        for row in np.flatnonzero(inside.any(axis=1)).tolist():
+            cells = np.concatenate(([0], inside[row].view(np.int8), [0]))
+            edges = np.flatnonzero(np.diff(cells))
+            north = round(grid.north - row * grid.dlat, 6)
+            south = round(north - grid.dlat, 6)
+            for start, stop in zip(edges[::2].tolist(), edges[1::2].tolist()):
+                west = round(grid.west + start * grid.dlon, 6)
+                east = round(grid.west + stop * grid.dlon, 6)
+                polygons.append([[[west, south], [east, south], [east, north], [west, north], [west, south]]])
+        if polygons:
+            features.append({
+                'type': 'Feature',
+                'properties': {'margin_min_db': low, 'margin_max_db': high, 'fill': color,
+                               'cells': int(np.count_nonzero(inside))},
+                'geometry': {'type': 'MultiPolygon', 'coordinates': polygons},
+            })
+    return {'type': 'FeatureCollection', 'features': features}
+
+
+def summarize(site, grid, margin, los, terrain):
+    covered = margin >= 0
+    cell_km2 = (grid.dlat * METERS_PER_DEGREE) * (grid.dlon * METERS_PER_DEGREE * math.cos(math.radians(site['latitude']))) / 1e6
+    lats, lons = grid.centers()
+    distance = haversine_m(site['latitude'], site['longitude'], lats, lons)
+    return {
+        'cells': int(margin.size),
+        'covered_percent': round(float(covered.mean() * 100), 1),
+        'covered_km2': round(float(covered.sum() * cell_km2), 2),
+        'los_percent': round(float(los.mean() * 100), 1),
+        'max_range_km': round(float(distance[covered].max() / 1000), 2) if covered.any() else 0,
+        'terrain_missing_cells': int(np.isnan(terrain).sum()),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Predicted SNR coverage heatmap around a repeater site",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  python3 coverage_map.py 50.5183,30.5180 --height 12
+  python3 coverage_map.py 50.5183,30.5180 --height 12 --radius 15 --out bb14.png --geojson bb14.geojson
+        """
+    )
+    parser.add_argument("site", type=parse_position, metavar="LAT,LON", help="Site position")
+    parser.add_argument("--height", type=float, default=DEFAULT_ANTENNA_HEIGHT,
+                        help=f"Site antenna height above ground in meters (default: {DEFAULT_ANTENNA_HEIGHT})")
+    parser.add_argument("--rx-height", type=float, default=DEFAULT_ANTENNA_HEIGHT,
+                        help=f"Receiver antenna height in every cell (default: {DEFAULT_ANTENNA_HEIGHT})")
+    parser.add_argument("--radius", type=float, default=DEFAULT_RADIUS_KM, help=f"Half width of the area in km (default: {DEFAULT_RADIUS_KM:g})")
+    parser.add_argument("--grid", type=int, default=DEFAULT_GRID, help=f"Cells per side (default: {DEFAULT_GRID})")
+    parser.add_argument("--samples", type=int, default=DEFAULT_SAMPLES, help=f"Profile samples per cell (default: {DEFAULT_SAMPLES})")
+    parser.add_argument("--workers", type=int, help="Worker processes (default: one per CPU)")
+    parser.add_argument("--profile", default="base", help="Radio profile in profiles.json (default: base)")
+    parser.add_argument("--profiles", default=DEFAULT_PROFILES_FILE, help="Profiles file")
+    parser.add_argument("--preset", choices=sorted(MODEM_PRESETS), help="Modem preset (default: the profile's)")
+    parser.add_argument("--tx-power", type=float, help="TX power in dBm (default: the profile's, else the region limit)")
+    parser.add_argument("--gain", type=float, help="Antenna gain in dBi at both ends (default: 2.15)")
+    parser.add_argument("--clutter", type=float, default=0.0, help="Extra loss in dB for buildings/foliage (default: 0)")
+    parser.add_argument("--model", help="Calibrated path loss model (path_loss_calibration.py output)")
+    parser.add_argument("--k-factor", type=float, default=K_FACTOR, help="Effective earth radius factor (default: 4/3)")
+    parser.add_argument("--dem-dir", default=DEFAULT_DEM_DIR, help=f"Directory with .hgt tiles (default: {DEFAULT_DEM_DIR})")
+    parser.add_argument("--offline", action="store_true", help="Only use local tiles, never the elevation web services")
+    parser.add_argument("--api-key", help="Google Elevation API key for the web fallback")
+    parser.add_argument("--out", default="coverage.png", help="PNG output (default: coverage.png, with a .pgw world file)")
+    parser.add_argument("--geojson", help="Also write the margin bands as GeoJSON")
+    args = parser.parse_args()
+
+    if args.grid < 2:
+        parser.error("--grid must be at least 2")
+    try:
+        radio = radio_from_profile(args.profile, args.profiles, preset=args.preset, tx_power_dbm=args.tx_power,
+                                   antenna_gain_dbi=args.gain)
+        model = PathLossModel.load(args.model) if args.model else None
+    except (OSError, ValueError, TypeError) as e:
+        print(f"ERROR: {e}")
+        return 1
+
+    fallback = None
+    if not args.offline:
+        from get_altitude import ElevationCache
+        fallback = {'api_key': args.api_key, 'dem_dir': args.dem_dir, 'cache': ElevationCache()}
+    site = dict(args.site, antenna_m=args.height, rx_antenna_m=args.rx_height)
+    grid = Grid(site['latitude'], site['longitude'], args.radius, args.grid)
+
+    print(f"Coverage of {site['latitude']:.5f},{site['longitude']:.5f} ({args.height:g} m), "
+          f"{args.grid}x{args.grid} cells over {2 * args.radius:g} km, {radio.preset} {radio.tx_power_dbm:g} dBm")
+    start = time.perf_counter()
+    snr, los, terrain = compute_coverage(site, grid, radio, dem_elevation(args.dem_dir, fallback), args.samples,
+                                         args.k_factor, args.clutter, args.workers, model=model)
+    elapsed = time.perf_counter() - start
+    if fallback is not None:
+        fallback['cache'].save()
+
+    margin = snr - radio.required_snr_db
+    write_png(args.out, margin_colors(margin))
+    write_world_file(os.path.splitext(args.out)[0] + '.pgw', grid)
+    summary = summarize(site, grid, margin, los, terrain)
+    if args.geojson:
+        collection = margin_bands(margin, grid)
+        collection['properties'] = {'site': site, 'radio': radio.describe(), 'bounds': grid.bounds(), 'summary': summary}
+        with open(args.geojson, 'w') as f:
+            json.dump(collection, f)
+
+    print(f"Computed in {elapsed:.2f}s ({margin.size / elapsed:,.0f} cells/s)")
+    print(f"Covered: {summary['covered_percent']}% ({summary['covered_km2']} km²), line of sight: {summary['los_percent']}%, "
+          f"farthest covered cell: {summary['max_range_km']} km")
+    if summary['terrain_missing_cells']:
+        print(f"⚠️  {summary['terrain_missing_cells']} cells without elevation data")
+    print(f"Heatmap written: {args.out}" + (f", {args.geojson}" if args.geojson else ""))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+Offline ground elevation from SRTM .hgt tiles
+
+Tiles are memory-mapped read-only (mmap, viewed as a NumPy array), so only the pages around
+the looked-up points are ever read, and heights are bilinearly interpolated
+between the four surrounding samples. A tile named N50E030.hgt covers
+latitude 50..51 and longitude 30..31; both SRTM1 (3601x3601) and SRTM3
+(1201x1201) tiles work. Download them from e.g.
+https://dwtkns.com/srtm30m/ (or any SRTM mirror) and unzip into one
+directory.
+
+Usage:
+    python3 dem.py --dem-dir dem 50.518294 30.518004
+"""
+
+import os
+import sys
+import math
+import mmap
+import json
+import struct
+import argparse
+
+try:
+    import numpy as np
+except ImportError:
+    raise ImportError("numpy module not found. Install with: pip3 install numpy")
+
+DEFAULT_DEM_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'dem')
+
+# SRTM marks missing samples (water, radar shadow) with this value
+VOID = -32768
+
+# Two horizontally adjacent samples
+_PAIR = struct.Struct('>hh')
+
+
+def tile_name(latitude, longitude):
+    """SRTM tile name (without extension) covering a coordinate, e.g. N50E030"""
+    lat = math.floor(latitude)
+    lon = math.floor(longitude)
+    return f"{'N' if lat >= 0 else 'S'}{abs(lat):02d}{'E' if lon >= 0 else 'W'}{abs(lon):03d}"
+
+
+class HgtTile:
+    """One memory-mapped .hgt tile (big-endian int16, north row first)"""
+
+    def __init__(self, path, south, west):
+        size = os.path.getsize(path)
+        samples = math.isqrt(size // 2)
+        if samples < 2 or samples * samples * 2 != size:
+            raise ValueError(f"{path}: not an SRTM .hgt tile ({size} bytes)")
+        self.path = path
+        self.south = south
+        self.west = west
+        self.samples = samples
+        with open(path, 'rb') as f:
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        # Scalar lookups unpack straight from the mapping; the NumPy view of
+        # the same pages serves the vectorized path
+        self.data = np.frombuffer(self.mm, dtype='>i2').reshape(samples, samples)
+
+    def elevation(self, latitude, longitude):
+        """Bilinear height in meters, None if all four neighbours are void
+
+        Void neighbours are left out and the remaining weights renormalized.
+        """
+        last = self.samples - 1
+        row = (self.south + 1 - latitude) * last
+        col = (longitude - self.west) * last
+        r0 = int(row)
+        c0 = int(col)
+        # The south and east edges belong to the last cell
+        if r0 >= last:
+            r0 = last - 1
+        if c0 >= last:
+            c0 = last - 1
+        dr = row - r0
+        dc = col - c0
+
+        offset = (r0 * self.samples + c0) * 2
+        h00, h01 = _PAIR.unpack_from(self.mm, offset)
+        h10, h11 = _PAIR.unpack_from(self.mm, offset + self.samples * 2)
+        if VOID not in (h00, h01, h10, h11):
+            top = h00 + (h01 - h00) * dc
+            bottom = h10 + (h11 - h10) * dc
+            return top + (bottom - top) * dr
+
+        total = 0.0
+        weight = 0.0
+        for h, w in ((h00, (1 - dr) * (1 - dc)), (h01, (1 - dr) * dc), (h10, dr * (1 - dc)), (h11, dr * dc)):
+            if h != VOID:
+                total += h * w
+                weight += w
+        return total / weight if weight > 0 else None
+
+    def elevations(self, latitudes, longitudes):
+        """Vectorized bilinear heights (NaN where void) for arrays inside this tile"""
+        last = self.samples - 1
+        row = (self.south + 1 - np.asarray(latitudes, dtype='f8')) * last
+        col = (np.asarray(longitudes, dtype='f8') - self.west) * last
+        r0 = np.clip(row.astype(np.intp), 0, last - 1)
+        c0 = np.clip(col.astype(np.intp), 0, last - 1)
+        dr = np.clip(row - r0, 0.0, 1.0)
+        dc = np.clip(col - c0, 0.0, 1.0)
+
+        total = np.zeros(row.shape)
+        weight = np.zeros(row.shape)
+        for r, c, w in ((r0, c0, (1 - dr) * (1 - dc)), (r0, c0 + 1, (1 - dr) * dc),
+                        (r0 + 1, c0, dr * (1 - dc)), (r0 + 1, c0 + 1, dr * dc)):
+            h = self.data[r, c].astype('f8')
+            valid = h != VOID
+            total += np.where(valid, h * w, 0.0)
+            weight += np.where(valid, w, 0.0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(weight > 0, total / weight, np.nan)
+
+
+class DemStore:
+    """A directory of .hgt tiles, opened on first use and kept mapped"""
+
+    def __init__(self, directory=DEFAULT_DEM_DIR):
+        self.directory = directory
+        self.tiles = {}
+
+    def available(self):
+        return os.path.isdir(self.directory)
+
+    def _tile(self, lat, lon):
+        """The tile with south-west corner (lat, lon), or None if it is not on disk"""
+        key = (lat, lon)
+        try:
+            return self.tiles[key]
+        except KeyError:
+            pass
+        tile = None
+        name = tile_name(lat, lon)
+        for candidate in (name + '.hgt', name.lower() + '.hgt'):
+            path = os.path.join(self.directory, candidate)
+            if os.path.exists(path):
+                tile = HgtTile(path, *key)
+                break
+        # Missing tiles are cached too, so misses do not hit the filesystem again
+        self.tiles[key] = tile
+        return tile
+
+    def tile(self, latitude, longitude):
+        """The tile covering a coordinate, or None if it is not on disk
+
+        A point on a tile's north or east edge is also on the next tile's
+        south or west edge; floor() names that next tile, so when it is
+        missing the tile to the south or west is used.
+        """
+        lat = math.floor(latitude)
+        lon = math.floor(longitude)
+        tile = self._tile(lat, lon)
+        on_south = latitude == lat
+        on_west = longitude == lon
+        if tile is None and on_south:
+            tile = self._tile(lat - 1, lon)
+        if tile is None and on_west:
+            tile = self._tile(lat, lon - 1)
+        if tile is None and on_south and on_west:
+            tile = self._tile(lat - 1, lon - 1)
+        return tile
+
+    def elevation(self, latitude, longitude):
+        """Height in meters, or None without a tile or with only void samples"""
+        tile = self.tile(latitude, longitude)
+        if tile is None:
+            return None
+        return tile.elevation(latitude, longitude)
+
+    def elevations(self, latitudes, longitudes):
+        """Heights for coordinate arrays (NaN where there is no data), one pass per tile"""
+        lats = np.asarray(latitudes, dtype='f8')
+        lons = np.asarray(longitudes, dtype='f8')
+        out = np.full(lats.shape, np.nan)
+        south = np.floor(lats)
+        west = np.floor(lons)
+        keys = south.astype(np.int64) * 1000 + west.astype(np.int64)
+        for key in np.unique(keys):
+            mask = keys == key
+            first = np.argmax(mask)
+            tile = self._tile(int(south.flat[first]), int(west.flat[first]))
+            if tile is not None:
+                out[mask] = tile.elevations(lats[mask], lons[mask])
+                continue
+            # Points on the missing tile's south or west edge may be on a neighbour
+            for i in np.flatnonzero(mask & ((lats == south) | (lons == west))):
+                height = self.elevation(lats.flat[i], lons.flat[i])
+                if height is not None:
+                    out.flat[i] = height
+        return out
+
+    def lookup(self, latitude, longitude):
+        """get_altitude()-style result dict"""
+        if not self.available():
+            return {"error": f"DEM directory not found: {self.directory}", "success": False}
+        try:
+            tile = self.tile(latitude, longitude)
+            elevation = tile.elevation(latitude, longitude) if tile is not None else None
+        except (OSError, ValueError) as e:
+            return {"error": f"DEM error: {str(e)}", "success": False}
+        if elevation is None:
+            return {"error": f"No DEM data for {tile_name(latitude, longitude)}", "success": False}
+        return {
+            "latitude": latitude,
+            "longitude": longitude,
+            "altitude": round(elevation, 2),
+            "source": "srtm-dem",
+            "tile": tile_name(tile.south, tile.west),
+            "success": True
+        }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Look up ground elevation from local SRTM .hgt tiles")
+    parser.add_argument("latitude", type=float, help="Latitude")
+    parser.add_argument("longitude", type=float, help="Longitude")
+    parser.add_argument("--dem-dir", default=DEFAULT_DEM_DIR, help=f"Directory with .hgt tiles (default: {DEFAULT_DEM_DIR})")
+    args = parser.parse_args()
+
+    result = DemStore(args.dem_dir).lookup(args.latitude, args.longitude)
+    print(json.dumps(result, indent=2))
+    if not result.get("success"):
+        sys.exit(1)
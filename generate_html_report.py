@@ -7,11 +7,36 @@ import json
 import sys
 from datetime import datetime
 
+# Badge classes by meshbench.aggregate.snr_grade() (last: no SNR)
+SNR_BADGES = ("bg-green-100 text-green-800", "bg-yellow-100 text-yellow-800", "bg-red-100 text-red-800", "")
 
-def generate_html_report(test_results):
-    """Generate beautiful HTML report with Tailwind CSS"""
-    
-    html = """<!DOCTYPE html>
+
+def iter_html_report(test_results):
+    """Yield the HTML report for a list of file transfer results chunk by chunk"""
+    # Imported here so an empty run does not wait for NumPy
+    import numpy as np
+    from meshbench.aggregate import transfer_columns, transfer_summary, percent, status_grade, snr_grade, STATUS
+
+    # Load the results into columns once; every statistic below is vectorized
+    cols = transfer_columns(test_results)
+    summary = transfer_summary(cols)
+    success_rates = percent(cols['messages_successful'], cols['messages_sent'])
+    statuses = status_grade(success_rates)
+    snr_grades = snr_grade(cols['snr'])
+    from_nodes = [port.split('/')[-1] for port in cols['port']]
+
+    # Plain Python values format much faster than NumPy scalars in the row loops
+    values = {key: cols[key].tolist() for key in (
+        'file_size_mb', 'total_time', 'throughput_kbps', 'throughput_mbps', 'messages_sent',
+        'messages_successful', 'snr', 'bytes_per_second', 'messages_per_second',
+        'channel_utilization', 'air_util_tx')}
+    has_channel_util = (~np.isnan(cols['channel_utilization'])).tolist()
+    has_air_util = (~np.isnan(cols['air_util_tx'])).tolist()
+    success_rates = success_rates.tolist()
+    statuses = statuses.tolist()
+    snr_grades = snr_grades.tolist()
+
+    yield """<!DOCTYPE html>
 <html lang="en">
 <head>
     <meta charset="UTF-8">
@@ -62,15 +87,12 @@ def generate_html_report(test_results):
         <div class="grid grid-cols-1 md:grid-cols-2 lg:grid-cols-4 gap-6 mb-8">
 """
     
-    # Calculate summary statistics
-    total_tests = len(test_results)
-    avg_throughput = sum(r.get('throughput_kbps', 0) for r in test_results) / total_tests if total_tests > 0 else 0
-    avg_snr = sum(r.get('snr', 0) for r in test_results if r.get('snr')) / len([r for r in test_results if r.get('snr')]) if any(r.get('snr') for r in test_results) else 0
-    total_success = sum(r.get('messages_successful', 0) for r in test_results)
-    total_sent = sum(r.get('messages_sent', 0) for r in test_results)
-    success_rate = (total_success / total_sent * 100) if total_sent > 0 else 0
-    
-    html += f"""
+    total_tests = summary['total_tests']
+    avg_throughput = summary['avg_throughput']
+    avg_snr = summary['avg_snr']
+    success_rate = summary['success_rate']
+
+    yield f"""
             <div class="metric-card bg-white rounded-xl shadow-lg p-6 border-l-4 border-blue-500 slide-in" style="animation-delay: 0.1s">
                 <div class="flex items-center justify-between">
                     <div>
@@ -135,45 +157,21 @@ def generate_html_report(test_results):
 """
     
     # Generate table rows
-    for i, result in enumerate(test_results):
-        from_node = result.get('port', 'Unknown').split('/')[-1]
-        to_node = result.get('target_node', 'Unknown')
-        file_size = result.get('file_size_mb', 0)
-        total_time = result.get('total_time', 0)
-        throughput_kbps = result.get('throughput_kbps', 0)
-        throughput_mbps = result.get('throughput_mbps', 0)
-        messages_sent = result.get('messages_sent', 0)
-        messages_successful = result.get('messages_successful', 0)
-        messages_failed = result.get('messages_failed', 0)
-        snr = result.get('snr', None)
-        success_rate = (messages_successful / messages_sent * 100) if messages_sent > 0 else 0
-        
-        # Determine status color
-        if success_rate >= 95:
-            status_color = "bg-green-100 text-green-800"
-            status_text = "Excellent"
-        elif success_rate >= 80:
-            status_color = "bg-yellow-100 text-yellow-800"
-            status_text = "Good"
-        else:
-            status_color = "bg-red-100 text-red-800"
-            status_text = "Poor"
-        
-        # SNR color
-        snr_color = "text-gray-600"
-        snr_badge = ""
-        if snr is not None:
-            if snr > 10:
-                snr_color = "text-green-600"
-                snr_badge = "bg-green-100 text-green-800"
-            elif snr > 5:
-                snr_color = "text-yellow-600"
-                snr_badge = "bg-yellow-100 text-yellow-800"
-            else:
-                snr_color = "text-red-600"
-                snr_badge = "bg-red-100 text-red-800"
-        
-        html += f"""
+    for i in range(total_tests):
+        from_node = from_nodes[i]
+        to_node = cols['target_node'][i]
+        file_size = values['file_size_mb'][i]
+        total_time = values['total_time'][i]
+        throughput_kbps = values['throughput_kbps'][i]
+        throughput_mbps = values['throughput_mbps'][i]
+        messages_sent = int(values['messages_sent'][i])
+        messages_successful = int(values['messages_successful'][i])
+        snr = values['snr'][i]
+        success_rate = success_rates[i]
+        status_color, status_text = STATUS[statuses[i]]
+        snr_badge = SNR_BADGES[snr_grades[i]]
+
+        yield f"""
                         <tr class="table-row bg-white hover:bg-gray-50" style="animation-delay: {0.6 + i*0.1}s">
                             <td class="px-6 py-4 whitespace-nowrap">
                                 <div class="flex items-center">
@@ -198,17 +196,17 @@ def generate_html_report(test_results):
                             </td>
                             <td class="px-6 py-4 whitespace-nowrap">
 """
-        if snr is not None:
-            html += f"""
+        if snr_grades[i] != 3:
+            yield f"""
                                 <span class="px-2 py-1 text-xs font-semibold rounded-full {snr_badge}">
                                     {snr:.2f} dB
                                 </span>
 """
         else:
-            html += """
+            yield """
                                 <span class="text-xs text-gray-400">N/A</span>
 """
-        html += f"""
+        yield f"""
                             </td>
                             <td class="px-6 py-4 whitespace-nowrap">
                                 <span class="px-2 py-1 text-xs font-semibold rounded-full {status_color}">
@@ -218,7 +216,7 @@ def generate_html_report(test_results):
                         </tr>
 """
     
-    html += """
+    yield """
                     </tbody>
                 </table>
             </div>
@@ -229,43 +227,43 @@ def generate_html_report(test_results):
 """
     
     # Add detailed metrics for each test
-    for i, result in enumerate(test_results):
-        from_node = result.get('port', 'Unknown').split('/')[-1]
-        to_node = result.get('target_node', 'Unknown')
-        
-        html += f"""
+    for i in range(total_tests):
+        from_node = from_nodes[i]
+        to_node = cols['target_node'][i]
+
+        yield f"""
             <div class="bg-white rounded-xl shadow-lg p-6 fade-in" style="animation-delay: {0.8 + i*0.1}s">
                 <h3 class="text-lg font-bold text-gray-800 mb-4">{from_node} → {to_node}</h3>
                 <div class="space-y-3">
                     <div class="flex justify-between items-center">
                         <span class="text-sm text-gray-600">Bytes/sec:</span>
-                        <span class="text-sm font-semibold text-gray-800">{result.get('bytes_per_second', 0):,.0f}</span>
+                        <span class="text-sm font-semibold text-gray-800">{values['bytes_per_second'][i]:,.0f}</span>
                     </div>
                     <div class="flex justify-between items-center">
                         <span class="text-sm text-gray-600">Messages/sec:</span>
-                        <span class="text-sm font-semibold text-gray-800">{result.get('messages_per_second', 0):.2f}</span>
+                        <span class="text-sm font-semibold text-gray-800">{values['messages_per_second'][i]:.2f}</span>
                     </div>
 """
-        if result.get('channel_utilization') is not None:
-            html += f"""
+        if has_channel_util[i]:
+            yield f"""
                     <div class="flex justify-between items-center">
                         <span class="text-sm text-gray-600">Channel Utilization:</span>
-                        <span class="text-sm font-semibold text-gray-800">{result.get('channel_utilization', 0)*100:.1f}%</span>
+                        <span class="text-sm font-semibold text-gray-800">{values['channel_utilization'][i]*100:.1f}%</span>
                     </div>
 """
-        if result.get('air_util_tx') is not None:
-            html += f"""
+        if has_air_util[i]:
+            yield f"""
                     <div class="flex justify-between items-center">
                         <span class="text-sm text-gray-600">Air Util TX:</span>
-                        <span class="text-sm font-semibold text-gray-800">{result.get('air_util_tx', 0)*100:.2f}%</span>
+                        <span class="text-sm font-semibold text-gray-800">{values['air_util_tx'][i]*100:.2f}%</span>
                     </div>
 """
-        html += """
+        yield """
                 </div>
             </div>
 """
     
-    html += """
+    yield """
         </div>
 
         <!-- Footer -->
@@ -277,8 +275,11 @@ def generate_html_report(test_results):
 </body>
 </html>
 """
-    
-    return html
+
+
+def generate_html_report(test_results):
+    """Generate beautiful HTML report with Tailwind CSS"""
+    return "".join(iter_html_report(test_results))
 
 
 if __name__ == "__main__":
@@ -313,13 +314,10 @@ if __name__ == "__main__":
         print("No test results found. Please run tests first.")
         sys.exit(1)
     
-    # Generate HTML
-    html = generate_html_report(test_results)
-    
-    # Write to file
+    # Stream the report to disk as it is generated
     output_file = "mesh_speed_test_report.html"
     with open(output_file, 'w') as f:
-        f.write(html)
+        f.writelines(iter_html_report(test_results))
     
     print(f"HTML report generated: {output_file}")
     print(f"Tests included: {len(test_results)}")
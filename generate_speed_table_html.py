@@ -7,47 +7,40 @@ import json
 import sys
 from datetime import datetime
 
+THROUGHPUT_CLASSES = ("throughput-excellent", "throughput-good", "throughput-poor")
+SNR_TEXT_CLASSES = ("text-green-600", "text-yellow-600", "text-red-600")
+
+
+def iter_html_table(data):
+    """Yield the HTML table for a loaded results JSON chunk by chunk"""
+    # Imported here so the usage message does not wait for NumPy
+    import numpy as np
+    from meshbench.aggregate import pair_columns, pair_summary, pair_matrix, percent, status_grade, \
+        snr_grade, throughput_grade, STATUS
 
-def generate_html_table(json_file):
-    """Generate beautiful HTML table from JSON results"""
-    
-    # Load results
-    with open(json_file, 'r') as f:
-        data = json.load(f)
-    
     results = data.get('results', [])
     timestamp = data.get('timestamp', datetime.now().isoformat())
-    
-    if not results:
-        print("No results found in JSON file")
-        return
-    
-    # Calculate statistics
-    total_tests = len(results)
-    successful = len([r for r in results if r.get('successful', 0) > 0])
-    avg_throughput = sum(r.get('throughput_kbps', 0) for r in results if r.get('throughput_kbps', 0) > 0) / successful if successful > 0 else 0
-    
-    # Build device list
-    devices = set()
-    for result in results:
-        devices.add(result.get('from_name', 'Unknown'))
-        devices.add(result.get('to_name', 'Unknown'))
-    devices = sorted(list(devices))
-    
-    # Build matrix
-    matrix = {}
-    for result in results:
-        key = (result.get('from_name', 'Unknown'), result.get('to_name', 'Unknown'))
-        matrix[key] = {
-            'throughput': result.get('throughput_kbps', 0),
-            'success_rate': (result.get('successful', 0) / result.get('message_count', 30)) * 100 if result.get('message_count', 30) > 0 else 0,
-            'avg_time': result.get('avg_time', 0),
-            'snr': result.get('snr'),
-            'successful': result.get('successful', 0),
-            'total': result.get('message_count', 30)
-        }
-    
-    html = f"""<!DOCTYPE html>
+
+    # Load the results into columns once; every statistic below is vectorized
+    cols = pair_columns(results)
+    summary = pair_summary(cols)
+    total_tests = summary['total_tests']
+    avg_throughput = summary['avg_throughput']
+    success_rates = percent(cols['successful'], cols['message_count'])
+    statuses = status_grade(success_rates)
+    snr_grades = snr_grade(cols['snr'])
+
+    devices, matrix = pair_matrix(cols, {'throughput': cols['throughput_kbps'], 'success_rate': success_rates})
+    missing = np.isnan(matrix['throughput']).tolist()
+    throughput_grades = throughput_grade(matrix['throughput']).tolist()
+
+    # Plain Python values format much faster than NumPy scalars in the row loops
+    matrix = {name: values.tolist() for name, values in matrix.items()}
+    rows = zip(cols['from_name'], cols['to_name'], cols['successful'].tolist(), cols['message_count'].tolist(),
+               success_rates.tolist(), cols['avg_time'].tolist(), cols['throughput_kbps'].tolist(),
+               cols['snr'].tolist(), statuses.tolist(), snr_grades.tolist())
+
+    yield f"""<!DOCTYPE html>
 <html lang="en">
 <head>
     <meta charset="UTF-8">
@@ -116,7 +109,7 @@ def generate_html_table(json_file):
                 <div class="flex items-center justify-between">
                     <div>
                         <p class="text-sm font-medium text-gray-600">Success Rate</p>
-                        <p class="text-3xl font-bold text-gray-800 mt-2">{(successful/total_tests*100):.1f}%</p>
+                        <p class="text-3xl font-bold text-gray-800 mt-2">{summary['success_rate']:.1f}%</p>
                     </div>
                     <div class="text-4xl">✅</div>
                 </div>
@@ -148,51 +141,38 @@ def generate_html_table(json_file):
     
     # Table headers
     for device in devices:
-        html += f"""                            <th class="px-4 py-3 text-center text-xs font-semibold text-gray-700 uppercase tracking-wider border-b">{device}</th>
+        yield f"""                            <th class="px-4 py-3 text-center text-xs font-semibold text-gray-700 uppercase tracking-wider border-b">{device}</th>
 """
     
-    html += """                        </tr>
+    yield """                        </tr>
                     </thead>
                     <tbody class="divide-y divide-gray-200">
 """
     
     # Table rows
     for i, from_dev in enumerate(devices):
-        html += f"""                        <tr class="table-row bg-white hover:bg-gray-50" style="animation-delay: {0.5 + i*0.1}s">
+        yield f"""                        <tr class="table-row bg-white hover:bg-gray-50" style="animation-delay: {0.5 + i*0.1}s">
                             <td class="px-4 py-4 whitespace-nowrap text-sm font-semibold text-gray-900 border-r">{from_dev}</td>
 """
-        for to_dev in devices:
-            if from_dev == to_dev:
-                html += """                            <td class="px-4 py-4 text-center text-sm text-gray-400">---</td>
+        for j in range(len(devices)):
+            if i == j:
+                yield """                            <td class="px-4 py-4 text-center text-sm text-gray-400">---</td>
+"""
+            elif missing[i][j]:
+                yield """                            <td class="px-4 py-4 text-center text-sm text-gray-400">N/A</td>
 """
             else:
-                key = (from_dev, to_dev)
-                if key in matrix:
-                    data = matrix[key]
-                    throughput = data['throughput']
-                    success_rate = data['success_rate']
-                    
-                    # Color coding
-                    if throughput >= 10:
-                        color_class = "throughput-excellent"
-                    elif throughput >= 8:
-                        color_class = "throughput-good"
-                    else:
-                        color_class = "throughput-poor"
-                    
-                    html += f"""                            <td class="px-4 py-4 text-center">
-                                <div class="throughput-cell {color_class}">{throughput:.2f}</div>
-                                <div class="text-xs text-gray-500 mt-1">{success_rate:.0f}%</div>
+                color_class = THROUGHPUT_CLASSES[throughput_grades[i][j]]
+                yield f"""                            <td class="px-4 py-4 text-center">
+                                <div class="throughput-cell {color_class}">{matrix['throughput'][i][j]:.2f}</div>
+                                <div class="text-xs text-gray-500 mt-1">{matrix['success_rate'][i][j]:.0f}%</div>
                             </td>
 """
-                else:
-                    html += """                            <td class="px-4 py-4 text-center text-sm text-gray-400">N/A</td>
-"""
-        
-        html += """                        </tr>
+
+        yield """                        </tr>
 """
-    
-    html += """                    </tbody>
+
+    yield """                    </tbody>
                 </table>
             </div>
         </div>
@@ -219,28 +199,13 @@ def generate_html_table(json_file):
 """
     
     # Detailed rows
-    for i, result in enumerate(results):
-        from_name = result.get('from_name', 'Unknown')
-        to_name = result.get('to_name', 'Unknown')
-        successful = result.get('successful', 0)
-        total = result.get('message_count', 30)
-        success_rate = (successful / total * 100) if total > 0 else 0
-        avg_time = result.get('avg_time', 0)
-        throughput = result.get('throughput_kbps', 0)
-        snr = result.get('snr')
-        
-        # Status
-        if success_rate >= 95:
-            status_color = "bg-green-100 text-green-800"
-            status_text = "Excellent"
-        elif success_rate >= 80:
-            status_color = "bg-yellow-100 text-yellow-800"
-            status_text = "Good"
-        else:
-            status_color = "bg-red-100 text-red-800"
-            status_text = "Poor"
-        
-        html += f"""                        <tr class="table-row bg-white hover:bg-gray-50" style="animation-delay: {0.7 + i*0.05}s">
+    for i, (from_name, to_name, successful, total, success_rate, avg_time, throughput, snr, status,
+            snr_level) in enumerate(rows):
+        successful = int(successful)
+        total = int(total)
+        status_color, status_text = STATUS[status]
+
+        yield f"""                        <tr class="table-row bg-white hover:bg-gray-50" style="animation-delay: {0.7 + i*0.05}s">
                             <td class="px-6 py-4 whitespace-nowrap">
                                 <div class="flex items-center">
                                     <div class="text-sm font-medium text-gray-900">{from_name}</div>
@@ -260,14 +225,14 @@ def generate_html_table(json_file):
                             </td>
                             <td class="px-6 py-4 whitespace-nowrap">
 """
-        if snr is not None:
-            snr_color = "text-green-600" if snr > 10 else "text-yellow-600" if snr > 5 else "text-red-600"
-            html += f"""                                <span class="text-sm {snr_color} font-semibold">{snr:.2f} dB</span>
+        if snr_level != 3:
+            snr_color = SNR_TEXT_CLASSES[snr_level]
+            yield f"""                                <span class="text-sm {snr_color} font-semibold">{snr:.2f} dB</span>
 """
         else:
-            html += """                                <span class="text-xs text-gray-400">N/A</span>
+            yield """                                <span class="text-xs text-gray-400">N/A</span>
 """
-        html += f"""                            </td>
+        yield f"""                            </td>
                             <td class="px-6 py-4 whitespace-nowrap">
                                 <span class="px-2 py-1 text-xs font-semibold rounded-full {status_color}">
                                     {status_text}
@@ -276,7 +241,7 @@ def generate_html_table(json_file):
                         </tr>
 """
     
-    html += """                    </tbody>
+    yield """                    </tbody>
                 </table>
             </div>
         </div>
@@ -290,8 +255,18 @@ def generate_html_table(json_file):
 </body>
 </html>
 """
-    
-    return html
+
+
+def generate_html_table(json_file):
+    """Generate beautiful HTML table from JSON results"""
+    with open(json_file, 'r') as f:
+        data = json.load(f)
+
+    if not data.get('results'):
+        print("No results found in JSON file")
+        return
+
+    return "".join(iter_html_table(data))
 
 
 if __name__ == "__main__":
@@ -300,11 +275,17 @@ if __name__ == "__main__":
         sys.exit(1)
     
     json_file = sys.argv[1]
-    html = generate_html_table(json_file)
-    
+    with open(json_file, 'r') as f:
+        data = json.load(f)
+
+    if not data.get('results'):
+        print("No results found in JSON file")
+        sys.exit(1)
+
+    # Stream the page to disk as it is generated
     output_file = "mesh_speed_table.html"
     with open(output_file, 'w') as f:
-        f.write(html)
-    
+        f.writelines(iter_html_table(data))
+
     print(f"HTML table generated: {output_file}")
 
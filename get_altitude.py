@@ -8,14 +8,36 @@ Usage:
 
 Or use from URL:
     python3 get_altitude.py --url "https://maps.apple.com/frame?center=50.518294,30.518004&..."
+
+Local SRTM .hgt tiles in --dem-dir (default: dem/) are tried before any web
+service, so lookups work offline; see dem.py.
 """
 
 import sys
+import csv
 import json
+import time
 import urllib.request
 import urllib.parse
+import http.client
+import threading
 import re
 import argparse
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+DEFAULT_DEM_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'dem')
+DEFAULT_CACHE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'elevation_cache.json')
+
+OPEN_ELEVATION_URL = "https://api.open-elevation.com/api/v1/lookup"
+GOOGLE_ELEVATION_URL = "https://maps.googleapis.com/maps/api/elevation/json"
+USGS_URL = "https://epqs.nationalmap.gov/v1/xml"
+
+# Points per multi-location request (Google allows up to 512)
+DEFAULT_BATCH_SIZE = 100
+
+# Open DEM stores by directory, so tiles stay mapped across lookups
+_dem_stores = {}
 
 def parse_url(url):
     """Extract coordinates from Apple Maps URL"""
@@ -25,9 +47,27 @@ def parse_url(url):
         return float(match.group(1)), float(match.group(2))
     return None, None
 
+def get_altitude_dem(latitude, longitude, dem_dir=DEFAULT_DEM_DIR):
+    """Get altitude from local SRTM .hgt tiles (offline, see dem.py)"""
+    if not os.path.isdir(dem_dir):
+        return {
+            "error": f"DEM directory not found: {dem_dir}",
+            "success": False
+        }
+    try:
+        from dem import DemStore
+    except ImportError as e:
+        return {
+            "error": f"DEM backend unavailable: {str(e)}",
+            "success": False
+        }
+    if dem_dir not in _dem_stores:
+        _dem_stores[dem_dir] = DemStore(dem_dir)
+    return _dem_stores[dem_dir].lookup(latitude, longitude)
+
 def get_altitude_open_elevation(latitude, longitude):
     """Get altitude using Open-Elevation API (free, no API key required)"""
-    url = "https://api.open-elevation.com/api/v1/lookup"
+    url = OPEN_ELEVATION_URL
     data = {
         "locations": [
             {"latitude": latitude, "longitude": longitude}
@@ -72,7 +112,7 @@ def get_altitude_google_elevation(latitude, longitude, api_key=None):
             "success": False
         }
     
-    url = "https://maps.googleapis.com/maps/api/elevation/json"
+    url = GOOGLE_ELEVATION_URL
     params = {
         "locations": f"{latitude},{longitude}",
         "key": api_key
@@ -105,7 +145,7 @@ def get_altitude_google_elevation(latitude, longitude, api_key=None):
 
 def get_altitude_usgs(latitude, longitude):
     """Get altitude using USGS Elevation Point Query Service (free, US only)"""
-    url = "https://epqs.nationalmap.gov/v1/xml"
+    url = USGS_URL
     params = {
         "x": longitude,
         "y": latitude,
@@ -138,11 +178,16 @@ def get_altitude_usgs(latitude, longitude):
         "success": False
     }
 
-def get_altitude(latitude, longitude, api_key=None):
+def get_altitude(latitude, longitude, api_key=None, dem_dir=DEFAULT_DEM_DIR, offline=False):
     """
-    Get altitude for coordinates, trying multiple services
+    Get altitude for coordinates, trying local DEM tiles and then multiple services
     """
-    # Try Open-Elevation first (free, worldwide, no API key)
+    # Local tiles first: no network needed and answered in microseconds
+    result = get_altitude_dem(latitude, longitude, dem_dir)
+    if result.get("success") or offline:
+        return result
+
+    # Then Open-Elevation (free, worldwide, no API key)
     result = get_altitude_open_elevation(latitude, longitude)
     if result.get("success"):
         return result
@@ -154,7 +199,7 @@ def get_altitude(latitude, longitude, api_key=None):
             return result
     
     # For US coordinates, try USGS as fallback
-    if 24.0 <= latitude <= 50.0 and -125.0 <= longitude <= -66.0:
+    if in_usgs_coverage(latitude, longitude):
         result = get_altitude_usgs(latitude, longitude)
         if result.get("success"):
             return result
@@ -164,6 +209,314 @@ def get_altitude(latitude, longitude, api_key=None):
         "success": False
     }
 
+def in_usgs_coverage(latitude, longitude):
+    """Rough contiguous-US bounding box served by USGS EPQS"""
+    return 24.0 <= latitude <= 50.0 and -125.0 <= longitude <= -66.0
+
+class HttpStatusError(RuntimeError):
+    """The service answered, but with an error status"""
+
+    def __init__(self, status, host):
+        super().__init__(f"HTTP {status} from {host}")
+        self.status = status
+
+class HttpClient:
+    """JSON over HTTP(S) with one kept-alive connection per thread and host"""
+
+    def __init__(self, timeout=10):
+        self.timeout = timeout
+        self.local = threading.local()
+
+    def _connection(self, scheme, host):
+        connections = self.local.__dict__.setdefault('connections', {})
+        conn = connections.get((scheme, host))
+        if conn is None:
+            cls = http.client.HTTPSConnection if scheme == 'https' else http.client.HTTPConnection
+            conn = connections[(scheme, host)] = cls(host, timeout=self.timeout)
+        return conn
+
+    def _drop(self, scheme, host):
+        conn = self.local.__dict__.get('connections', {}).pop((scheme, host), None)
+        if conn is not None:
+            conn.close()
+
+    def request(self, method, url, params=None, body=None):
+        parts = urllib.parse.urlsplit(url)
+        path = parts.path or '/'
+        query = parts.query
+        if params:
+            query = (query + '&' if query else '') + urllib.parse.urlencode(params)
+        if query:
+            path += '?' + query
+        headers = {'Accept': 'application/json'}
+        data = None
+        if body is not None:
+            data = json.dumps(body).encode('utf-8')
+            headers['Content-Type'] = 'application/json'
+
+        # A kept-alive connection may have been closed by the server; retry once on a fresh one
+        for attempt in range(2):
+            conn = self._connection(parts.scheme, parts.netloc)
+            try:
+                conn.request(method, path, body=data, headers=headers)
+                response = conn.getresponse()
+                payload = response.read()
+                break
+            except (http.client.HTTPException, OSError):
+                self._drop(parts.scheme, parts.netloc)
+                if attempt:
+                    raise
+        if response.status >= 400:
+            raise HttpStatusError(response.status, parts.netloc)
+        return json.loads(payload.decode('utf-8'))
+
+class ElevationCache:
+    """Persistent lookup cache keyed by coordinates rounded to `precision` decimals
+
+    4 decimals is ~11 m, finer than the 30 m SRTM grid the services use.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_FILE, precision=4):
+        self.path = path
+        self.precision = precision
+        self.dirty = False
+        try:
+            with open(path, 'r') as f:
+                self.entries = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            self.entries = {}
+
+    def key(self, latitude, longitude):
+        return f"{latitude:.{self.precision}f},{longitude:.{self.precision}f}"
+
+    def get(self, key):
+        return self.entries.get(key)
+
+    def put(self, key, altitude, source):
+        self.entries[key] = {"altitude": altitude, "source": source}
+        self.dirty = True
+
+    def save(self):
+        if self.dirty:
+            with open(self.path, 'w') as f:
+                json.dump(self.entries, f, indent=1, sort_keys=True)
+            self.dirty = False
+
+def chunked(items, size):
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+def batch_open_elevation(client, points, url=OPEN_ELEVATION_URL):
+    """One multi-location POST; returns altitudes in point order (None where missing)"""
+    result = client.request('POST', url, body={
+        "locations": [{"latitude": lat, "longitude": lon} for lat, lon in points]
+    })
+    altitudes = [r.get('elevation') for r in result.get('results') or []]
+    return altitudes if len(altitudes) == len(points) else [None] * len(points)
+
+def batch_google(client, points, api_key, url=GOOGLE_ELEVATION_URL):
+    """One multi-location GET ("lat,lon|lat,lon|..."); altitudes in point order"""
+    result = client.request('GET', url, params={
+        "locations": "|".join(f"{lat},{lon}" for lat, lon in points),
+        "key": api_key
+    })
+    if result.get('status') != 'OK':
+        raise RuntimeError(f"Google API error: {result.get('status', 'Unknown error')}")
+    altitudes = [r.get('elevation') for r in result.get('results') or []]
+    return altitudes if len(altitudes) == len(points) else [None] * len(points)
+
+def batch_usgs(client, points, url=USGS_URL):
+    """USGS takes one point per request; they still share the thread's connection"""
+    lat, lon = points[0]
+    result = client.request('GET', url, params={"x": lon, "y": lat, "units": "Meters", "output": "json"})
+    value = result.get('value')
+    try:
+        return [float(value)]
+    except (TypeError, ValueError):
+        return [None]
+
+def fetch_bisect(fetch, client, points, dropped=None):
+    """
+    fetch() a chunk; if the service rejects it, split it so one bad point
+    only loses itself. Connection errors and rate limiting (429) are not
+    retried, so a service that is down costs one request per chunk. The
+    errors of the parts given up on are appended to dropped.
+    """
+    try:
+        return fetch(client, points)
+    except HttpStatusError as e:
+        if len(points) == 1 or e.status == 429:
+            raise
+    mid = len(points) // 2
+    altitudes = []
+    for part in (points[:mid], points[mid:]):
+        try:
+            altitudes.extend(fetch_bisect(fetch, client, part, dropped))
+        except HttpStatusError as e:
+            altitudes.extend([None] * len(part))
+            if dropped is not None:
+                dropped.append(str(e))
+    return altitudes
+
+def get_altitudes(points, api_key=None, dem_dir=DEFAULT_DEM_DIR, offline=False, cache=None,
+                  batch_size=DEFAULT_BATCH_SIZE, workers=8, urls=None):
+    """
+    Get altitudes for many (latitude, longitude) points
+
+    Points are looked up in the cache, then the local DEM tiles (vectorized),
+    then Open-Elevation, Google (with api_key) and USGS (US points), each
+    provider only getting the points the previous ones could not answer.
+    Points that round to the same cache key are queried once, web requests
+    carry up to batch_size locations each and run `workers` at a time over
+    kept-alive connections. Returns (results in input order, summary).
+    """
+    urls = dict({'open-elevation': OPEN_ELEVATION_URL, 'google-elevation': GOOGLE_ELEVATION_URL,
+                 'usgs': USGS_URL}, **(urls or {}))
+    start = time.time()
+    precision = cache.precision if cache is not None else 4
+    keys = [f"{lat:.{precision}f},{lon:.{precision}f}" for lat, lon in points]
+
+    # One lookup per distinct key
+    found = {}
+    pending = {}
+    for (lat, lon), key in zip(points, keys):
+        if key in found or key in pending:
+            continue
+        entry = cache.get(key) if cache is not None else None
+        if entry is not None:
+            found[key] = dict(entry, cached=True)
+        else:
+            pending[key] = (lat, lon)
+    summary = {'points': len(points), 'unique': len(found) + len(pending), 'cached': len(found)}
+    errors = {}
+
+    def resolve(source, answered):
+        for key, altitude in answered.items():
+            if altitude is not None:
+                found[key] = {"altitude": altitude, "source": source, "cached": False}
+                pending.pop(key)
+                if cache is not None and source != 'srtm-dem':
+                    cache.put(key, altitude, source)
+        summary[source] = sum(1 for a in answered.values() if a is not None)
+
+    # Local tiles, all pending points at once
+    if pending and os.path.isdir(dem_dir):
+        try:
+            from dem import DemStore
+            if dem_dir not in _dem_stores:
+                _dem_stores[dem_dir] = DemStore(dem_dir)
+            heights = _dem_stores[dem_dir].elevations([p[0] for p in pending.values()],
+                                                      [p[1] for p in pending.values()])
+            resolve('srtm-dem', {key: (None if h != h else round(float(h), 2))
+                                 for key, h in zip(list(pending), heights)})
+        except (ImportError, OSError, ValueError) as e:
+            errors['srtm-dem'] = str(e)
+
+    providers = [
+        ('open-elevation', lambda client, chunk: batch_open_elevation(client, chunk, urls['open-elevation']),
+         batch_size, lambda lat, lon: True),
+    ]
+    if api_key:
+        providers.append(('google-elevation', lambda client, chunk: batch_google(client, chunk, api_key, urls['google-elevation']),
+                          batch_size, lambda lat, lon: True))
+    providers.append(('usgs', lambda client, chunk: batch_usgs(client, chunk, urls['usgs']), 1, in_usgs_coverage))
+
+    client = HttpClient()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for source, fetch, size, covers in providers:
+            if offline or not pending:
+                break
+            todo = [(key, point) for key, point in pending.items() if covers(*point)]
+            if not todo:
+                continue
+            chunks = chunked(todo, size)
+            dropped = []
+            futures = [pool.submit(fetch_bisect, fetch, client, [point for _, point in chunk], dropped)
+                       for chunk in chunks]
+            answered = {}
+            for chunk, future in zip(chunks, futures):
+                try:
+                    altitudes = future.result()
+                except Exception as e:
+                    errors[source] = str(e)
+                    continue
+                for (key, _), altitude in zip(chunk, altitudes):
+                    answered[key] = altitude
+            if dropped:
+                errors[source] = dropped[-1]
+            resolve(source, answered)
+
+    results = []
+    for (lat, lon), key in zip(points, keys):
+        entry = found.get(key)
+        if entry is not None:
+            results.append(dict({"latitude": lat, "longitude": lon}, **entry, success=True))
+        else:
+            results.append({"latitude": lat, "longitude": lon,
+                            "error": "Could not retrieve altitude from any service", "success": False})
+    summary['failed'] = len(pending)
+    summary['errors'] = errors
+    summary['seconds'] = round(time.time() - start, 3)
+    return results, summary
+
+def load_points(path):
+    """
+    Points from a JSON list ([lat, lon] pairs or objects with latitude/longitude
+    or lat/lon) or a CSV file (lat/lon or latitude/longitude header, or the
+    first two columns). Extra fields such as a name are kept.
+    """
+    def from_mapping(row):
+        lat = row.get('latitude', row.get('lat'))
+        lon = row.get('longitude', row.get('lon', row.get('lng')))
+        extra = {k: v for k, v in row.items() if k not in ('latitude', 'lat', 'longitude', 'lon', 'lng')}
+        return dict(extra, latitude=float(lat), longitude=float(lon))
+
+    with open(path, 'r', newline='') as f:
+        if path.endswith('.json'):
+            data = json.load(f)
+            if isinstance(data, dict):
+                data = data.get('points') or data.get('locations') or []
+            return [from_mapping(item) if isinstance(item, dict) else {"latitude": float(item[0]), "longitude": float(item[1])}
+                    for item in data]
+
+        rows = list(csv.reader(f))
+    if not rows:
+        return []
+    header = [h.strip().lower() for h in rows[0]]
+    if {'lat', 'latitude'} & set(header):
+        return [from_mapping(dict(zip(header, row))) for row in rows[1:] if row]
+    return [{"latitude": float(row[0]), "longitude": float(row[1])} for row in rows if row]
+
+def run_batch(args):
+    points = load_points(args.batch)
+    invalid = [p for p in points if not (-90 <= p['latitude'] <= 90) or not (-180 <= p['longitude'] <= 180)]
+    if invalid:
+        print(json.dumps({
+            "error": f"Invalid coordinates in {args.batch}: {invalid[0]}",
+            "success": False
+        }), file=sys.stderr)
+        return 1
+
+    cache = None if args.no_cache else ElevationCache(args.cache, args.precision)
+    results, summary = get_altitudes(
+        [(p['latitude'], p['longitude']) for p in points], args.api_key, args.dem_dir, args.offline, cache,
+        args.batch_size, args.workers, {'open-elevation': args.open_elevation_url})
+    if cache is not None:
+        cache.save()
+
+    # Keep the input's extra fields (names, ...) next to each result
+    for point, result in zip(points, results):
+        for k, v in point.items():
+            result.setdefault(k, v)
+    output = json.dumps({"results": results, "summary": summary}, indent=2)
+    if args.out:
+        with open(args.out, 'w') as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+    print(f"{summary['points']} points ({summary['unique']} unique): {summary['cached']} cached, "
+          f"{summary['failed']} failed in {summary['seconds']:.2f}s", file=sys.stderr)
+    return 0 if summary['failed'] == 0 else 1
+
 def main():
     parser = argparse.ArgumentParser(
         description="Get altitude/elevation for GPS coordinates",
@@ -173,6 +526,8 @@ Examples:
   python3 get_altitude.py 50.518294 30.518004
   python3 get_altitude.py --url "https://maps.apple.com/frame?center=50.518294,30.518004&..."
   python3 get_altitude.py 50.518294 30.518004 --api-key YOUR_GOOGLE_API_KEY
+  python3 get_altitude.py 50.518294 30.518004 --dem-dir ~/srtm --offline
+  python3 get_altitude.py --batch survey.csv --out survey_altitudes.json
         """
     )
     
@@ -181,9 +536,22 @@ Examples:
     parser.add_argument('--url', type=str, help='Apple Maps URL to extract coordinates from')
     parser.add_argument('--api-key', type=str, help='Google Elevation API key (optional)')
     parser.add_argument('--json', action='store_true', help='Output only JSON')
+    parser.add_argument('--dem-dir', default=DEFAULT_DEM_DIR, help='Directory with SRTM .hgt tiles, tried first (default: dem/ next to this script)')
+    parser.add_argument('--offline', action='store_true', help='Only use the local DEM tiles, never the web services')
+    parser.add_argument('--batch', help='Look up every point in a CSV or JSON file (see load_points) and output JSON')
+    parser.add_argument('--out', help='Write batch results to this file instead of stdout')
+    parser.add_argument('--cache', default=DEFAULT_CACHE_FILE, help='Batch lookup cache file (default: elevation_cache.json next to this script)')
+    parser.add_argument('--no-cache', action='store_true', help='Do not read or write the batch cache')
+    parser.add_argument('--precision', type=int, default=4, help='Decimals the cache rounds coordinates to (default: 4, ~11 m)')
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help=f'Locations per web request (default: {DEFAULT_BATCH_SIZE})')
+    parser.add_argument('--workers', type=int, default=8, help='Concurrent web requests (default: 8)')
+    parser.add_argument('--open-elevation-url', default=OPEN_ELEVATION_URL, help='Open-Elevation lookup endpoint, e.g. a self-hosted instance')
     
     args = parser.parse_args()
     
+    if args.batch:
+        sys.exit(run_batch(args))
+    
     # Parse URL if provided
     if args.url:
         lat, lon = parse_url(args.url)
@@ -209,7 +577,7 @@ Examples:
         sys.exit(1)
     
     # Get altitude
-    result = get_altitude(latitude, longitude, args.api_key)
+    result = get_altitude(latitude, longitude, args.api_key, args.dem_dir, args.offline)
     
     if args.json:
         print(json.dumps(result, indent=2))
@@ -0,0 +1,392 @@
+#!/usr/bin/env python3
+"""
+Line-of-sight and Fresnel-zone link predictor between node positions
+Samples the terrain profile between two positions (local SRTM tiles via
+dem.py, falling back to get_altitude.py's cached web lookups), lifts it by the
+earth bulge for an effective earth radius of k * 6371 km, and checks line of
+sight and clearance of the first Fresnel zone. Path loss is free space plus
+ITU-R P.526 knife-edge diffraction over the dominant obstacle; expected SNR
+and link margin follow from the configured TX power and modem preset
+(lora_radio.py, repeater_net/profiles.json).
+
+All links of a batch are evaluated at once as (links x samples) arrays, so
+candidate sites can be scored by the thousand per second.
+
+Usage:
+    python3 link_predictor.py 50.5183,30.5180 50.5402,30.6021 --height 2 --to-height 12
+    python3 link_predictor.py --nodes positions.json
+    python3 link_predictor.py --nodes positions.json --preset LONG_FAST --json
+    python3 link_predictor.py --benchmark 5000 --dem-dir ~/srtm
+"""
+
+import sys
+import json
+import time
+import argparse
+from dataclasses import dataclass, asdict
+
+try:
+    import numpy as np
+except ImportError:
+    raise ImportError("numpy module not found. Install with: pip3 install numpy")
+
+from dem import DemStore, DEFAULT_DEM_DIR
+from lora_radio import Radio, MODEM_PRESETS, DEFAULT_PROFILES_FILE, radio_from_profile
+
+EARTH_RADIUS_M = 6371000.0
+# Standard atmosphere refraction bends radio paths over an earth 4/3 its size
+K_FACTOR = 4 / 3
+DEFAULT_SAMPLES = 256
+DEFAULT_ANTENNA_HEIGHT = 2.0
+# Clearance (fraction of the first Fresnel zone radius) that counts as unobstructed
+FRESNEL_CLEARANCE = 0.6
+
+
+def haversine_m(lat1, lon1, lat2, lon2):
+    """Great-circle distance in meters, element-wise over arrays"""
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(v, dtype='f8')) for v in (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def knife_edge_loss(nu):
+    """ITU-R P.526 single knife-edge diffraction loss J(nu) in dB (0 below nu = -0.78)"""
+    nu = np.asarray(nu, dtype='f8')
+    v = np.maximum(nu, -0.78) - 0.1
+    loss = 6.9 + 20 * np.log10(np.sqrt(v * v + 1) + v)
+    return np.where(nu > -0.78, loss, 0.0)
+
+
+def free_space_loss(distance_m, frequency_mhz):
+    """Free-space path loss in dB"""
+    distance_km = np.maximum(np.asarray(distance_m, dtype='f8'), 1.0) / 1000
+    return 20 * np.log10(distance_km) + 20 * np.log10(frequency_mhz) + 32.44
+
+
+@dataclass(slots=True)
+class PathLossModel:
+    """Log-distance path loss with weighted terrain diffraction
+
+    loss = intercept_db + 10 * exponent * log10(d / 1 km) + diffraction_weight * J + clutter_db
+
+    The defaults are free space (intercept_db None = free-space loss at 1 km
+    for the radio's frequency) plus the full knife-edge loss;
+    path_loss_calibration.py fits them to measured SNR.
+    """
+    intercept_db: float = None
+    exponent: float = 2.0
+    diffraction_weight: float = 1.0
+    clutter_db: float = 0.0
+
+    def loss(self, distance_m, diffraction_db, frequency_mhz):
+        intercept = self.intercept_db
+        if intercept is None:
+            intercept = 20 * np.log10(frequency_mhz) + 32.44
+        distance_km = np.maximum(np.asarray(distance_m, dtype='f8'), 1.0) / 1000
+        return intercept + 10 * self.exponent * np.log10(distance_km) + self.diffraction_weight * diffraction_db \
+            + self.clutter_db
+
+    def to_dict(self):
+        return asdict(self)
+
+    @classmethod
+    def load(cls, path):
+        """Model from a JSON file, either a calibration result ({"model": {...}}) or the bare fields"""
+        with open(path, 'r') as f:
+            data = json.load(f)
+        fields = data.get('model', data)
+        return cls(**{key: fields[key] for key in cls.__dataclass_fields__ if key in fields})
+
+
+def dem_elevation(dem_dir=DEFAULT_DEM_DIR, fallback=None):
+    """Terrain height function (lats, lons) -> meters, NaN where unknown
+
+    Heights come from the local tiles; with fallback=get_altitude options
+    (a dict of get_altitudes() keyword arguments) points without a tile are
+    looked up through get_altitude.py's providers and cache instead.
+    """
+    store = DemStore(dem_dir)
+
+    def elevation(lats, lons):
+        heights = store.elevations(lats, lons)
+        if fallback is not None:
+            missing = np.isnan(heights)
+            if missing.any():
+                from get_altitude import get_altitudes
+                points = list(zip(lats[missing].tolist(), lons[missing].tolist()))
+                results, _ = get_altitudes(points, **fallback)
+                heights[missing] = [r['altitude'] if r['success'] else np.nan for r in results]
+        return heights
+
+    return elevation
+
+
+class LinkPredictor:
+    """Terrain-aware link budget for batches of links
+
+    elevation is a function (lats, lons) -> heights in meters (NaN where
+    unknown), see dem_elevation(). model is the PathLossModel (free space
+    plus knife-edge diffraction by default, or a calibrated one);
+    clutter_db is added on top to every link's path loss (buildings, foliage).
+    """
+
+    def __init__(self, elevation, radio=None, samples=DEFAULT_SAMPLES, k_factor=K_FACTOR, clutter_db=0.0,
+                 block_links=8192, model=None):
+        if samples < 3:
+            raise ValueError("samples must be at least 3")
+        self.elevation = elevation
+        self.radio = radio or Radio()
+        self.samples = samples
+        self.k_factor = k_factor
+        self.clutter_db = clutter_db
+        self.model = model or PathLossModel()
+        self.block_links = block_links
+        self.t = np.linspace(0.0, 1.0, samples)
+
+    def profiles(self, lat1, lon1, lat2, lon2):
+        """Sample coordinates and terrain heights along each link, (links x samples) arrays
+
+        Points are spaced evenly in latitude/longitude, which stays within a
+        few meters of the great circle over LoRa distances.
+        """
+        lat1, lon1, lat2, lon2 = (np.atleast_1d(np.asarray(v, dtype='f8')) for v in (lat1, lon1, lat2, lon2))
+        lats = lat1[:, None] + (lat2 - lat1)[:, None] * self.t
+        lons = lon1[:, None] + (lon2 - lon1)[:, None] * self.t
+        ground = self.elevation(lats.ravel(), lons.ravel()).reshape(lats.shape)
+        return lats, lons, ground
+
+    def predict(self, lat1, lon1, height1, lat2, lon2, height2):
+        """Predict every link between (lat1, lon1) and (lat2, lon2), arrays of equal length
+
+        height1/height2 are antenna heights above ground (scalars or arrays).
+        Returns a dict of arrays, one element per link. Large batches are
+        evaluated block_links links at a time to bound memory.
+        """
+        lat1, lon1, lat2, lon2 = (np.atleast_1d(np.asarray(v, dtype='f8')) for v in (lat1, lon1, lat2, lon2))
+        height1, height2 = (np.broadcast_to(np.asarray(h, dtype='f8'), lat1.shape) for h in (height1, height2))
+        blocks = []
+        for start in range(0, max(len(lat1), 1), self.block_links):
+            part = slice(start, start + self.block_links)
+            _, _, ground = self.profiles(lat1[part], lon1[part], lat2[part], lon2[part])
+            distance = haversine_m(lat1[part], lon1[part], lat2[part], lon2[part])
+            blocks.append(self.evaluate(distance, ground, height1[part], height2[part]))
+        if len(blocks) == 1:
+            return blocks[0]
+        return {key: np.concatenate([block[key] for block in blocks]) for key in blocks[0]}
+
+    def evaluate(self, distance, ground, height1, height2):
+        """Link budget from distances (links,) and terrain profiles (links x samples)"""
+        radio = self.radio
+        missing = np.isnan(ground)
+        missing_samples = missing.sum(axis=1)
+        # Unknown endpoints sit at sea level; unknown interior samples never obstruct
+        ends = np.nan_to_num(ground[:, [0, -1]], nan=0.0)
+        ground = np.where(missing, -np.inf, ground)
+
+        tx = ends[:, 0] + np.asarray(height1, dtype='f8')
+        rx = ends[:, 1] + np.asarray(height2, dtype='f8')
+        t = self.t[1:-1]
+        d1 = distance[:, None] * t
+        d2 = distance[:, None] - d1
+        bulge = d1 * d2 / (2 * self.k_factor * EARTH_RADIUS_M)
+        ray = tx[:, None] + (rx - tx)[:, None] * t
+        clearance = ray - (ground[:, 1:-1] + bulge)
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            fresnel = np.sqrt(radio.wavelength_m * d1 * d2 / np.maximum(distance, 1.0)[:, None])
+            ratio = clearance / fresnel
+        worst = np.argmin(ratio, axis=1)
+        rows = np.arange(len(distance))
+        worst_ratio = ratio[rows, worst]
+        worst_ratio = np.where(np.isfinite(worst_ratio), worst_ratio, np.inf)
+
+        fspl = free_space_loss(distance, radio.frequency_mhz)
+        # nu = h * sqrt(2 d / (lambda d1 d2)) = -sqrt(2) * clearance / Fresnel radius
+        diffraction = knife_edge_loss(-np.sqrt(2) * np.minimum(worst_ratio, 10.0))
+        path_loss = self.model.loss(distance, diffraction, radio.frequency_mhz) + self.clutter_db
+        rx_power = radio.eirp_dbm + radio.antenna_gain_dbi - radio.cable_loss_db - path_loss
+        snr = rx_power - radio.noise_floor_dbm
+
+        return {
+            'distance_m': distance,
+            'los_clear': clearance.min(axis=1, initial=np.inf) > 0,
+            'fresnel_clear': worst_ratio >= FRESNEL_CLEARANCE,
+            'fresnel_ratio': worst_ratio,
+            'obstacle_m': d1[rows, worst],
+            'obstruction_m': -clearance[rows, worst],
+            'fspl_db': fspl,
+            'diffraction_db': diffraction,
+            'path_loss_db': path_loss,
+            'rx_power_dbm': rx_power,
+            'snr_db': snr,
+            'margin_db': snr - radio.required_snr_db,
+            'missing_samples': missing_samples,
+        }
+
+    def predict_link(self, a, b):
+        """One link between two position dicts (latitude, longitude, optional antenna_m)"""
+        out = self.predict(a['latitude'], a['longitude'], a.get('antenna_m', DEFAULT_ANTENNA_HEIGHT),
+                           b['latitude'], b['longitude'], b.get('antenna_m', DEFAULT_ANTENNA_HEIGHT))
+        return link_dict(out, 0)
+
+
+def link_dict(out, i):
+    """Plain JSON-ready values of link i of a predict() result"""
+    result = {}
+    for key, values in out.items():
+        value = values[i].item()
+        if isinstance(value, float):
+            value = round(value, 2) if np.isfinite(value) else None
+        result[key] = value
+    return result
+
+
+def load_positions(path):
+    """Named positions from a nodes.json-style file
+
+    Either {"nodes": [...]} (repeater_net/nodes.json entries with latitude,
+    longitude and optional antenna_m added; entries without a position are
+    skipped) or a plain list of such objects. The id, port, host and role
+    of an entry are kept when present.
+    """
+    with open(path, 'r') as f:
+        data = json.load(f)
+    if isinstance(data, dict):
+        data = data.get('nodes', [])
+    positions = []
+    for i, node in enumerate(data):
+        lat = node.get('latitude', node.get('lat'))
+        lon = node.get('longitude', node.get('lon'))
+        if lat is None or lon is None:
+            continue
+        position = {'name': node.get('name', f"node{i}"), 'latitude': float(lat), 'longitude': float(lon),
+                    'antenna_m': float(node.get('antenna_m', DEFAULT_ANTENNA_HEIGHT))}
+        position.update({key: node[key] for key in ('id', 'port', 'host', 'role') if node.get(key)})
+        positions.append(position)
+    return positions
+
+
+def parse_position(text):
+    """'lat,lon' -> position dict"""
+    try:
+        lat, lon = (float(part) for part in text.split(','))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected LAT,LON, got {text!r}")
+    if not (-90 <= lat <= 90) or not (-180 <= lon <= 180):
+        raise argparse.ArgumentTypeError(f"coordinates out of range: {text}")
+    return {'name': text, 'latitude': lat, 'longitude': lon}
+
+
+def print_links(links, radio):
+    print("="*96)
+    print(f"LINK PREDICTION  {radio.region} {radio.preset} (SF{radio.spreading_factor}/{radio.bandwidth_khz:g} kHz) "
+          f"@ {radio.frequency_mhz:.3f} MHz, {radio.tx_power_dbm:g} dBm, needs {radio.required_snr_db:g} dB SNR")
+    print("="*96)
+    print(f"{'From':<12} {'To':<12} {'km':>7} {'LOS':>4} {'Fresnel':>8} {'Loss dB':>8} {'RX dBm':>8} {'SNR dB':>7} {'Margin':>7}")
+    for link in links:
+        ratio = link['fresnel_ratio']
+        ratio_text = "clear" if ratio is None or ratio >= 10 else f"{ratio*100:.0f}%"
+        print(f"{link['from']:<12} {link['to']:<12} {link['distance_m']/1000:>7.2f} "
+              f"{'yes' if link['los_clear'] else 'no':>4} {ratio_text:>8} {link['path_loss_db']:>8.1f} "
+              f"{link['rx_power_dbm']:>8.1f} {link['snr_db']:>7.1f} {link['margin_db']:>7.1f}")
+        if link['missing_samples']:
+            print(f"  ⚠️  {link['missing_samples']} profile samples without elevation data")
+    print("="*96)
+
+
+def benchmark(predictor, count, center=(50.5183, 30.5180), spread=0.2, seed=1):
+    """Time count random links around center; returns links per second"""
+    rng = np.random.default_rng(seed)
+    lat = center[0] + rng.uniform(-spread, spread, (2, count))
+    lon = center[1] + rng.uniform(-spread, spread, (2, count))
+    start = time.perf_counter()
+    out = predictor.predict(lat[0], lon[0], DEFAULT_ANTENNA_HEIGHT, lat[1], lon[1], DEFAULT_ANTENNA_HEIGHT)
+    elapsed = time.perf_counter() - start
+    print(f"{count} links x {predictor.samples} samples in {elapsed*1000:.1f} ms "
+          f"({count/elapsed:,.0f} links/s, {np.count_nonzero(out['margin_db'] > 0)} close)")
+    return count / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Predict LOS, Fresnel clearance, path loss and SNR between node positions",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  python3 link_predictor.py 50.5183,30.5180 50.5402,30.6021 --height 2 --to-height 12
+  python3 link_predictor.py --nodes positions.json --preset LONG_FAST --json
+        """
+    )
+    parser.add_argument("positions", nargs='*', type=parse_position, metavar="LAT,LON",
+                        help="Two positions to predict the link between")
+    parser.add_argument("--nodes", help="JSON file of named positions (latitude, longitude, antenna_m); predicts every pair")
+    parser.add_argument("--height", type=float, default=DEFAULT_ANTENNA_HEIGHT,
+                        help=f"Antenna height above ground in meters (default: {DEFAULT_ANTENNA_HEIGHT})")
+    parser.add_argument("--to-height", type=float, help="Antenna height at the second position (default: --height)")
+    parser.add_argument("--profile", default="base", help="Radio profile in profiles.json (default: base)")
+    parser.add_argument("--profiles", default=DEFAULT_PROFILES_FILE, help="Profiles file")
+    parser.add_argument("--preset", choices=sorted(MODEM_PRESETS), help="Modem preset (default: the profile's)")
+    parser.add_argument("--tx-power", type=float, help="TX power in dBm (default: the profile's, else the region limit)")
+    parser.add_argument("--frequency", type=float, help="Frequency in MHz (default: the preset's channel slot)")
+    parser.add_argument("--gain", type=float, help="Antenna gain in dBi at both ends (default: 2.15)")
+    parser.add_argument("--clutter", type=float, default=0.0, help="Extra loss in dB for buildings/foliage (default: 0)")
+    parser.add_argument("--model", help="Calibrated path loss model (path_loss_calibration.py output)")
+    parser.add_argument("--samples", type=int, default=DEFAULT_SAMPLES, help=f"Profile samples per link (default: {DEFAULT_SAMPLES})")
+    parser.add_argument("--k-factor", type=float, default=K_FACTOR, help="Effective earth radius factor (default: 4/3)")
+    parser.add_argument("--dem-dir", default=DEFAULT_DEM_DIR, help=f"Directory with .hgt tiles (default: {DEFAULT_DEM_DIR})")
+    parser.add_argument("--offline", action="store_true", help="Only use local tiles, never the elevation web services")
+    parser.add_argument("--api-key", help="Google Elevation API key for the web fallback")
+    parser.add_argument("--json", action="store_true", help="Print JSON instead of a table")
+    parser.add_argument("--benchmark", type=int, metavar="N", help="Time N random links and exit")
+    args = parser.parse_args()
+
+    try:
+        radio = radio_from_profile(args.profile, args.profiles, preset=args.preset, tx_power_dbm=args.tx_power,
+                                   frequency_mhz=args.frequency, antenna_gain_dbi=args.gain)
+        model = PathLossModel.load(args.model) if args.model else None
+    except (OSError, ValueError, TypeError) as e:
+        print(f"ERROR: {e}")
+        return 1
+
+    fallback = None
+    if not args.offline:
+        from get_altitude import ElevationCache
+        fallback = {'api_key': args.api_key, 'dem_dir': args.dem_dir, 'cache': ElevationCache()}
+    predictor = LinkPredictor(dem_elevation(args.dem_dir, fallback), radio, args.samples, args.k_factor, args.clutter,
+                              model=model)
+
+    if args.benchmark:
+        predictor.elevation = dem_elevation(args.dem_dir)
+        benchmark(predictor, args.benchmark)
+        return 0
+
+    to_height = args.height if args.to_height is None else args.to_height
+    if args.nodes:
+        positions = load_positions(args.nodes)
+        pairs = [(a, b) for i, a in enumerate(positions) for b in positions[i + 1:]]
+    elif len(args.positions) == 2:
+        a, b = args.positions
+        pairs = [(dict(a, antenna_m=args.height), dict(b, antenna_m=to_height))]
+    else:
+        parser.error("give two LAT,LON positions or --nodes")
+    if not pairs:
+        print("ERROR: need at least two positions")
+        return 1
+
+    out = predictor.predict([a['latitude'] for a, _ in pairs], [a['longitude'] for a, _ in pairs],
+                            np.array([a['antenna_m'] for a, _ in pairs]),
+                            [b['latitude'] for _, b in pairs], [b['longitude'] for _, b in pairs],
+                            np.array([b['antenna_m'] for _, b in pairs]))
+    links = [dict({'from': a['name'], 'to': b['name']}, **link_dict(out, i)) for i, (a, b) in enumerate(pairs)]
+    if fallback is not None:
+        fallback['cache'].save()
+
+    if args.json:
+        print(json.dumps({'radio': radio.describe(), 'links': links}, indent=2))
+    else:
+        print_links(links, radio)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
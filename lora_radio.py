@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+LoRa radio parameters for the Meshtastic modem presets and regions
+Spreading factor, bandwidth and coding rate per preset, packet time on air,
+the region bands, power and duty cycle limits, the firmware's channel
+frequency slotting, receiver noise floor and demodulation limits, and the
+radio settings resolved from repeater_net/profiles.json. No dependencies, so
+it is cheap to import.
+
+Usage:
+    python3 lora_radio.py
+    python3 lora_radio.py --profile repeater
+"""
+
+import os
+import copy
+import json
+import math
+import argparse
+from dataclasses import dataclass, asdict
+
+DEFAULT_PROFILES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'repeater_net', 'profiles.json')
+
+# (spreading factor, bandwidth kHz, coding rate denominator 4/x), as in the firmware
+MODEM_PRESETS = {
+    'SHORT_TURBO': (7, 500, 5),
+    'SHORT_FAST': (7, 250, 5),
+    'SHORT_SLOW': (8, 250, 5),
+    'MEDIUM_FAST': (9, 250, 5),
+    'MEDIUM_SLOW': (10, 250, 5),
+    'LONG_TURBO': (11, 500, 8),
+    'LONG_FAST': (11, 250, 5),
+    'LONG_MODERATE': (11, 125, 8),
+    'LONG_SLOW': (12, 125, 8),
+    'VERY_LONG_SLOW': (12, 62.5, 8),
+}
+
+# Channel name the firmware uses when the primary channel has no name
+PRESET_NAMES = {
+    'SHORT_TURBO': 'ShortTurbo',
+    'SHORT_FAST': 'ShortFast',
+    'SHORT_SLOW': 'ShortSlow',
+    'MEDIUM_FAST': 'MediumFast',
+    'MEDIUM_SLOW': 'MediumSlow',
+    'LONG_TURBO': 'LongTurbo',
+    'LONG_FAST': 'LongFast',
+    'LONG_MODERATE': 'LongMod',
+    'LONG_SLOW': 'LongSlow',
+    'VERY_LONG_SLOW': 'VLongSlow',
+}
+
+# Band start/end (MHz), duty cycle (%) and TX power limit (dBm) per region
+REGIONS = {
+    'UA_433': {'freq_start': 433.0, 'freq_end': 434.7, 'duty_cycle': 10, 'power_limit': 10},
+    'EU_433': {'freq_start': 433.0, 'freq_end': 434.0, 'duty_cycle': 10, 'power_limit': 12},
+    'EU_868': {'freq_start': 869.4, 'freq_end': 869.65, 'duty_cycle': 10, 'power_limit': 27},
+    'US': {'freq_start': 902.0, 'freq_end': 928.0, 'duty_cycle': 100, 'power_limit': 30},
+}
+
+# SNR (dB) the SX126x/SX127x demodulator still decodes at, per spreading factor
+DEMOD_SNR = {7: -7.5, 8: -10.0, 9: -12.5, 10: -15.0, 11: -17.5, 12: -20.0}
+
+# Meshtastic frame: preamble length, the unencrypted packet header and the
+# Data protobuf around a payload (portnum, payload tag/length, bitfield)
+PREAMBLE_SYMBOLS = 16
+HEADER_BYTES = 16
+DATA_OVERHEAD_BYTES = 6
+MAX_LORA_PAYLOAD = 255
+
+
+def bitrate_bps(preset):
+    """Raw LoRa bit rate of a preset: SF * BW / 2^SF * 4 / CR"""
+    sf, bw, cr = MODEM_PRESETS[preset]
+    return sf * bw * 1000 / (1 << sf) * 4 / cr
+
+
+def time_on_air(preset, payload_bytes, overhead=True):
+    """Seconds on air of one packet (Semtech SX126x formula: explicit header, CRC on)
+
+    payload_bytes is the application payload; with overhead the Meshtastic
+    header and Data framing are added, capped at the LoRa maximum.
+    """
+    sf, bw, cr = MODEM_PRESETS[preset]
+    length = min(payload_bytes + (HEADER_BYTES + DATA_OVERHEAD_BYTES if overhead else 0), MAX_LORA_PAYLOAD)
+    symbol = (1 << sf) / (bw * 1000)
+    # Low data rate optimization is on when a symbol is longer than 16 ms
+    de = 1 if symbol > 0.016 else 0
+    payload_symbols = 8 + max(math.ceil((8 * length - 4 * sf + 28 + 16) / (4 * (sf - 2 * de))) * cr, 0)
+    return (PREAMBLE_SYMBOLS + 4.25 + payload_symbols) * symbol
+
+
+def channel_hash(name):
+    """The firmware's djb2 hash of a channel name, used to pick the frequency slot"""
+    h = 5381
+    for c in name.encode('utf-8'):
+        h = (h * 33 + c) & 0xFFFFFFFF
+    return h
+
+
+def channel_frequency(region, preset, channel_name=None, channel_num=0):
+    """Centre frequency in MHz the firmware tunes to
+
+    channel_num is lora.channel_num (1-based, 0 = derive the slot from the
+    primary channel's name, which defaults to the preset's name).
+    """
+    band = REGIONS[region]
+    bw = MODEM_PRESETS[preset][1]
+    slots = max(1, int((band['freq_end'] - band['freq_start']) // (bw / 1000)))
+    if channel_num:
+        slot = (channel_num - 1) % slots
+    else:
+        slot = channel_hash(channel_name or PRESET_NAMES[preset]) % slots
+    return band['freq_start'] + bw / 2000 + slot * bw / 1000
+
+
+@dataclass(slots=True)
+class Radio:
+    """Transmitter/receiver settings of a link, by default the repo's UA_433 SHORT_FAST nodes"""
+    region: str = 'UA_433'
+    preset: str = 'SHORT_FAST'
+    tx_power_dbm: float = None
+    frequency_mhz: float = None
+    antenna_gain_dbi: float = 2.15
+    cable_loss_db: float = 0.0
+    noise_figure_db: float = 6.0
+
+    def __post_init__(self):
+        if self.preset not in MODEM_PRESETS:
+            raise ValueError(f"Unknown modem preset: {self.preset}")
+        if self.region not in REGIONS:
+            raise ValueError(f"Unknown region: {self.region}")
+        # tx_power 0 in the LoRa config means the region's maximum, as on the device
+        if not self.tx_power_dbm:
+            self.tx_power_dbm = REGIONS[self.region]['power_limit']
+        if self.frequency_mhz is None:
+            self.frequency_mhz = channel_frequency(self.region, self.preset)
+
+    @property
+    def spreading_factor(self):
+        return MODEM_PRESETS[self.preset][0]
+
+    @property
+    def bandwidth_khz(self):
+        return MODEM_PRESETS[self.preset][1]
+
+    @property
+    def coding_rate(self):
+        return MODEM_PRESETS[self.preset][2]
+
+    @property
+    def bitrate_bps(self):
+        return bitrate_bps(self.preset)
+
+    def time_on_air(self, payload_bytes):
+        return time_on_air(self.preset, payload_bytes)
+
+    @property
+    def wavelength_m(self):
+        return 299.792458 / self.frequency_mhz
+
+    @property
+    def noise_floor_dbm(self):
+        """Thermal noise over the channel bandwidth plus the receiver noise figure"""
+        return -174 + 10 * math.log10(self.bandwidth_khz * 1000) + self.noise_figure_db
+
+    @property
+    def required_snr_db(self):
+        return DEMOD_SNR[self.spreading_factor]
+
+    @property
+    def eirp_dbm(self):
+        return self.tx_power_dbm + self.antenna_gain_dbi - self.cable_loss_db
+
+    def describe(self):
+        return dict(asdict(self), spreading_factor=self.spreading_factor, bandwidth_khz=self.bandwidth_khz,
+                    coding_rate=f"4/{self.coding_rate}", noise_floor_dbm=round(self.noise_floor_dbm, 2),
+                    required_snr_db=self.required_snr_db)
+
+
+def _merge(base, override):
+    result = copy.deepcopy(base)
+    for key, value in override.items():
+        if isinstance(value, dict) and isinstance(result.get(key), dict):
+            result[key] = _merge(result[key], value)
+        else:
+            result[key] = copy.deepcopy(value)
+    return result
+
+
+def profile_lora(name='base', path=None):
+    """The lora section of a profile in profiles.json, with everything it extends"""
+    with open(path or DEFAULT_PROFILES_FILE, 'r') as f:
+        profiles = json.load(f).get('profiles', {})
+    spec = {}
+    seen = []
+    while name:
+        if name not in profiles or name in seen:
+            raise ValueError(f"Unknown or cyclic profile: {name}")
+        seen.append(name)
+        spec = _merge(profiles[name].get('lora', {}), spec)
+        name = profiles[name].get('extends')
+    return spec
+
+
+def radio_from_profile(name='base', path=None, **overrides):
+    """Radio for a configured profile; keyword arguments that are not None override it"""
+    lora = profile_lora(name, path)
+    settings = {
+        'region': lora.get('region', 'UA_433'),
+        'preset': lora.get('modem_preset', 'SHORT_FAST'),
+        'tx_power_dbm': lora.get('tx_power') or None,
+    }
+    if lora.get('override_frequency'):
+        settings['frequency_mhz'] = lora['override_frequency']
+    settings.update({k: v for k, v in overrides.items() if v is not None})
+    radio = Radio(**settings)
+    if 'frequency_mhz' not in settings and lora.get('channel_num'):
+        radio.frequency_mhz = channel_frequency(radio.region, radio.preset, channel_num=lora['channel_num'])
+    return radio
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Show the LoRa radio settings of a configured profile")
+    parser.add_argument("--profile", default="base", help="Profile name in profiles.json (default: base)")
+    parser.add_argument("--profiles", default=DEFAULT_PROFILES_FILE, help="Profiles file")
+    parser.add_argument("--preset", choices=sorted(MODEM_PRESETS), help="Override the modem preset")
+    args = parser.parse_args()
+
+    print(json.dumps(radio_from_profile(args.profile, args.profiles, preset=args.preset).describe(), indent=2))
@@ -0,0 +1,383 @@
+#!/usr/bin/env python3
+"""
+Prometheus/OpenMetrics exporter for mesh and speed test metrics
+Serves /metrics with:
+  - per-node channel utilization, TX air utilization, battery, voltage and
+    uptime (deviceMetrics from the connected device's node database)
+  - per-link SNR/RSSI of packets heard by the connected device
+  - per-pair latency histograms and success/failure counts from the test
+    runners' JSON results (results.json, all_device_pairs_results.json, ...)
+
+Collectors refresh an in-memory snapshot in the background; a scrape only
+returns the last rendered snapshot and never touches the radio.
+
+Usage:
+    python3 mesh_exporter.py --port /dev/cu.usbserial-0001
+    python3 mesh_exporter.py --host 192.168.0.11 --listen 0.0.0.0:9464
+    python3 mesh_exporter.py --results results.json all_device_pairs_results.json
+"""
+
+import os
+import sys
+import json
+import time
+import bisect
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from node_index import NodeIndex, node_id_to_num
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+DEVICE_METRICS = (
+    ('channelUtilization', 'meshtastic_node_channel_utilization_percent', 'Channel utilization reported by the node'),
+    ('airUtilTx', 'meshtastic_node_air_util_tx_percent', 'TX air utilization over the last hour'),
+    ('batteryLevel', 'meshtastic_node_battery_level_percent', 'Battery level (101 = powered)'),
+    ('voltage', 'meshtastic_node_voltage_volts', 'Battery voltage'),
+    ('uptimeSeconds', 'meshtastic_node_uptime_seconds', 'Node uptime'),
+)
+
+
+class MetricFamily:
+    """One metric family: name, type, help text and its samples"""
+
+    def __init__(self, name, type, help):
+        self.name = name
+        self.type = type
+        self.help = help
+        self.samples = []
+
+    def add(self, labels, value, suffix=''):
+        self.samples.append((suffix, labels, value))
+        return self
+
+
+def format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{k}="{escape_label(v)}"' for k, v in labels.items()) + '}'
+
+
+def escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer() and abs(value) < 1e15:
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+def render(families, openmetrics=False):
+    """Exposition text for a list of MetricFamily objects"""
+    lines = []
+    for family in families:
+        name = family.name
+        if family.type == 'counter' and name.endswith('_total') and openmetrics:
+            # OpenMetrics names the counter family without the _total suffix
+            name = name[:-len('_total')]
+        lines.append(f"# HELP {name} {family.help}")
+        lines.append(f"# TYPE {name} {family.type}")
+        for suffix, labels, value in family.samples:
+            sample = family.name + suffix if family.type != 'counter' else family.name
+            lines.append(f"{sample}{format_labels(labels)} {format_value(value)}")
+    if openmetrics:
+        lines.append("# EOF")
+    return ('\n'.join(lines) + '\n').encode('utf-8')
+
+
+def histogram(family, labels, values, buckets=LATENCY_BUCKETS):
+    """Add cumulative histogram samples for values to family"""
+    ordered = sorted(values)
+    for bound in buckets:
+        family.add(dict(labels, le=format_value(float(bound))), bisect.bisect_right(ordered, bound), '_bucket')
+    family.add(dict(labels, le='+Inf'), len(ordered), '_bucket')
+    family.add(labels, len(ordered), '_count')
+    family.add(labels, float(sum(ordered)), '_sum')
+    return family
+
+
+class Snapshot:
+    """Latest metric families per collector plus the pre-rendered text
+
+    Collectors call update(); scrapes call get(), which only copies a
+    reference under the lock.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.sources = {}
+        self.rendered = {False: render([]), True: render([], True)}
+        self.updated = {}
+
+    def update(self, source, families, duration=None):
+        with self.lock:
+            self.sources[source] = families
+            self.updated[source] = (time.time(), duration)
+            meta = MetricFamily('meshtastic_exporter_last_update_timestamp_seconds', 'gauge',
+                                'When each collector last refreshed')
+            took = MetricFamily('meshtastic_exporter_collect_duration_seconds', 'gauge',
+                                'How long each collector took to refresh')
+            for name, (ts, dur) in sorted(self.updated.items()):
+                meta.add({'collector': name}, ts)
+                if dur is not None:
+                    took.add({'collector': name}, dur)
+            families = [f for name in sorted(self.sources) for f in self.sources[name]] + [meta, took]
+            self.rendered = {False: render(families), True: render(families, True)}
+
+    def get(self, openmetrics=False):
+        with self.lock:
+            return self.rendered[openmetrics]
+
+
+class Collector(threading.Thread):
+    """Background thread calling collect() every interval seconds"""
+
+    source = 'collector'
+
+    def __init__(self, snapshot, interval=15.0):
+        super().__init__(name=f"collector-{self.source}", daemon=True)
+        self.snapshot = snapshot
+        self.interval = interval
+        self.stop_event = threading.Event()
+
+    def collect(self):
+        """Metric families for the snapshot, or None to keep the previous ones"""
+        return []
+
+    def refresh(self):
+        start = time.perf_counter()
+        try:
+            families = self.collect()
+        except Exception as e:
+            print(f"⚠️  {self.source} collector failed: {e}", file=sys.stderr)
+            return
+        if families is not None:
+            self.snapshot.update(self.source, families, time.perf_counter() - start)
+
+    def run(self):
+        while not self.stop_event.is_set():
+            self.refresh()
+            self.stop_event.wait(self.interval)
+
+    def stop(self):
+        self.stop_event.set()
+
+
+def result_entries(data):
+    """Normalize the test runners' JSON outputs to a list of result dicts"""
+    if isinstance(data, dict) and isinstance(data.get('results'), list):
+        return data['results']
+    if isinstance(data, list):
+        return data
+    return [data] if isinstance(data, dict) else []
+
+
+def pair_of(entry):
+    source = entry.get('from_name') or entry.get('port') or 'unknown'
+    target = entry.get('to_name') or entry.get('target_node') or entry.get('target_id') or 'unknown'
+    return str(source), str(target)
+
+
+class ResultsCollector(Collector):
+    """Latency histograms and success counters from test result files
+
+    Files are only re-read when their modification time changes.
+    """
+
+    source = 'results'
+
+    def __init__(self, snapshot, paths, interval=15.0):
+        super().__init__(snapshot, interval)
+        self.paths = paths
+        self.mtimes = {}
+        self.entries = {}
+
+    def collect(self):
+        changed = False
+        for path in self.paths:
+            try:
+                mtime = os.path.getmtime(path)
+            except OSError:
+                changed |= self.entries.pop(path, None) is not None
+                continue
+            if self.mtimes.get(path) == mtime:
+                continue
+            try:
+                with open(path, 'r') as f:
+                    self.entries[path] = result_entries(json.load(f))
+                self.mtimes[path] = mtime
+                changed = True
+            except (OSError, json.JSONDecodeError):
+                continue
+        if not changed:
+            return None
+
+        latency = MetricFamily('meshtastic_test_latency_seconds', 'histogram',
+                               'Per-message delivery latency measured by the speed tests')
+        # Per-file counts of the last run: they drop when a file is rewritten, so gauges rather than counters
+        ok = MetricFamily('meshtastic_test_messages_successful', 'gauge', 'Messages acknowledged in the last speed test')
+        failed = MetricFamily('meshtastic_test_messages_failed', 'gauge', 'Messages not acknowledged in the last speed test')
+        throughput = MetricFamily('meshtastic_test_throughput_bits_per_second', 'gauge', 'Throughput of the last test run')
+        snr = MetricFamily('meshtastic_test_snr_db', 'gauge', 'SNR of the target at test time')
+        for path, entries in sorted(self.entries.items()):
+            source_file = os.path.basename(path)
+            for entry in entries:
+                source, target = pair_of(entry)
+                labels = {'file': source_file, 'from': source, 'to': target}
+                histogram(latency, labels, entry.get('times') or [])
+                ok.add(labels, entry.get('successful', entry.get('messages_successful', 0)))
+                failed.add(labels, entry.get('failed', entry.get('messages_failed', 0)))
+                if entry.get('throughput_bps') is not None:
+                    throughput.add(labels, float(entry['throughput_bps']))
+                if entry.get('snr') is not None:
+                    snr.add(labels, float(entry['snr']))
+        return [latency, ok, failed, throughput, snr]
+
+
+class RadioCollector(Collector):
+    """Node deviceMetrics and per-link signal quality from a connected device
+
+    Link SNR/RSSI come from the receive callback (which only updates a dict);
+    collect() reads the interface's in-memory node database, so neither
+    blocks a scrape. Link senders are named from a NodeIndex that NODEINFO
+    packets keep current while the exporter runs.
+    """
+
+    source = 'radio'
+
+    def __init__(self, snapshot, iface, interval=15.0):
+        super().__init__(snapshot, interval)
+        self.iface = iface
+        self.index = NodeIndex.from_interface(iface)
+        self.lock = threading.Lock()
+        self.links = {}
+        self.received = 0
+
+    def stop(self):
+        super().stop()
+        self.index.detach()
+
+    def on_receive(self, packet, interface):
+        if interface is not self.iface or 'rxSnr' not in packet:
+            return
+        key = packet.get('fromId') or f"!{packet.get('from', 0):08x}"
+        hops = packet['hopStart'] - packet['hopLimit'] if 'hopStart' in packet and 'hopLimit' in packet else None
+        with self.lock:
+            self.received += 1
+            link = self.links.setdefault(key, {'packets': 0})
+            link['packets'] += 1
+            link['snr'] = packet.get('rxSnr')
+            link['rssi'] = packet.get('rxRssi')
+            link['hops'] = hops
+
+    def collect(self):
+        observer = self.iface.getMyUser() or {}
+        observer_id = observer.get('id', 'local')
+        names = {}
+        nodes = MetricFamily('meshtastic_node_info', 'gauge', 'Nodes in the device node database')
+        metric_families = {key: MetricFamily(name, 'gauge', help) for key, name, help in DEVICE_METRICS}
+        last_heard = MetricFamily('meshtastic_node_last_heard_timestamp_seconds', 'gauge', 'When the node was last heard')
+        for node_id, node in list((self.iface.nodes or {}).items()):
+            user = node.get('user', {})
+            names[node_id] = user.get('shortName', node_id)
+            labels = {'node': node_id, 'short_name': names[node_id]}
+            nodes.add(dict(labels, long_name=user.get('longName', ''), hw_model=user.get('hwModel', '')), 1)
+            if node.get('lastHeard'):
+                last_heard.add(labels, node['lastHeard'])
+            for key, value in (node.get('deviceMetrics') or {}).items():
+                if key in metric_families:
+                    metric_families[key].add(labels, value)
+
+        link_snr = MetricFamily('meshtastic_link_snr_db', 'gauge', 'SNR of the last packet heard from a node')
+        link_rssi = MetricFamily('meshtastic_link_rssi_dbm', 'gauge', 'RSSI of the last packet heard from a node')
+        link_packets = MetricFamily('meshtastic_link_packets_received_total', 'counter', 'Packets heard from a node')
+        with self.lock:
+            links = {k: dict(v) for k, v in self.links.items()}
+        for node_id, link in sorted(links.items()):
+            num = node_id_to_num(node_id)
+            name = self.index.short_name(num, names.get(node_id, node_id)) if num is not None else node_id
+            labels = {'from': node_id, 'from_name': name, 'to': observer_id}
+            link_packets.add(labels, link['packets'])
+            if link.get('snr') is not None:
+                link_snr.add(labels, link['snr'])
+            if link.get('rssi') is not None:
+                link_rssi.add(labels, link['rssi'])
+        return [nodes, last_heard] + list(metric_families.values()) + [link_snr, link_rssi, link_packets]
+
+
+def make_handler(snapshot):
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?')[0] != '/metrics':
+                self.send_error(404)
+                return
+            openmetrics = 'application/openmetrics-text' in self.headers.get('Accept', '')
+            body = snapshot.get(openmetrics)
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/openmetrics-text; version=1.0.0; charset=utf-8'
+                             if openmetrics else 'text/plain; version=0.0.4; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return MetricsHandler
+
+
+def connect_device(port=None, host=None):
+    if host:
+        import meshtastic.tcp_interface
+        return meshtastic.tcp_interface.TCPInterface(hostname=host)
+    import meshtastic.serial_interface
+    return meshtastic.serial_interface.SerialInterface(devPath=port)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve mesh and speed test metrics for Prometheus")
+    parser.add_argument("--port", help="Serial port of a device to collect node metrics from")
+    parser.add_argument("--host", help="TCP host of a device to collect node metrics from")
+    parser.add_argument("--results", nargs="*", default=["results.json", "all_device_pairs_results.json"],
+                        help="Test result JSON files to export (default: results.json all_device_pairs_results.json)")
+    parser.add_argument("--listen", default="127.0.0.1:9464", help="Address to serve /metrics on (default: 127.0.0.1:9464)")
+    parser.add_argument("--interval", type=float, default=15.0, help="Collector refresh interval in seconds (default: 15)")
+    args = parser.parse_args()
+
+    snapshot = Snapshot()
+    collectors = [ResultsCollector(snapshot, args.results, args.interval)]
+
+    iface = None
+    if args.port or args.host:
+        try:
+            import meshtastic
+            from pubsub import pub
+        except ImportError:
+            print("ERROR: meshtastic module not found")
+            sys.exit(1)
+        print(f"Connecting to {args.host or args.port}...")
+        iface = connect_device(args.port, args.host)
+        radio = RadioCollector(snapshot, iface, args.interval)
+        pub.subscribe(radio.on_receive, "meshtastic.receive")
+        collectors.append(radio)
+
+    for collector in collectors:
+        collector.start()
+
+    host, _, listen_port = args.listen.rpartition(':')
+    server = ThreadingHTTPServer((host or '0.0.0.0', int(listen_port)), make_handler(snapshot))
+    print(f"✅ Serving metrics on http://{args.listen}/metrics")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        for collector in collectors:
+            collector.stop()
+        if iface is not None:
+            iface.close()
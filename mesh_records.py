@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""
+Compact in-memory records for nodes, packets and latency samples
+Slotted dataclasses for single records and struct-of-arrays tables backed by
+the array module, with zero-copy NumPy export and plain JSON export
+"""
+
+import math
+from array import array
+from dataclasses import dataclass, asdict
+
+
+NAN = float('nan')
+
+
+def _opt(value):
+    """Store a missing float as NaN in array-backed columns"""
+    return NAN if value is None else float(value)
+
+
+def _unopt(value):
+    """NaN back to None for JSON/dict export"""
+    return None if math.isnan(value) else value
+
+
+def _numpy():
+    try:
+        import numpy
+    except ImportError:
+        raise ImportError("numpy module not found. Install with: pip3 install numpy")
+    return numpy
+
+
+@dataclass(slots=True)
+class NodeRecord:
+    """One node as seen in a device's node database"""
+    num: int
+    long_name: str = 'Unknown'
+    short_name: str = 'Unknown'
+    snr: float = None
+    channel_utilization: float = None
+    air_util_tx: float = None
+    battery_level: float = None
+    voltage: float = None
+
+    @classmethod
+    def from_node(cls, node):
+        """Build from an iface.nodes value"""
+        user = node.get('user', {})
+        metrics = node.get('deviceMetrics', {})
+        return cls(
+            num=node.get('num', 0),
+            long_name=user.get('longName', 'Unknown'),
+            short_name=user.get('shortName', 'Unknown'),
+            snr=node.get('snr'),
+            channel_utilization=metrics.get('channelUtilization'),
+            air_util_tx=metrics.get('airUtilTx'),
+            battery_level=metrics.get('batteryLevel'),
+            voltage=metrics.get('voltage')
+        )
+
+    def to_dict(self):
+        return asdict(self)
+
+
+@dataclass(slots=True)
+class PacketRecord:
+    """One received mesh packet (header fields only, no payload)"""
+    rx_time: float
+    packet_id: int = 0
+    from_num: int = 0
+    to_num: int = 0
+    portnum: int = 0
+    rx_snr: float = None
+    rx_rssi: float = None
+    hop_limit: int = 0
+    size: int = 0
+
+    @classmethod
+    def from_packet(cls, packet, rx_time=None):
+        """Build from a meshtastic packet dictionary"""
+        raw = packet.get('raw')
+        portnum = 0
+        size = 0
+        if raw is not None:
+            portnum = raw.decoded.portnum
+            size = raw.ByteSize()
+        return cls(
+            rx_time=rx_time if rx_time is not None else packet.get('rxTime', 0),
+            packet_id=packet.get('id', 0),
+            from_num=packet.get('from', 0),
+            to_num=packet.get('to', 0),
+            portnum=portnum,
+            rx_snr=packet.get('rxSnr'),
+            rx_rssi=packet.get('rxRssi'),
+            hop_limit=packet.get('hopLimit', 0),
+            size=size
+        )
+
+    def to_dict(self):
+        return asdict(self)
+
+
+class LatencySamples:
+    """Per-message latency samples (seconds) in a flat double array"""
+
+    __slots__ = ('values',)
+
+    def __init__(self, values=()):
+        self.values = array('d', values)
+
+    def append(self, seconds):
+        self.values.append(seconds)
+
+    def extend(self, values):
+        self.values.extend(values)
+
+    def __len__(self):
+        return len(self.values)
+
+    def __iter__(self):
+        return iter(self.values)
+
+    def mean(self):
+        return sum(self.values) / len(self.values) if self.values else 0
+
+    def min(self):
+        return min(self.values) if self.values else 0
+
+    def max(self):
+        return max(self.values) if self.values else 0
+
+    def to_numpy(self):
+        """Zero-copy float64 view of the samples"""
+        return _numpy().frombuffer(self.values, dtype='f8')
+
+    def to_json(self):
+        """Plain list, same shape as the 'times' field in result JSON"""
+        return self.values.tolist()
+
+
+class _ColumnTable:
+    """Struct-of-arrays base: one typed array per numeric column"""
+
+    COLUMNS = ()
+    OPTIONAL = ()
+
+    def __init__(self):
+        for name, typecode in self.COLUMNS:
+            setattr(self, name, array(typecode))
+
+    def __len__(self):
+        return len(getattr(self, self.COLUMNS[0][0]))
+
+    def _append_row(self, row):
+        for name, _ in self.COLUMNS:
+            value = row[name]
+            if name in self.OPTIONAL:
+                value = _opt(value)
+            getattr(self, name).append(value)
+
+    def _row(self, i):
+        row = {}
+        for name, _ in self.COLUMNS:
+            value = getattr(self, name)[i]
+            if name in self.OPTIONAL:
+                value = _unopt(value)
+            row[name] = value
+        return row
+
+    def to_numpy(self):
+        """Zero-copy NumPy views of every numeric column (missing values are NaN)"""
+        np = _numpy()
+        return {name: np.frombuffer(getattr(self, name), dtype=np.dtype(typecode))
+                for name, typecode in self.COLUMNS}
+
+    def to_json(self):
+        """List of row dictionaries"""
+        return [self._row(i) for i in range(len(self))]
+
+
+class NodeTable(_ColumnTable):
+    """Columnar node list; names are kept in plain lists"""
+
+    COLUMNS = (
+        ('num', 'I'),
+        ('snr', 'd'),
+        ('channel_utilization', 'd'),
+        ('air_util_tx', 'd'),
+        ('battery_level', 'd'),
+        ('voltage', 'd'),
+    )
+    OPTIONAL = ('snr', 'channel_utilization', 'air_util_tx', 'battery_level', 'voltage')
+
+    def __init__(self):
+        super().__init__()
+        self.long_name = []
+        self.short_name = []
+
+    @classmethod
+    def from_interface(cls, iface, include_self=False):
+        """Build directly from iface.nodes without intermediate dicts"""
+        table = cls()
+        my_node_num = iface.myInfo.my_node_num
+        for node in (iface.nodes or {}).values():
+            if not include_self and node.get('num') == my_node_num:
+                continue
+            table.add_node(node)
+        return table
+
+    def add_node(self, node):
+        """Append an iface.nodes value"""
+        user = node.get('user', {})
+        metrics = node.get('deviceMetrics', {})
+        self._append_row({
+            'num': node.get('num', 0),
+            'snr': node.get('snr'),
+            'channel_utilization': metrics.get('channelUtilization'),
+            'air_util_tx': metrics.get('airUtilTx'),
+            'battery_level': metrics.get('batteryLevel'),
+            'voltage': metrics.get('voltage')
+        })
+        self.long_name.append(user.get('longName', 'Unknown'))
+        self.short_name.append(user.get('shortName', 'Unknown'))
+
+    def add(self, record):
+        """Append a NodeRecord"""
+        self._append_row(record.to_dict())
+        self.long_name.append(record.long_name)
+        self.short_name.append(record.short_name)
+
+    def record(self, i):
+        row = self._row(i)
+        return NodeRecord(long_name=self.long_name[i], short_name=self.short_name[i], **row)
+
+    def _row_json(self, i):
+        row = self._row(i)
+        row['long_name'] = self.long_name[i]
+        row['short_name'] = self.short_name[i]
+        return row
+
+    def to_json(self):
+        return [self._row_json(i) for i in range(len(self))]
+
+    def to_device_nodes(self):
+        """The nested {'name', 'short', 'snr', 'deviceMetrics'} form get_device_info() returns"""
+        nodes = {}
+        for i in range(len(self)):
+            metrics = {}
+            for column, key in (('channel_utilization', 'channelUtilization'),
+                                ('air_util_tx', 'airUtilTx'),
+                                ('battery_level', 'batteryLevel'),
+                                ('voltage', 'voltage')):
+                value = _unopt(getattr(self, column)[i])
+                if value is not None:
+                    metrics[key] = value
+            nodes[f"!{self.num[i]:08x}"] = {
+                'name': self.long_name[i],
+                'short': self.short_name[i],
+                'snr': _unopt(self.snr[i]),
+                'deviceMetrics': metrics
+            }
+        return nodes
+
+
+class PacketLog(_ColumnTable):
+    """Columnar log of received packet headers"""
+
+    COLUMNS = (
+        ('rx_time', 'd'),
+        ('packet_id', 'I'),
+        ('from_num', 'I'),
+        ('to_num', 'I'),
+        ('portnum', 'H'),
+        ('rx_snr', 'd'),
+        ('rx_rssi', 'd'),
+        ('hop_limit', 'B'),
+        ('size', 'H'),
+    )
+    OPTIONAL = ('rx_snr', 'rx_rssi')
+
+    def append(self, packet, rx_time=None):
+        """Append a meshtastic packet dictionary"""
+        self.add(PacketRecord.from_packet(packet, rx_time))
+
+    def add(self, record):
+        """Append a PacketRecord"""
+        self._append_row(record.to_dict())
+
+    def record(self, i):
+        return PacketRecord(**self._row(i))
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Span instrumentation and profiling hooks for the test runners
+Spans are recorded only when tracing is enabled; otherwise span() returns a
+shared no-op context manager. Recorded spans can be summarized per phase
+(for the result JSON) or written as a Chrome trace-event file (open in
+chrome://tracing or https://ui.perfetto.dev).
+
+instrument_meshtastic() wraps the meshtastic calls the runners spend their
+time in (interface open, node DB sync, serial writes, TX queue, ACK waits).
+"""
+
+import os
+import sys
+import json
+import time
+import threading
+import functools
+from contextlib import contextmanager
+
+
+class _NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Tracer:
+    """Collects (name, start, duration, thread, args) spans"""
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.spans = []
+        self.lock = threading.Lock()
+        self.origin = time.perf_counter()
+
+    def enable(self):
+        self.enabled = True
+        self.origin = time.perf_counter()
+
+    def span(self, name, **args):
+        if not self.enabled:
+            return _NULL_SPAN
+        return self._span(name, args)
+
+    @contextmanager
+    def _span(self, name, args):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            with self.lock:
+                self.spans.append((name, start - self.origin, end - start, threading.get_ident(), args))
+
+    def mark(self):
+        """Position to pass to phases() to summarize only spans recorded after it"""
+        with self.lock:
+            return len(self.spans)
+
+    def phases(self, since=0):
+        """Per-name count/total/max seconds of the spans recorded since a mark"""
+        with self.lock:
+            spans = self.spans[since:]
+        totals = {}
+        for name, _, duration, _, _ in spans:
+            phase = totals.setdefault(name, {'count': 0, 'total_s': 0.0, 'max_s': 0.0})
+            phase['count'] += 1
+            phase['total_s'] += duration
+            phase['max_s'] = max(phase['max_s'], duration)
+        return totals
+
+    def write_chrome_trace(self, path):
+        """Write spans as Chrome trace-event JSON (complete 'X' events, microseconds)"""
+        pid = os.getpid()
+        with self.lock:
+            events = [{
+                'name': name,
+                'cat': name.split('.')[0],
+                'ph': 'X',
+                'ts': start * 1e6,
+                'dur': duration * 1e6,
+                'pid': pid,
+                'tid': tid,
+                'args': args
+            } for name, start, duration, tid, args in self.spans]
+        with open(path, 'w') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f, default=str)
+
+
+tracer = Tracer()
+
+
+def span(name, **args):
+    return tracer.span(name, **args)
+
+
+def _wrap(cls, method, name):
+    original = getattr(cls, method)
+    if getattr(original, '_mesh_trace', False):
+        return
+
+    @functools.wraps(original)
+    def wrapper(*args, **kwargs):
+        with tracer.span(name):
+            return original(*args, **kwargs)
+
+    wrapper._mesh_trace = True
+    setattr(cls, method, wrapper)
+
+
+def instrument_meshtastic():
+    """Record spans around the meshtastic calls on the send/connect hot paths"""
+    from meshtastic.mesh_interface import MeshInterface
+    from meshtastic.stream_interface import StreamInterface
+    from meshtastic.serial_interface import SerialInterface
+
+    _wrap(SerialInterface, 'connect', 'meshtastic.serial_open')
+    _wrap(StreamInterface, 'connect', 'meshtastic.connect')
+    _wrap(MeshInterface, '_waitConnected', 'meshtastic.node_db_sync')
+    _wrap(MeshInterface, 'sendText', 'meshtastic.send_text')
+    _wrap(MeshInterface, '_sendToRadio', 'meshtastic.tx_queue')
+    _wrap(StreamInterface, '_writeBytes', 'meshtastic.serial_write')
+    _wrap(MeshInterface, 'waitForAckNak', 'meshtastic.wait_ack')
+    _wrap(StreamInterface, 'close', 'meshtastic.close')
+
+
+def enable_tracing():
+    tracer.enable()
+    instrument_meshtastic()
+
+
+def run_profiled(func, *args, sort='cumulative', limit=30, dump=None, **kwargs):
+    """Run func under cProfile, print the top functions and optionally save the stats"""
+    import cProfile
+    import pstats
+
+    profiler = cProfile.Profile()
+    try:
+        return profiler.runcall(func, *args, **kwargs)
+    finally:
+        if dump:
+            profiler.dump_stats(dump)
+        print(f"\n{'='*70}")
+        print(f"PROFILE (top {limit} by {sort})")
+        print(f"{'='*70}")
+        pstats.Stats(profiler, stream=sys.stdout).strip_dirs().sort_stats(sort).print_stats(limit)
+        if dump:
+            print(f"Profile saved to: {dump} (view with: python3 -m pstats {dump})")
+
+
+def print_phases(phases):
+    """Print a phase summary table, slowest total first"""
+    print(f"   {'Phase':<28} {'Count':>6} {'Total':>10} {'Max':>10}")
+    for name, p in sorted(phases.items(), key=lambda item: -item[1]['total_s']):
+        print(f"   {name:<28} {p['count']:>6} {p['total_s']*1000:>8.1f}ms {p['max_s']*1000:>8.1f}ms")
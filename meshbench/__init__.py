@@ -0,0 +1,10 @@
+"""
+meshbench - single entry point for the Meshtastic speed test tools
+
+    python3 -m meshbench --help
+    python3 -m meshbench <command> [args...]
+
+Subcommands are resolved lazily: only the module of the command being run is
+imported, so offline commands (report, table, capacity, stats) never load
+meshtastic, protobufs, pyserial or pubsub.
+"""
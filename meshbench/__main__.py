@@ -0,0 +1,5 @@
+import sys
+
+from meshbench.cli import main
+
+sys.exit(main())
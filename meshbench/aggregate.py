@@ -0,0 +1,157 @@
+"""
+Columnar aggregation of speed test results for the HTML reports
+
+Results are read once into NumPy columns (missing numbers become NaN or the
+field's default) and every summary, the pair matrix and the per-row status
+and colour grades are computed over whole columns rather than with repeated
+Python passes over the result dictionaries.
+"""
+
+try:
+    import numpy as np
+except ImportError:
+    raise ImportError("numpy module not found. Install with: pip3 install numpy")
+
+NAN = float('nan')
+
+# (badge classes, label) by index returned from status_grade()
+STATUS = (
+    ("bg-green-100 text-green-800", "Excellent"),
+    ("bg-yellow-100 text-yellow-800", "Good"),
+    ("bg-red-100 text-red-800", "Poor"),
+)
+
+
+class ResultColumns:
+    """Selected fields of a result list as NumPy/list columns, filled in one pass
+
+    numeric and text map field name to the default used when a result lacks
+    the field (or has it as None).
+    """
+
+    def __init__(self, results, numeric, text=None):
+        text = text or {}
+        values = {key: [] for key in numeric}
+        labels = {key: [] for key in text}
+        for result in results:
+            for key, default in numeric.items():
+                value = result.get(key)
+                values[key].append(default if value is None else value)
+            for key, default in text.items():
+                value = result.get(key)
+                labels[key].append(default if value is None else value)
+        self.size = len(results)
+        self.columns = {key: np.asarray(column, dtype='f8') for key, column in values.items()}
+        self.columns.update(labels)
+
+    def __len__(self):
+        return self.size
+
+    def __getitem__(self, key):
+        return self.columns[key]
+
+
+def percent(part, whole):
+    """part / whole * 100 per element, 0 where whole is 0"""
+    out = np.zeros(np.broadcast(part, whole).shape)
+    np.divide(part * 100, whole, out=out, where=whole > 0)
+    return out
+
+
+def status_grade(success_rate):
+    """Index into STATUS: >= 95% excellent, >= 80% good, else poor"""
+    return np.where(success_rate >= 95, 0, np.where(success_rate >= 80, 1, 2))
+
+
+def snr_grade(snr):
+    """0 above 10 dB, 1 above 5 dB, 2 otherwise, 3 where SNR is missing"""
+    return np.where(np.isnan(snr), 3, np.where(snr > 10, 0, np.where(snr > 5, 1, 2)))
+
+
+def throughput_grade(kbps):
+    """0 from 10 kbps, 1 from 8 kbps, 2 below"""
+    return np.where(kbps >= 10, 0, np.where(kbps >= 8, 1, 2))
+
+
+def transfer_columns(results):
+    """Columns used by the file transfer report"""
+    return ResultColumns(results, numeric={
+        'file_size_mb': 0.0,
+        'total_time': 0.0,
+        'throughput_kbps': 0.0,
+        'throughput_mbps': 0.0,
+        'messages_sent': 0.0,
+        'messages_successful': 0.0,
+        'messages_failed': 0.0,
+        'bytes_per_second': 0.0,
+        'messages_per_second': 0.0,
+        'snr': NAN,
+        'channel_utilization': NAN,
+        'air_util_tx': NAN,
+    }, text={'port': 'Unknown', 'target_node': 'Unknown'})
+
+
+def transfer_summary(cols):
+    """Summary cards for the file transfer report
+
+    The SNR average skips missing values and exact zeros, as the report
+    always has.
+    """
+    total_tests = len(cols)
+    snr = cols['snr']
+    reported = ~np.isnan(snr) & (snr != 0)
+    total_sent = cols['messages_sent'].sum()
+    return {
+        'total_tests': total_tests,
+        'avg_throughput': cols['throughput_kbps'].sum() / total_tests if total_tests else 0,
+        'avg_snr': snr[reported].mean() if reported.any() else 0,
+        'success_rate': cols['messages_successful'].sum() / total_sent * 100 if total_sent > 0 else 0,
+    }
+
+
+def pair_columns(results):
+    """Columns used by the all-device-pairs table"""
+    return ResultColumns(results, numeric={
+        'successful': 0.0,
+        'message_count': 30.0,
+        'avg_time': 0.0,
+        'throughput_kbps': 0.0,
+        'snr': NAN,
+    }, text={'from_name': 'Unknown', 'to_name': 'Unknown'})
+
+
+def pair_summary(cols):
+    """Summary cards for the all-device-pairs table (averages over pairs that got through)"""
+    total_tests = len(cols)
+    throughput = cols['throughput_kbps']
+    successful = int(np.count_nonzero(cols['successful'] > 0))
+    return {
+        'total_tests': total_tests,
+        'successful': successful,
+        'avg_throughput': throughput[throughput > 0].sum() / successful if successful > 0 else 0,
+        'success_rate': successful / total_tests * 100 if total_tests else 0,
+    }
+
+
+def pair_matrix(cols, fields):
+    """Sorted device names and a device x device matrix for each {name: column}
+
+    Cells without a result are NaN; when a pair was tested more than once
+    the last result wins.
+    """
+    devices = sorted(set(cols['from_name']) | set(cols['to_name']))
+    position = {name: i for i, name in enumerate(devices)}
+    rows = np.fromiter((position[name] for name in cols['from_name']), dtype=np.intp, count=len(cols))
+    columns = np.fromiter((position[name] for name in cols['to_name']), dtype=np.intp, count=len(cols))
+
+    # Keep only the last result of each pair
+    cells = rows * len(devices) + columns
+    _, first_reversed = np.unique(cells[::-1], return_index=True)
+    last = len(cells) - 1 - first_reversed
+
+    matrices = {}
+    for name, values in fields.items():
+        matrix = np.full((len(devices), len(devices)), NAN)
+        matrix[rows[last], columns[last]] = values[last]
+        matrices[name] = matrix
+    return devices, matrices
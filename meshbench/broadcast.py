@@ -0,0 +1,237 @@
+"""
+broadcast: flood propagation of broadcasts to ^all at increasing rates
+
+One attached device sends tagged text broadcasts, and every other attached
+device is an observer. For each packet the benchmark records which observers
+received it, when, and over how many hops (hopStart - hopLimit) and which relay.
+From that it reports coverage, time to full coverage and duplicate
+rebroadcasts.
+
+Clients only get the first copy of a packet, because the firmware drops
+duplicates before the API. The duplicates are counted from the firmware's
+"Ignore dupe incoming msg (id=0x...)" log lines, which the library publishes
+on meshtastic.log.line. This needs security.debug_log_api_enabled (or a
+serial debug console) on the observers. Without it, duplicates show as N/A.
+"""
+
+import re
+import json
+import time
+import argparse
+import threading
+from datetime import datetime
+
+from meshbench.engine import open_devices, find_serial_ports
+from meshbench.stats import percentile
+
+DEFAULT_RATES = [0.1, 0.2, 0.5, 1.0]
+
+TAG = "BCAST"
+
+# Firmware log line for a dropped duplicate ("Ignore dupe incoming msg (id=0x1a2b3c4d fr=...",
+# older releases "Ignoring incoming msg, because we've already seen it")
+DUPE_LINE = re.compile(r"(?:dupe|already seen).*?id=0x([0-9a-fA-F]+)")
+
+
+class FloodTracker:
+    """Receptions and duplicate log lines per packet from every open interface
+
+    Callbacks run on the meshtastic reader threads and only store; the per
+    packet results are put together once a rate level is over.
+    """
+
+    def __init__(self, interfaces):
+        self.lock = threading.Lock()
+        self.interfaces = interfaces    # iface -> its node num
+        self.received = {}              # text tag -> {observer num: (time, hops, relay node, rx SNR)}
+        self.dupes = {}                 # packet id -> {observer num: count}
+        self.log_lines = 0
+
+    def subscribe(self):
+        from pubsub import pub
+
+        pub.subscribe(self.on_packet, "meshtastic.receive")
+        pub.subscribe(self.on_log_line, "meshtastic.log.line")
+
+    def unsubscribe(self):
+        from pubsub import pub
+
+        pub.unsubscribe(self.on_packet, "meshtastic.receive")
+        pub.unsubscribe(self.on_log_line, "meshtastic.log.line")
+
+    def on_packet(self, packet, interface):
+        now = time.monotonic()
+        decoded = packet.get('decoded') or {}
+        text = decoded.get('text') or ''
+        if decoded.get('portnum') != 'TEXT_MESSAGE_APP' or not text.startswith(TAG):
+            return
+        hops = None
+        if packet.get('hopStart') is not None:
+            hops = packet['hopStart'] - packet.get('hopLimit', 0)
+        with self.lock:
+            self.received.setdefault(text.split(' ', 1)[0], {}).setdefault(
+                self.interfaces.get(interface), (now, hops, packet.get('relayNode'), packet.get('rxSnr')))
+
+    def on_log_line(self, line, interface):
+        with self.lock:
+            self.log_lines += 1
+            match = DUPE_LINE.search(line)
+            if match:
+                counts = self.dupes.setdefault(int(match.group(1), 16), {})
+                observer = self.interfaces.get(interface)
+                counts[observer] = counts.get(observer, 0) + 1
+
+
+def send_broadcasts(source, level, rate, count, payload):
+    """Send count broadcasts at rate packets/s; returns [(tag, packet id, send time)]"""
+    sent = []
+    start = time.monotonic()
+    for seq in range(count):
+        due = start + seq / rate
+        if due > time.monotonic():
+            time.sleep(due - time.monotonic())
+        tag = f"{TAG}{level}.{seq}"
+        t = time.monotonic()
+        try:
+            packet = source['iface'].sendText(f"{tag} {payload}", destinationId='^all', wantAck=False)
+            sent.append((tag, getattr(packet, 'id', None), t))
+        except Exception as e:
+            print(f"\n❌ Broadcast {seq + 1} failed: {e}")
+    return sent
+
+
+def packet_results(sent, tracker, observers):
+    """Per packet coverage, time to full coverage, hops and duplicates"""
+    expected = {o['num'] for o in observers}
+    with tracker.lock:
+        received = {tag: dict(seen) for tag, seen in tracker.received.items()}
+        dupes = {pid: sum(counts.values()) for pid, counts in tracker.dupes.items()}
+        have_logs = tracker.log_lines > 0
+
+    packets = []
+    for tag, packet_id, t in sent:
+        seen = {num: r for num, r in received.get(tag, {}).items() if num in expected}
+        delays = sorted(r[0] - t for r in seen.values())
+        packets.append({
+            'tag': tag,
+            'id': packet_id,
+            'observers': len(seen),
+            'coverage': len(seen) / len(expected) if expected else None,
+            'first_ms': delays[0] * 1000 if delays else None,
+            'full_coverage_ms': delays[-1] * 1000 if expected and len(seen) == len(expected) else None,
+            'hops': {str(num): r[1] for num, r in seen.items()},
+            'relays': {str(num): r[2] for num, r in seen.items()},
+            'duplicates': dupes.get(packet_id, 0) if have_logs else None,
+        })
+    return packets
+
+
+def summarize_rate(rate, packets):
+    full = sorted(p['full_coverage_ms'] for p in packets if p['full_coverage_ms'] is not None)
+    coverage = [p['coverage'] for p in packets if p['coverage'] is not None]
+    duplicates = [p['duplicates'] for p in packets if p['duplicates'] is not None]
+    hops = [h for p in packets for h in p['hops'].values() if h is not None]
+    return {
+        'rate': rate,
+        'sent': len(packets),
+        'coverage': sum(coverage) / len(coverage) if coverage else None,
+        'full_coverage_ratio': len(full) / len(packets) if packets else None,
+        'full_p50_ms': percentile(full, 0.5),
+        'full_p95_ms': percentile(full, 0.95),
+        'duplicates_mean': sum(duplicates) / len(duplicates) if duplicates else None,
+        'duplicates_max': max(duplicates) if duplicates else None,
+        'hops_max': max(hops) if hops else None,
+        'packets': packets,
+    }
+
+
+def fmt(value, spec, suffix=""):
+    return format(value, spec) + suffix if value is not None else "N/A"
+
+
+def pct(ratio):
+    return ratio * 100 if ratio is not None else None
+
+
+def print_rates(summaries, observers):
+    print("\n" + "="*100)
+    print(f"BROADCAST FLOOD RESULTS ({len(observers)} observers)")
+    print("="*100)
+    print(f"{'Rate':>8} {'Sent':>5} {'Coverage':>9} {'Full':>6} {'Full p50':>10} {'Full p95':>10} "
+          f"{'Dupes/pkt':>10} {'Max dupes':>10} {'Max hops':>9}")
+    print("-" * 100)
+    for s in summaries:
+        coverage = fmt(pct(s['coverage']), '.0f', '%')
+        full = fmt(pct(s['full_coverage_ratio']), '.0f', '%')
+        print(f"{s['rate']:>6.2f}/s {s['sent']:>5} {coverage:>9} {full:>6} {fmt(s['full_p50_ms'], '.0f', 'ms'):>10} "
+              f"{fmt(s['full_p95_ms'], '.0f', 'ms'):>10} {fmt(s['duplicates_mean'], '.2f'):>10} "
+              f"{fmt(s['duplicates_max'], 'd'):>10} {fmt(s['hops_max'], 'd'):>9}")
+    print("-" * 100)
+    if all(s['duplicates_mean'] is None for s in summaries):
+        print("Duplicates: no firmware log lines seen, enable security.debug_log_api_enabled on the observers")
+    print()
+
+
+def main(argv=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description="Broadcast to ^all at increasing rates and measure flood coverage")
+    parser.add_argument("--ports", nargs="+", help="Serial ports of the attached devices (default: all detected)")
+    parser.add_argument("--source", help="Port of the broadcasting device (default: the first port)")
+    parser.add_argument("--rates", nargs="+", type=float, default=DEFAULT_RATES, metavar="RATE",
+                        help=f"Broadcasts per second for each level (default: {' '.join(map(str, DEFAULT_RATES))})")
+    parser.add_argument("--count", type=int, default=20, help="Broadcasts per rate (default: 20)")
+    parser.add_argument("--size", type=int, default=100, help="Payload bytes per broadcast (default: 100)")
+    parser.add_argument("--drain", type=float, default=15, help="Seconds to wait for the flood to finish after each rate (default: 15)")
+    parser.add_argument("--json", help="Save the per-packet results to this JSON file")
+    args = parser.parse_args(argv)
+
+    ports = args.ports or find_serial_ports()
+    if len(ports) < 2:
+        print("ERROR: Need a source and at least one observer. Please specify with --ports")
+        return 1
+    source_port = args.source or ports[0]
+    if source_port not in ports:
+        ports = [source_port] + ports
+
+    print("="*70)
+    print("MESHTASTIC BROADCAST FLOOD BENCHMARK")
+    print("="*70)
+    print(f"Source: {source_port}")
+    print(f"Rates: {', '.join(f'{r:g}' for r in args.rates)} broadcasts/s, {args.count} each")
+    print()
+
+    devices = open_devices(ports)
+    source = next((d for d in devices if d['port'] == source_port), None)
+    observers = [d for d in devices if d is not source]
+    if source is None or not observers:
+        print("ERROR: Could not open the source and at least one observer")
+        for device in devices:
+            device['iface'].close()
+        return 1
+
+    tracker = FloodTracker({d['iface']: d['num'] for d in devices})
+    tracker.subscribe()
+    payload = "X" * args.size
+    summaries = []
+    try:
+        for level, rate in enumerate(args.rates):
+            print(f"📡 {rate:g} broadcasts/s: sending {args.count}... ", end="", flush=True)
+            sent = send_broadcasts(source, level, rate, args.count, payload)
+            time.sleep(args.drain)
+            summary = summarize_rate(rate, packet_results(sent, tracker, observers))
+            summaries.append(summary)
+            print(f"coverage {fmt(pct(summary['coverage']), '.0f', '%')}")
+    finally:
+        tracker.unsubscribe()
+        for device in devices:
+            device['iface'].close()
+
+    print_rates(summaries, observers)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'timestamp': datetime.now().isoformat(),
+                       'source': {k: source[k] for k in ('port', 'name', 'short', 'num')},
+                       'observers': [{k: o[k] for k in ('port', 'name', 'short', 'num')} for o in observers],
+                       'rates': summaries}, f, indent=2)
+        print(f"Results saved to: {args.json}")
+    return 0
@@ -0,0 +1,86 @@
+"""
+Command dispatch for python3 -m meshbench
+
+COMMANDS maps each subcommand to where it lives: a "module:function"
+called with the remaining arguments, or a script in the repository run as
+__main__. Nothing is imported until a command has been chosen, and the
+top-level parser is built by hand so --help only needs the table below.
+"""
+
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# name: (target, offline, help)
+COMMANDS = {
+    'discover': ('meshbench.discover:main', False, "List connected devices and their nodes"),
+    'pair-matrix': ('meshbench.pair_matrix:main', False, "Speed test every device pair"),
+    'ping': ('meshbench.ping:main', False, "Ping one target node"),
+    'speed': ('meshbench.ping:speed_main', False, "Speed test to one target node"),
+    'file': ('meshbench.file_transfer:main', False, "File transfer throughput test"),
+    'two': ('meshbench.two_devices:main', False, "Detect two USB devices and test between them"),
+    'find-port': ('meshbench.discover:find_port_main', False, "Find the serial port of a device by short name"),
+    'sweep': ('meshbench.preset_sweep:main', False, "Run the pair matrix under each modem preset and pick the fastest"),
+    'contention': ('meshbench.contention:main', False, "Send from several devices at once at increasing loads"),
+    'broadcast': ('meshbench.broadcast:main', False, "Broadcast to ^all and measure flood coverage and duplicates"),
+    'index': ('node_index.py', False, "Index a device's node database"),
+    'exporter': ('mesh_exporter.py', False, "Serve Prometheus metrics"),
+    'altitude': ('get_altitude.py', False, "Look up ground elevation for coordinates"),
+    'report': ('generate_html_report.py', True, "Generate the HTML test report"),
+    'table': ('generate_speed_table_html.py', True, "Generate the HTML speed table from a results JSON"),
+    'capacity': ('calculate_3min_capacity.py', True, "Calculate 3-minute transmission capacity"),
+    'airtime': ('airtime.py', True, "Show airtime budget use per radio and time on air per preset"),
+    'stats': ('meshbench.stats:main', True, "Summarize result JSON files (latency percentiles, success rate)"),
+}
+
+# Names from before the engine consolidation
+ALIASES = {'pairs': 'pair-matrix', 'list': 'discover'}
+
+
+def usage():
+    lines = ["usage: python3 -m meshbench <command> [args...]", "", "commands:"]
+    for name, (target, offline, help) in COMMANDS.items():
+        tag = "" if offline else "  [radio]"
+        lines.append(f"  {name:<11} {help}{tag}")
+    lines.append("")
+    lines.append("Run 'python3 -m meshbench <command> --help' for command options.")
+    return "\n".join(lines)
+
+
+def run_target(name, target, argv):
+    """Import (or run) the command's implementation and return an exit status"""
+    # Commands and scripts import the top-level modules (mesh_records, node_index, ...)
+    if ROOT not in sys.path:
+        sys.path.insert(0, ROOT)
+    # argv[0] becomes the usage prog name for both kinds of target
+    saved = sys.argv
+    sys.argv = [f"meshbench {name}"] + argv
+    try:
+        if ':' in target:
+            import importlib
+
+            module, func = target.split(':')
+            return getattr(importlib.import_module(module), func)(argv) or 0
+
+        import runpy
+
+        runpy.run_path(os.path.join(ROOT, target), run_name='__main__')
+    except SystemExit as e:
+        return e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+    finally:
+        sys.argv = saved
+    return 0
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv or argv[0] in ('-h', '--help'):
+        print(usage())
+        return 0 if argv else 2
+    name, rest = ALIASES.get(argv[0], argv[0]), argv[1:]
+    if name not in COMMANDS:
+        print(f"meshbench: unknown command '{name}'\n", file=sys.stderr)
+        print(usage(), file=sys.stderr)
+        return 2
+    return run_target(name, COMMANDS[name][0], rest)
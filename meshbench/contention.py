@@ -0,0 +1,403 @@
+"""
+contention: several devices sending at once, at increasing offered loads
+
+Every attached device sends to its own target (by default the next attached
+device, so every sender is also a receiver) at a fixed rate for each load
+level. All senders start together: the threads meet at a barrier, which sets
+one start time, and each sleeps until just before it and spins the rest, so
+the first packets leave within a few milliseconds of each other (the skew is
+measured and reported). Packets are sent open-loop, on schedule, without
+waiting for the previous ACK, which is what makes them collide.
+
+Per level the results are: delivery ratio (ACKs from the destination, and
+receptions at attached destinations), ACK latency and its inflation over the
+lightest load, and the channelUtilization/airUtilTx the nodes report in
+deviceMetrics. Throughput vs offered load is drawn to an SVG with the knee
+marked: the highest load that still delivers --knee-ratio of its packets.
+"""
+
+import json
+import time
+import random
+import argparse
+import threading
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+from meshbench.engine import open_devices, find_serial_ports, AckTracker, MESSAGE_OVERHEAD
+from meshbench.stats import percentile
+
+DEFAULT_LOADS = [0.1, 0.2, 0.5, 1.0, 2.0]
+
+# Threads sleep until this long before the common start time and spin the rest
+SPIN_S = 0.005
+# Time between the barrier releasing and the start, for every thread to get there
+START_LEAD_S = 0.05
+MAX_SKEW_MS = 10
+
+TAG = "CONT"
+
+
+class ContentionTracker:
+    """Collects ACKs, receptions and deviceMetrics from every open interface
+
+    The meshtastic reader threads only store into dictionaries here; matching
+    them to the sent packets happens once a level is over. Routing replies go
+    to one AckTracker per interface, which keeps every reply to a packet: a
+    relay's implicit ACK usually arrives before the destination's.
+    """
+
+    def __init__(self, interfaces=None):
+        self.lock = threading.Lock()
+        self.received = {}      # (receiver num, text tag) -> first reception time
+        self.metrics = []       # (time, node num, channelUtilization, airUtilTx)
+        self.interfaces = interfaces or {}      # iface -> its node num
+        self.acks = {iface: AckTracker(iface, clock=time.monotonic) for iface in self.interfaces}
+
+    def subscribe(self):
+        from pubsub import pub
+
+        pub.subscribe(self.on_packet, "meshtastic.receive")
+
+    def unsubscribe(self):
+        from pubsub import pub
+
+        pub.unsubscribe(self.on_packet, "meshtastic.receive")
+
+    def on_packet(self, packet, interface):
+        now = time.monotonic()
+        decoded = packet.get('decoded') or {}
+        portnum = decoded.get('portnum')
+        if portnum == 'ROUTING_APP':
+            acks = self.acks.get(interface)
+            if acks is not None:
+                acks.on_packet(packet, interface)
+            return
+        with self.lock:
+            if portnum == 'TEXT_MESSAGE_APP' and (decoded.get('text') or '').startswith(TAG):
+                receiver = self.interfaces.get(interface)
+                tag = decoded['text'].split(' ', 1)[0]
+                self.received.setdefault((receiver, tag), now)
+            elif portnum == 'TELEMETRY_APP':
+                metrics = (decoded.get('telemetry') or {}).get('deviceMetrics') or {}
+                if 'channelUtilization' in metrics or 'airUtilTx' in metrics:
+                    self.metrics.append((now, packet.get('from'), metrics.get('channelUtilization'),
+                                         metrics.get('airUtilTx')))
+
+
+def assign_targets(senders, target=None):
+    """Each sender's destination: the given node for all, or the next attached device"""
+    if target is not None:
+        for sender in senders:
+            sender['target'] = target
+    else:
+        for i, sender in enumerate(senders):
+            sender['target'] = senders[(i + 1) % len(senders)]['num']
+
+
+def wait_until(start_at):
+    """Sleep until just before start_at, then spin; returns the actual start time"""
+    remaining = start_at - time.monotonic() - SPIN_S
+    if remaining > 0:
+        time.sleep(remaining)
+    while True:
+        now = time.monotonic()
+        if now >= start_at:
+            return now
+
+
+def send_schedule(rate, duration, poisson=False, rng=None):
+    """Send offsets (seconds from the start) at rate packets/s over duration"""
+    offsets = []
+    t = 0.0
+    while t < duration:
+        offsets.append(t)
+        t += rng.expovariate(rate) if poisson else 1.0 / rate
+    return offsets
+
+
+def run_sender(sender, level, offsets, payload, barrier, start):
+    """One sender's part of a level; returns [(tag, packet id, send time)]"""
+    sent = []
+    barrier.wait()
+    begin = wait_until(start['at'])
+    sender['skew'] = begin - start['at']
+    for seq, offset in enumerate(offsets):
+        due = start['at'] + offset
+        if due > time.monotonic():
+            time.sleep(due - time.monotonic())
+        tag = f"{TAG}{level}.{sender['short']}.{seq}"
+        t = time.monotonic()
+        try:
+            packet = sender['iface'].sendText(f"{tag} {payload}", destinationId=sender['target'], wantAck=True)
+            sent.append((tag, getattr(packet, 'id', None), t))
+        except Exception as e:
+            sent.append((tag, None, t))
+            sender.setdefault('errors', []).append(str(e))
+    return sent
+
+
+def run_level(senders, tracker, level, rate, duration, drain, payload, poisson=False, rng=None):
+    """Run all senders at rate packets/s each for duration seconds; returns the level's results"""
+    start = {}
+
+    def set_start():
+        start['at'] = time.monotonic() + START_LEAD_S
+
+    barrier = threading.Barrier(len(senders), action=set_start)
+    schedules = [send_schedule(rate, duration, poisson, rng) for _ in senders]
+    with ThreadPoolExecutor(max_workers=len(senders)) as pool:
+        futures = [pool.submit(run_sender, s, level, offsets, payload, barrier, start)
+                   for s, offsets in zip(senders, schedules)]
+        sent = [future.result() for future in futures]
+    end = time.monotonic()
+    time.sleep(drain)
+    return summarize_level(senders, tracker, sent, rate, start['at'], end, duration, payload)
+
+
+def message_bytes(tag, payload):
+    """Bytes on the mesh for one tagged message: its text plus header/overhead"""
+    return len(f"{tag} {payload}".encode('utf-8')) + MESSAGE_OVERHEAD
+
+
+def summarize_level(senders, tracker, sent, rate, start, end, duration, payload):
+    attached = {s['num'] for s in senders}
+    with tracker.lock:
+        received = dict(tracker.received)
+        metrics = [m for m in tracker.metrics if m[0] >= start]
+
+    per_sender = []
+    latencies = []
+    total_sent = total_acked = total_implicit = total_naks = 0
+    sent_bytes = acked_bytes = 0
+    observed_sent = observed_received = 0
+    for sender, packets in zip(senders, sent):
+        acked = implicit = naks = 0
+        acks = tracker.acks[sender['iface']]
+        for tag, packet_id, t in packets:
+            size = message_bytes(tag, payload)
+            sent_bytes += size
+            ack_time = acks.ack(packet_id, sender['target'])
+            replies = acks.replies_to(packet_id)
+            if ack_time is not None:
+                acked += 1
+                acked_bytes += size
+                latencies.append(ack_time - t)
+            elif any(reason != 'NONE' for _, _, reason in replies):
+                naks += 1
+            elif replies:
+                # Only a relay's rebroadcast heard by the sender, not the destination's ACK
+                implicit += 1
+        if sender['target'] in attached:
+            observed_sent += len(packets)
+            observed_received += sum(1 for tag, _, _ in packets if (sender['target'], tag) in received)
+        total_sent += len(packets)
+        total_acked += acked
+        total_implicit += implicit
+        total_naks += naks
+        per_sender.append({'from': sender['short'], 'to': sender['target'], 'sent': len(packets), 'acked': acked,
+                           'implicit_acks': implicit, 'naks': naks, 'start_skew_ms': sender['skew'] * 1000,
+                           'errors': sender.pop('errors', [])})
+
+    latencies.sort()
+    skews = [s['skew'] * 1000 for s in senders]
+    utilization = [m[2] for m in metrics if m[2] is not None]
+    air_util = [m[3] for m in metrics if m[3] is not None]
+    return {
+        'rate_per_sender': rate,
+        'senders': len(senders),
+        # From the packets actually scheduled, which round the rate up over the duration
+        'offered_pps': total_sent / duration,
+        'offered_kbps': sent_bytes * 8 / duration / 1000,
+        'sent': total_sent,
+        'acked': total_acked,
+        'implicit_acks': total_implicit,
+        'naks': total_naks,
+        'delivery_ratio': total_acked / total_sent if total_sent else None,
+        'received_ratio': observed_received / observed_sent if observed_sent else None,
+        'throughput_kbps': acked_bytes * 8 / duration / 1000,
+        'ack_p50_ms': percentile(latencies, 0.5) * 1000 if latencies else None,
+        'ack_p95_ms': percentile(latencies, 0.95) * 1000 if latencies else None,
+        'start_skew_ms': max(skews) - min(skews),
+        'send_time_s': end - start,
+        'channel_utilization': max(utilization) if utilization else None,
+        'air_util_tx': max(air_util) if air_util else None,
+        'per_sender': per_sender,
+    }
+
+
+def node_metrics(senders):
+    """Latest channelUtilization/airUtilTx each device has for itself, from its node DB"""
+    values = []
+    for sender in senders:
+        node = (getattr(sender['iface'], 'nodesByNum', None) or {}).get(sender['num'])
+        metrics = (node or {}).get('deviceMetrics', {})
+        values.append((metrics.get('channelUtilization'), metrics.get('airUtilTx')))
+    return values
+
+
+def add_inflation(levels):
+    """ACK latency of each level relative to the lightest load that got ACKs"""
+    base = next((lv['ack_p50_ms'] for lv in levels if lv['ack_p50_ms']), None)
+    for lv in levels:
+        lv['ack_inflation'] = lv['ack_p50_ms'] / base if base and lv['ack_p50_ms'] else None
+
+
+def find_knee(levels, ratio):
+    """The highest offered load whose delivery ratio is still at least ratio"""
+    knee = None
+    for lv in sorted(levels, key=lambda lv: lv['offered_kbps']):
+        if lv['delivery_ratio'] is None or lv['delivery_ratio'] < ratio:
+            break
+        knee = lv
+    return knee
+
+
+def write_svg(path, levels, knee=None, width=640, height=400):
+    """Delivered vs offered throughput as an SVG line chart (no plotting library needed)"""
+    left, right, top, bottom = 60, 20, 30, 50
+    points = sorted((lv['offered_kbps'], lv['throughput_kbps']) for lv in levels)
+    x_max = max([p[0] for p in points] + [1e-9]) * 1.05
+    y_max = max([p[0] for p in points] + [p[1] for p in points] + [1e-9]) * 1.05
+
+    def x(v):
+        return left + v / x_max * (width - left - right)
+
+    def y(v):
+        return height - bottom - v / y_max * (height - top - bottom)
+
+    out = [f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" font-family="sans-serif" font-size="12">',
+           f'<rect width="{width}" height="{height}" fill="white"/>',
+           f'<text x="{width / 2}" y="18" text-anchor="middle" font-size="14">Throughput vs offered load</text>']
+    for i in range(6):
+        gx, gy = x_max * i / 5, y_max * i / 5
+        out.append(f'<line x1="{x(gx):.1f}" y1="{y(0):.1f}" x2="{x(gx):.1f}" y2="{y(y_max):.1f}" stroke="#e5e7eb"/>')
+        out.append(f'<line x1="{x(0):.1f}" y1="{y(gy):.1f}" x2="{x(x_max):.1f}" y2="{y(gy):.1f}" stroke="#e5e7eb"/>')
+        out.append(f'<text x="{x(gx):.1f}" y="{height - bottom + 16}" text-anchor="middle">{gx:.2f}</text>')
+        out.append(f'<text x="{left - 6}" y="{y(gy) + 4:.1f}" text-anchor="end">{gy:.2f}</text>')
+    out.append(f'<text x="{width / 2}" y="{height - 10}" text-anchor="middle">Offered load (kbps)</text>')
+    out.append(f'<text x="14" y="{height / 2}" text-anchor="middle" transform="rotate(-90 14 {height / 2})">Delivered (kbps)</text>')
+    # Ideal delivery, then the measured curve
+    out.append(f'<line x1="{x(0):.1f}" y1="{y(0):.1f}" x2="{x(min(x_max, y_max)):.1f}" y2="{y(min(x_max, y_max)):.1f}" '
+               'stroke="#9ca3af" stroke-dasharray="4 4"/>')
+    out.append('<polyline fill="none" stroke="#2563eb" stroke-width="2" points="'
+               + ' '.join(f'{x(px):.1f},{y(py):.1f}' for px, py in points) + '"/>')
+    for px, py in points:
+        out.append(f'<circle cx="{x(px):.1f}" cy="{y(py):.1f}" r="3.5" fill="#2563eb"/>')
+    if knee:
+        kx, ky = x(knee['offered_kbps']), y(knee['throughput_kbps'])
+        out.append(f'<circle cx="{kx:.1f}" cy="{ky:.1f}" r="7" fill="none" stroke="#dc2626" stroke-width="2"/>')
+        out.append(f'<text x="{kx + 10:.1f}" y="{ky - 10:.1f}" fill="#dc2626">knee {knee["offered_kbps"]:.2f} kbps</text>')
+    out.append('</svg>')
+    with open(path, 'w') as f:
+        f.write('\n'.join(out) + '\n')
+
+
+def fmt(value, spec, suffix=""):
+    return format(value, spec) + suffix if value is not None else "N/A"
+
+
+def pct(ratio):
+    return ratio * 100 if ratio is not None else None
+
+
+def print_levels(levels, knee):
+    print("\n" + "="*118)
+    print("CHANNEL CONTENTION RESULTS")
+    print("="*118)
+    print(f"{'Rate/sender':>11} {'Offered':>10} {'Delivered':>10} {'ACKed':>11} {'Ratio':>6} {'Received':>9} "
+          f"{'ACK p50':>9} {'ACK p95':>9} {'Inflation':>9} {'ChUtil':>7} {'AirTx':>6} {'Skew':>7}")
+    print("-" * 118)
+    for lv in levels:
+        acked = f"{lv['acked']}/{lv['sent']}"
+        mark = "  ⭐ knee" if lv is knee else ""
+        print(f"{lv['rate_per_sender']:>9.2f}/s {lv['offered_kbps']:>5.2f} kbps {lv['throughput_kbps']:>5.2f} kbps "
+              f"{acked:>11} {fmt(pct(lv['delivery_ratio']), '.0f', '%'):>6} {fmt(pct(lv['received_ratio']), '.0f', '%'):>9} "
+              f"{fmt(lv['ack_p50_ms'], '.0f', 'ms'):>9} {fmt(lv['ack_p95_ms'], '.0f', 'ms'):>9} "
+              f"{fmt(lv['ack_inflation'], '.2f', 'x'):>9} {fmt(lv['channel_utilization'], '.1f', '%'):>7} "
+              f"{fmt(lv['air_util_tx'], '.1f', '%'):>6} {lv['start_skew_ms']:>5.1f}ms{mark}")
+    print("-" * 118)
+    if knee:
+        print(f"Knee: {knee['offered_kbps']:.2f} kbps offered ({knee['rate_per_sender']:g} packets/s per sender), "
+              f"{knee['throughput_kbps']:.2f} kbps delivered")
+    else:
+        print("No load level reached the delivery ratio for a knee")
+    print()
+
+
+def main(argv=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description="Send from several devices at once at increasing offered loads and measure contention")
+    parser.add_argument("--ports", nargs="+", help="Serial ports of the senders (default: all detected)")
+    parser.add_argument("--target", help="Node every sender sends to, as !hex id or number (default: each sends to the next attached device)")
+    parser.add_argument("--loads", nargs="+", type=float, default=DEFAULT_LOADS, metavar="RATE",
+                        help=f"Packets per second per sender for each level (default: {' '.join(map(str, DEFAULT_LOADS))})")
+    parser.add_argument("--duration", type=float, default=60, help="Seconds of sending per level (default: 60)")
+    parser.add_argument("--drain", type=float, default=20, help="Seconds to wait for late ACKs after each level (default: 20)")
+    parser.add_argument("--size", type=int, default=200, help="Payload bytes per packet (default: 200)")
+    parser.add_argument("--poisson", action="store_true", help="Exponential gaps between packets instead of a fixed interval")
+    parser.add_argument("--seed", type=int, help="Random seed for --poisson")
+    parser.add_argument("--knee-ratio", type=float, default=0.9, help="Delivery ratio the knee must still reach (default: 0.9)")
+    parser.add_argument("--plot", default="contention.svg", help="Throughput vs offered load chart (default: contention.svg, '' for none)")
+    parser.add_argument("--json", help="Save the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    ports = args.ports or find_serial_ports()
+    if len(ports) < 2 and args.target is None:
+        print("ERROR: Need at least two serial ports (or --target). Please specify with --ports")
+        return 1
+    target = None
+    if args.target is not None:
+        target = int(args.target[1:], 16) if args.target.startswith('!') else int(args.target)
+
+    print("="*70)
+    print("MESHTASTIC CHANNEL CONTENTION BENCHMARK")
+    print("="*70)
+    print(f"Ports: {', '.join(ports)}")
+    print(f"Loads: {', '.join(f'{r:g}' for r in args.loads)} packets/s per sender, {args.duration:g}s each")
+    print()
+
+    senders = open_devices(ports)
+    if not senders:
+        print("ERROR: No devices found")
+        return 1
+    assign_targets(senders, target)
+    tracker = ContentionTracker({s['iface']: s['num'] for s in senders})
+    tracker.subscribe()
+    rng = random.Random(args.seed)
+    payload = "X" * args.size
+
+    levels = []
+    try:
+        for level, rate in enumerate(args.loads):
+            print(f"📡 Level {level + 1}/{len(args.loads)}: {len(senders)} senders x {rate:g} packets/s... ", end="", flush=True)
+            result = run_level(senders, tracker, level, rate, args.duration, args.drain, payload, args.poisson, rng)
+            # Fall back to the node DB when no telemetry packet came in during the level
+            stored = node_metrics(senders)
+            for i, key in enumerate(('channel_utilization', 'air_util_tx')):
+                values = [v[i] for v in stored if v[i] is not None]
+                if result[key] is None and values:
+                    result[key] = max(values)
+            levels.append(result)
+            print(f"{result['acked']}/{result['sent']} ACKed, skew {result['start_skew_ms']:.1f}ms")
+            if result['start_skew_ms'] > MAX_SKEW_MS:
+                print(f"⚠️  Senders started {result['start_skew_ms']:.1f}ms apart (over {MAX_SKEW_MS}ms)")
+    finally:
+        tracker.unsubscribe()
+        for sender in senders:
+            sender['iface'].close()
+
+    add_inflation(levels)
+    knee = find_knee(levels, args.knee_ratio)
+    print_levels(levels, knee)
+
+    if args.plot:
+        write_svg(args.plot, levels, knee)
+        print(f"Chart saved to: {args.plot}")
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'timestamp': datetime.now().isoformat(),
+                       'senders': [{'port': s['port'], 'name': s['name'], 'short': s['short'], 'num': s['num'],
+                                    'target': s['target']} for s in senders],
+                       'knee_kbps': knee['offered_kbps'] if knee else None, 'levels': levels}, f, indent=2)
+        print(f"Results saved to: {args.json}")
+    return 0
@@ -0,0 +1,86 @@
+"""
+discover: list connected devices and the nodes each one can see, and find
+the port a device is on
+
+Backs list_connected_nodes.py and find_device_port.py.
+"""
+
+import argparse
+
+from meshbench.engine import find_serial_ports, open_interface, get_device_info, is_own_node
+
+
+def print_device(port, info):
+    if info:
+        print(f"📡 Device on {port}:")
+        print(f"   Name: {info['name']} ({info['short']})")
+        print(f"   Node ID: {info['id']}")
+        print(f"   Connected nodes ({len(info['nodes'])}):")
+
+        if info['nodes']:
+            for node_id, node in info['nodes'].items():
+                snr_str = f", SNR: {node['snr']:.2f} dB" if node['snr'] is not None else ""
+                print(f"      • {node['name']} ({node['short']}) - ID: {node_id}{snr_str}")
+        else:
+            print("      (No other nodes visible)")
+        print()
+    else:
+        print(f"❌ {port}: Failed to connect")
+        print()
+
+
+def main(argv=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description="List all connected Meshtastic devices and their available nodes")
+    parser.add_argument("--ports", nargs="+", help="Serial ports to query (default: auto-detect)")
+    args = parser.parse_args(argv)
+
+    ports = args.ports or find_serial_ports()
+    if not ports:
+        print("ERROR: No USB serial ports found")
+        return 1
+
+    print("="*70)
+    print("CONNECTED MESHTASTIC DEVICES AND NODES")
+    print("="*70)
+    print()
+
+    for port in ports:
+        print_device(port, get_device_info(port))
+
+    print("="*70)
+    return 0
+
+
+def find_device_port(device_short_name):
+    """Find which port has the device with given short name"""
+    for port in find_serial_ports():
+        try:
+            iface = open_interface(port)
+
+            # Check if this device matches
+            for node in iface.nodes.values():
+                if is_own_node(iface, node):
+                    user_info = node.get('user', {})
+                    short_name = user_info.get('shortName', '')
+                    if short_name.lower() == device_short_name.lower():
+                        iface.close()
+                        return port
+
+            iface.close()
+        except Exception:
+            continue
+
+    return None
+
+
+def find_port_main(argv=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description="Find which USB port has a specific device")
+    parser.add_argument("short_name", help="Short name of the device")
+    args = parser.parse_args(argv)
+
+    port = find_device_port(args.short_name)
+    if port:
+        print(port)
+        return 0
+    print(f"Device {args.short_name} not found")
+    return 1
@@ -0,0 +1,388 @@
+"""
+Shared engine for the speed test tools: connection, discovery, send loop
+and metrics
+
+meshtastic is imported on first connection rather than at module load, so
+commands can parse arguments (and print --help) without it.
+"""
+
+import sys
+import time
+import glob
+import threading
+
+from airtime import AirtimeBudget
+from mesh_records import LatencySamples
+from mesh_trace import tracer, span
+
+# ~200 byte payload + ~50 bytes of header/overhead per test message
+MESSAGE_PAYLOAD = 200
+MESSAGE_OVERHEAD = 50
+BYTES_PER_MESSAGE = MESSAGE_PAYLOAD + MESSAGE_OVERHEAD
+
+
+def find_serial_ports():
+    """USB serial ports that may have a Meshtastic device (usbserial first, then usbmodem)"""
+    ports = glob.glob("/dev/cu.usbserial*")
+    if not ports:
+        ports = glob.glob("/dev/cu.usbmodem*")
+    return ports
+
+
+def open_interface(port):
+    """Open a serial interface; meshtastic is only imported here"""
+    try:
+        import meshtastic.serial_interface
+    except ImportError:
+        print("ERROR: meshtastic module not found")
+        print("Install with: pip3 install meshtastic")
+        sys.exit(1)
+    return meshtastic.serial_interface.SerialInterface(devPath=port)
+
+
+def is_own_node(iface, node):
+    """Whether an iface.nodes entry is the connected device itself
+
+    iface.nodes is keyed by "!hex" id, so the match is on the entry's num.
+    """
+    return node.get('num') == iface.myInfo.my_node_num
+
+
+def device_identity(iface):
+    """(node num, long name, short name) of the connected device"""
+    device_id = iface.myInfo.my_node_num
+    device_name = "Unknown"
+    device_short = "Unknown"
+
+    # Try to get name from nodes list (device appears as favorite)
+    for node in iface.nodes.values():
+        if is_own_node(iface, node):
+            user_info = node.get('user', {})
+            device_name = user_info.get('longName', 'Unknown')
+            device_short = user_info.get('shortName', 'Unknown')
+            break
+
+    # Fallback to myInfo if available
+    if device_name == "Unknown":
+        try:
+            if hasattr(iface.myInfo, 'long_name') and iface.myInfo.long_name:
+                device_name = iface.myInfo.long_name
+        except Exception:
+            pass
+
+    if device_short == "Unknown":
+        try:
+            if hasattr(iface.myInfo, 'short_name') and iface.myInfo.short_name:
+                device_short = iface.myInfo.short_name
+        except Exception:
+            pass
+
+    return device_id, device_name, device_short
+
+
+def visible_nodes(iface):
+    """{node_id: {name, short, snr, deviceMetrics}} for every node except the device itself"""
+    nodes = {}
+    for node_id, node in iface.nodes.items():
+        if is_own_node(iface, node):
+            continue
+        nodes[node_id] = {
+            'name': node.get('user', {}).get('longName', 'Unknown'),
+            'short': node.get('user', {}).get('shortName', 'Unknown'),
+            'snr': node.get('snr'),
+            'deviceMetrics': node.get('deviceMetrics', {})
+        }
+    return nodes
+
+
+def get_device_info(port, report_errors=True):
+    """Get device information and available nodes (None if the port fails)"""
+    try:
+        with span('device_info.open', port=port):
+            iface = open_interface(port)
+
+        device_id, device_name, device_short = device_identity(iface)
+        with span('device_info.read_nodes', count=len(iface.nodes)):
+            nodes = visible_nodes(iface)
+
+        with span('device_info.close'):
+            iface.close()
+        return {
+            'name': device_name,
+            'short': device_short,
+            'id': device_id,
+            'port': port,
+            'nodes': nodes
+        }
+    except Exception as e:
+        if report_errors:
+            print(f"❌ Error connecting to {port}: {e}")
+        return None
+
+
+def open_devices(ports):
+    """Open every port and keep it open; returns [{port, iface, num, name, short}] for those that opened"""
+    devices = []
+    for port in ports:
+        try:
+            iface = open_interface(port)
+        except Exception as e:
+            print(f"❌ {port}: {e}")
+            continue
+        num, name, short = device_identity(iface)
+        devices.append({'port': port, 'iface': iface, 'num': num, 'name': name, 'short': short})
+        print(f"✅ {port}: {name} ({short})")
+    return devices
+
+
+def lora_settings(iface):
+    """(region, modem preset) names from the device's LoRa config, None where not known"""
+    try:
+        lora = iface.localNode.localConfig.lora
+    except AttributeError:
+        return None, None
+
+    def enum_name(field):
+        values = lora.DESCRIPTOR.fields_by_name[field].enum_type.values_by_number
+        value = values.get(getattr(lora, field))
+        return value.name if value else None
+
+    return enum_name('region'), enum_name('modem_preset') if lora.use_preset else None
+
+
+def airtime_budget(iface, port, duty_cycle=0, burst=None):
+    """The shared airtime budget of the radio on port, for its configured region and preset"""
+    region, preset = lora_settings(iface)
+    budget = AirtimeBudget.for_radio(port, region, preset, duty_cycle, burst=burst)
+    if preset is None:
+        # Custom bandwidth/SF/CR (use_preset off) or no LoRa config read: the time on air is a guess
+        print(f"⚠️  {port}: modem preset not known, budgeting airtime as {budget.preset} from the base profile")
+    return budget
+
+
+def find_target(iface, query):
+    """Resolve a node by long name, short name or !hex id; returns (index, node num or None)"""
+    from node_index import NodeIndex
+
+    index = NodeIndex.from_interface(iface, subscribe=False)
+    return index, index.find(query)
+
+
+class AckTracker:
+    """Routing ACK/NAKs that come back on one interface, by the request id of the sent packet
+
+    sendText returns as soon as the packet is queued, so this is what tells
+    whether a message was delivered: a ROUTING_APP reply from the destination
+    with errorReason NONE. Use as a context manager around the sends, or feed
+    on_packet() from an existing subscription. Reply times come from clock.
+    """
+
+    def __init__(self, iface, clock=time.time):
+        self.iface = iface
+        self.clock = clock
+        self.replies = {}       # request id -> [(time, from num, error reason)]
+        self.changed = threading.Condition()
+
+    def __enter__(self):
+        from pubsub import pub
+
+        pub.subscribe(self.on_packet, "meshtastic.receive")
+        return self
+
+    def __exit__(self, *exc):
+        from pubsub import pub
+
+        pub.unsubscribe(self.on_packet, "meshtastic.receive")
+        return False
+
+    def on_packet(self, packet, interface):
+        if interface is not self.iface:
+            return
+        decoded = packet.get('decoded') or {}
+        if decoded.get('portnum') != 'ROUTING_APP' or not decoded.get('requestId'):
+            return
+        reason = (decoded.get('routing') or {}).get('errorReason', 'NONE')
+        with self.changed:
+            self.replies.setdefault(decoded['requestId'], []).append((self.clock(), packet.get('from'), reason))
+            self.changed.notify_all()
+
+    def replies_to(self, packet_id):
+        """Every (time, from num, error reason) reply to a packet so far"""
+        with self.changed:
+            return list(self.replies.get(packet_id, ()))
+
+    def ack(self, packet_id, target_num):
+        """Time of the destination's ACK for a packet, None if it has not come"""
+        with self.changed:
+            for t, sender, reason in self.replies.get(packet_id, ()):
+                # Relays' implicit ACKs come from other nodes and do not count
+                if sender == target_num and reason == 'NONE':
+                    return t
+        return None
+
+    def wait(self, packet_ids, target_num, timeout):
+        """Wait up to timeout seconds until every packet has an ACK or a NAK from the destination"""
+        def settled():
+            return all(any(sender == target_num or reason != 'NONE'
+                           for _, sender, reason in self.replies.get(pid, ())) for pid in packet_ids)
+
+        with self.changed:
+            return self.changed.wait_for(settled, timeout)
+
+
+def send_loop(iface, target_id, messages, delay=0.0, phase='send', on_send=None, on_sent=None, on_error=None, budget=None):
+    """Send each message with wantAck and time the sendText call
+
+    on_send(i) is called before each message and on_sent(i, elapsed) or
+    on_error(i, exception) after it, for progress output; delay is slept
+    after every message. With an AirtimeBudget each message first waits for
+    its time on air and for the previous one to be off the air. Returns
+    {successful, failed, times (LatencySamples), errors, total_time,
+    airtime_wait, packets}; successful only means the packet was queued,
+    packets holds (packet id, send time) for ACK matching.
+    """
+    stats = {'successful': 0, 'failed': 0, 'times': LatencySamples(), 'errors': [], 'total_time': 0,
+             'airtime_wait': 0.0, 'packets': []}
+    start_time = time.time()
+    for i, msg in enumerate(messages):
+        if budget is not None:
+            with span(f'{phase}.airtime'):
+                stats['airtime_wait'] += budget.acquire_packet(len(msg.encode('utf-8')))
+        msg_start = time.time()
+        try:
+            if on_send is not None:
+                on_send(i)
+            with span(f'{phase}.message', index=i, target=target_id):
+                packet = iface.sendText(msg, destinationId=target_id, wantAck=True)
+            elapsed = time.time() - msg_start
+            stats['packets'].append((getattr(packet, 'id', None), msg_start))
+            stats['times'].append(elapsed)
+            stats['successful'] += 1
+            if on_sent is not None:
+                on_sent(i, elapsed)
+        except Exception as e:
+            stats['failed'] += 1
+            stats['errors'].append(f"Message {i+1}: {str(e)}")
+            if on_error is not None:
+                on_error(i, e)
+
+        if delay:
+            # Small delay between messages
+            with span(f'{phase}.delay'):
+                time.sleep(delay)
+    stats['total_time'] = time.time() - start_time
+    return stats
+
+
+def throughput_bps(total_bytes, seconds):
+    return (total_bytes * 8) / seconds if seconds > 0 else 0
+
+
+def node_snr(iface, node_id):
+    node = iface.nodes.get(node_id)
+    return node.get('snr') if node else None
+
+
+def ack_results(tracker, packets, target_num):
+    """Delivery from the destination's ACKs: {acked, delivery_ratio, ack_times, delivered_kbps}"""
+    ack_times = []
+    last_ack = None
+    for packet_id, sent in packets:
+        t = tracker.ack(packet_id, target_num)
+        if t is not None:
+            ack_times.append(t - sent)
+            last_ack = t if last_ack is None else max(last_ack, t)
+    # Delivered throughput runs from the first send to the last ACK
+    duration = last_ack - packets[0][1] if last_ack is not None else 0
+    return {
+        'acked': len(ack_times),
+        'delivery_ratio': len(ack_times) / len(packets) if packets else 0,
+        'ack_times': ack_times,
+        'delivered_kbps': throughput_bps(len(ack_times) * BYTES_PER_MESSAGE, duration) / 1000,
+    }
+
+
+def test_transmission(port, target_node_id, message_count=30, duty_cycle=None, ack_timeout=None, airtime_burst=None):
+    """Test transmission speed to a target node
+
+    With a duty_cycle (percent, 0 for the region's limit) sends are paced by
+    the radio's airtime budget instead of the fixed delay, bursting up to
+    airtime_burst seconds of airtime when given. With ack_timeout
+    the destination's ACKs are tracked, waited for up to ack_timeout seconds
+    after the last send, and reported as acked, delivery_ratio, ack_times and
+    delivered_kbps.
+    """
+    results = {
+        'port': port,
+        'target_id': target_node_id,
+        'message_count': message_count,
+        'successful': 0,
+        'failed': 0,
+        'total_time': 0,
+        'times': [],
+        'avg_time': 0,
+        'min_time': 0,
+        'max_time': 0,
+        'throughput_bps': 0,
+        'throughput_kbps': 0,
+        'messages_per_sec': 0,
+        'snr': None,
+        'errors': []
+    }
+
+    mark = tracer.mark()
+    try:
+        with span('transmission.open', port=port):
+            iface = open_interface(port)
+
+        budget = airtime_budget(iface, port, duty_cycle, airtime_burst) if duty_cycle is not None else None
+        test_message = "X" * MESSAGE_PAYLOAD
+        messages = (f"TEST_{i:03d}_{test_message}" for i in range(message_count))
+        if ack_timeout is None:
+            stats = send_loop(iface, target_node_id, messages, delay=0.1 if budget is None else 0,
+                              phase='transmission', budget=budget)
+        else:
+            from node_index import node_id_to_num
+
+            target_num = node_id_to_num(target_node_id)
+            with AckTracker(iface) as tracker:
+                stats = send_loop(iface, target_node_id, messages, delay=0.1 if budget is None else 0,
+                                  phase='transmission', budget=budget)
+                ids = [pid for pid, _ in stats['packets']]
+                with span('transmission.ack_wait'):
+                    tracker.wait(ids, target_num, ack_timeout)
+            results.update(ack_results(tracker, stats['packets'], target_num))
+        if budget is not None:
+            results['airtime'] = dict(budget.usage(), wait_s=stats['airtime_wait'])
+
+        results['successful'] = stats['successful']
+        results['failed'] = stats['failed']
+        results['errors'].extend(stats['errors'])
+        results['total_time'] = stats['total_time']
+
+        times = stats['times']
+        if times:
+            results['times'] = times.to_json()
+            results['avg_time'] = times.mean()
+            results['min_time'] = times.min()
+            results['max_time'] = times.max()
+
+            total_bytes = results['successful'] * BYTES_PER_MESSAGE
+            results['throughput_bps'] = throughput_bps(total_bytes, results['total_time'])
+            results['throughput_kbps'] = results['throughput_bps'] / 1000
+            results['messages_per_sec'] = results['successful'] / results['total_time'] if results['total_time'] > 0 else 0
+
+        snr = node_snr(iface, target_node_id)
+        if snr is not None:
+            results['snr'] = snr
+
+        with span('transmission.close'):
+            iface.close()
+        return results
+
+    except Exception as e:
+        results['errors'].append(str(e))
+        return results
+    finally:
+        if tracer.enabled:
+            results['phases'] = tracer.phases(mark)
@@ -0,0 +1,244 @@
+"""
+file: file transfer throughput test (a file's worth of ~200 byte messages)
+
+Backs test_file_transfer.py; the results JSON is the same either way.
+"""
+
+import json
+import argparse
+from datetime import datetime
+
+from mesh_trace import tracer, span, enable_tracing, run_profiled, print_phases
+from meshbench.engine import open_interface, find_target, send_loop, airtime_budget, MESSAGE_OVERHEAD, MESSAGE_PAYLOAD
+from meshbench.ping import print_available
+
+
+def generate_test_data(size_bytes):
+    """Generate test data of specified size"""
+    # Generate data in chunks to avoid memory issues
+    chunk_size = MESSAGE_PAYLOAD  # Max message size is ~240 bytes, use 200 for safety
+    chunks = []
+    total = 0
+    size_bytes = int(size_bytes)  # Ensure it's an integer
+
+    while total < size_bytes:
+        remaining = size_bytes - total
+        current_chunk_size = min(chunk_size, int(remaining))
+        chunk = "X" * current_chunk_size
+        chunks.append(chunk)
+        total += current_chunk_size
+
+    return chunks
+
+
+def test_file_transfer(port, target_node, file_size_mb=1, duty_cycle=None, airtime_burst=None):
+    """Test file transfer speed to a target node
+
+    With a duty_cycle (percent, 0 for the region's limit) every message waits
+    for its time on air in the radio's airtime budget, bursting up to
+    airtime_burst seconds of airtime when given.
+    """
+    file_size_bytes = file_size_mb * 1024 * 1024
+
+    print(f"\n{'='*70}")
+    print(f"MESHTASTIC FILE TRANSFER TEST")
+    print(f"{'='*70}")
+    print(f"Port: {port}")
+    print(f"Target Node: {target_node}")
+    print(f"File Size: {file_size_mb} MB ({file_size_bytes:,} bytes)")
+    print(f"{'='*70}\n")
+
+    results = {
+        "port": port,
+        "target_node": target_node,
+        "file_size_mb": file_size_mb,
+        "file_size_bytes": file_size_bytes,
+        "start_time": None,
+        "end_time": None,
+        "total_time": None,
+        "messages_sent": 0,
+        "messages_successful": 0,
+        "messages_failed": 0,
+        "throughput_bps": 0,
+        "throughput_kbps": 0,
+        "throughput_mbps": 0,
+        "messages_per_second": 0,
+        "bytes_per_second": 0,
+        "snr": None,
+        "rssi": None,
+        "channel_utilization": None,
+        "air_util_tx": None,
+        "errors": []
+    }
+
+    mark = tracer.mark()
+    try:
+        # Connect to device
+        print(f"Connecting to device on {port}...")
+        with span('file_transfer.open', port=port):
+            iface = open_interface(port)
+        print("✅ Connected\n")
+
+        # Get node info
+        nodes = iface.nodes
+        print(f"Nodes in mesh: {len(nodes)}")
+
+        # Find target node
+        with span('file_transfer.find_target', query=target_node):
+            index, target_num = find_target(iface, target_node)
+        target_id = None
+        target_name = None
+        if target_num is not None:
+            node = index.get(target_num)
+            target_id = index.node_id(target_num)
+            target_name = index.name(target_num, '')
+            print(f"✅ Found target: {target_name} (Node: {target_id})")
+
+            # Get signal quality metrics
+            if 'snr' in node:
+                results['snr'] = node['snr']
+                print(f"   SNR: {node['snr']:.2f} dB")
+
+            if 'deviceMetrics' in node:
+                metrics = node['deviceMetrics']
+                if 'channelUtilization' in metrics:
+                    results['channel_utilization'] = metrics['channelUtilization']
+                if 'airUtilTx' in metrics:
+                    results['air_util_tx'] = metrics['airUtilTx']
+
+        if not target_id:
+            print(f"❌ Target node '{target_node}' not found in mesh")
+            print_available(iface)
+            iface.close()
+            return None
+
+        # Generate test data
+        print(f"\nGenerating test data ({file_size_mb} MB)...")
+        chunks = generate_test_data(file_size_bytes)
+        num_chunks = len(chunks)
+        print(f"Split into {num_chunks} messages (~200 bytes each)\n")
+
+        # Start transfer
+        print(f"Starting file transfer...")
+        print(f"{'='*70}")
+
+        results['start_time'] = datetime.now().isoformat()
+
+        def show_progress(i):
+            if (i + 1) % 50 == 0 or i == 0:
+                percent = ((i + 1) / num_chunks) * 100
+                print(f"Progress: {percent:.1f}% ({i+1}/{num_chunks} messages)", end="\r", flush=True)
+
+        shown_errors = 0
+
+        def show_error(i, e):
+            nonlocal shown_errors
+            shown_errors += 1
+            if shown_errors <= 5:  # Only show first 5 errors
+                print(f"\n❌ Message {i+1} failed: {e}")
+
+        budget = airtime_budget(iface, port, duty_cycle, airtime_burst) if duty_cycle is not None else None
+        if budget is not None:
+            usage = budget.usage()
+            print(f"Airtime budget: {budget.duty_cycle:g}% duty cycle on {budget.preset}, "
+                  f"{usage['available_s']:.0f}/{budget.capacity:.0f}s available, "
+                  f"{budget.time_on_air(MESSAGE_PAYLOAD) * 1000:.0f}ms per message\n")
+
+        messages = (f"FILE_{i:05d}_{chunk}" for i, chunk in enumerate(chunks))
+        stats = send_loop(iface, target_id, messages, phase='file_transfer',
+                          on_send=show_progress, on_error=show_error, budget=budget)
+        if budget is not None:
+            results['airtime'] = dict(budget.usage(), wait_s=stats['airtime_wait'])
+        successful = stats['successful']
+        failed = stats['failed']
+        results['errors'].extend(stats['errors'])
+
+        results['end_time'] = datetime.now().isoformat()
+        results['total_time'] = stats['total_time']
+
+        print(f"\n{'='*70}")
+        print(f"Transfer complete!")
+        print(f"{'='*70}\n")
+
+        # Calculate statistics
+        results['messages_sent'] = num_chunks
+        results['messages_successful'] = successful
+        results['messages_failed'] = failed
+
+        if successful > 0 and results['total_time'] > 0:
+            # Calculate throughput
+            # Account for message overhead (approximately 50 bytes per message)
+            total_bytes_transferred = (file_size_bytes) + (successful * MESSAGE_OVERHEAD)
+
+            results['throughput_bps'] = (total_bytes_transferred * 8) / results['total_time']
+            results['throughput_kbps'] = results['throughput_bps'] / 1000
+            results['throughput_mbps'] = results['throughput_kbps'] / 1000
+            results['messages_per_second'] = successful / results['total_time']
+            results['bytes_per_second'] = file_size_bytes / results['total_time']
+
+        # Display results
+        print(f"RESULTS:")
+        print(f"  Messages Sent: {results['messages_sent']}")
+        print(f"  Successful: {results['messages_successful']} ({results['messages_successful']/results['messages_sent']*100:.1f}%)")
+        print(f"  Failed: {results['messages_failed']}")
+        print(f"  Total Time: {results['total_time']:.2f} seconds")
+        print(f"  Throughput: {results['throughput_kbps']:.2f} kbps ({results['throughput_mbps']:.4f} Mbps)")
+        print(f"  Messages/sec: {results['messages_per_second']:.2f}")
+        print(f"  Bytes/sec: {results['bytes_per_second']:,.0f}")
+        if results['snr'] is not None:
+            print(f"  SNR: {results['snr']:.2f} dB")
+        if budget is not None:
+            print(f"  Airtime: {results['airtime']['airtime_s']:.1f}s used, {stats['airtime_wait']:.1f}s waited for budget "
+                  f"({results['airtime']['used_percent']:.0f}% of the bucket in use)")
+        print()
+
+        with span('file_transfer.close'):
+            iface.close()
+        return results
+
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        import traceback
+        traceback.print_exc()
+        results['errors'].append(str(e))
+        return results
+    finally:
+        if tracer.enabled:
+            results['phases'] = tracer.phases(mark)
+
+
+def main(argv=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description="Test Meshtastic file transfer speed")
+    parser.add_argument("--port", required=True, help="Serial port (e.g., /dev/cu.usbserial-0001)")
+    parser.add_argument("--target", required=True, help="Target node name or short name")
+    parser.add_argument("--size", type=float, default=1.0, help="File size in MB (default: 1.0)")
+    parser.add_argument("--json", action="store_true", help="Output results as JSON")
+    parser.add_argument("--phases", action="store_true", help="Record per-phase timings (open, node DB sync, serial write, TX queue, ...) into the results")
+    parser.add_argument("--trace", help="Write a Chrome trace-event file of all phases (implies --phases)")
+    parser.add_argument("--profile", nargs="?", const="", help="Run under cProfile, print the top functions and optionally save stats to this file")
+    parser.add_argument("--duty-cycle", type=float, nargs="?", const=0, metavar="PERCENT",
+                        help="Pace sends by the radio's airtime budget (default: the region's limit, 10%% on UA_433)")
+    parser.add_argument("--airtime-burst", type=float, metavar="SECONDS",
+                        help="With --duty-cycle, send at most this much airtime back to back (default: the whole hour's budget)")
+    args = parser.parse_args(argv)
+
+    if args.phases or args.trace:
+        enable_tracing()
+
+    if args.profile is not None:
+        results = run_profiled(test_file_transfer, args.port, args.target, args.size, args.duty_cycle, args.airtime_burst,
+                               dump=args.profile or None)
+    else:
+        results = test_file_transfer(args.port, args.target, args.size, args.duty_cycle, args.airtime_burst)
+
+    if results and results.get('phases'):
+        print("PHASE TIMINGS")
+        print_phases(results['phases'])
+        print()
+    if args.trace:
+        tracer.write_chrome_trace(args.trace)
+        print(f"Trace saved to: {args.trace} (open in chrome://tracing or ui.perfetto.dev)")
+
+    if args.json and results:
+        print(json.dumps(results, indent=2))
+    return 0
@@ -0,0 +1,255 @@
+"""
+pair-matrix: speed test from every connected device to every node it can see
+
+Backs test_all_device_pairs.py; the results JSON is the same either way.
+"""
+
+import json
+import argparse
+from datetime import datetime
+
+from mesh_trace import tracer, enable_tracing, run_profiled, print_phases
+from meshbench.engine import get_device_info, test_transmission, find_serial_ports
+
+
+def discover_devices(ports):
+    """Discover all devices and their connections"""
+    devices = {}
+
+    print("Discovering devices...")
+    print("="*70)
+
+    for port in ports:
+        info = get_device_info(port)
+        if info:
+            devices[port] = info
+            print(f"✅ {port}: {info['name']} ({info['short']})")
+            print(f"   Available nodes: {len(info['nodes'])}")
+            for node_id, node in info['nodes'].items():
+                print(f"      - {node['name']} ({node['short']})")
+        else:
+            print(f"❌ {port}: Failed to connect")
+        print()
+
+    return devices
+
+
+def run_all_tests(devices, message_count=30, duty_cycle=None, ack_timeout=None, airtime_burst=None):
+    """Run tests for all device pairs (paced by each radio's airtime budget with a duty_cycle,
+    counting the destination's ACKs with an ack_timeout)"""
+    all_results = []
+
+    print("="*70)
+    print(f"RUNNING ALL DEVICE PAIR TESTS ({message_count} messages per pair)")
+    print("="*70)
+    print()
+
+    total_tests = sum(len(dev['nodes']) for dev in devices.values())
+    current_test = 0
+
+    for from_port, from_device in devices.items():
+        from_name = from_device['short']
+        print(f"📡 Testing from: {from_device['name']} ({from_name})")
+
+        for target_id, target_node in from_device['nodes'].items():
+            current_test += 1
+            target_name = target_node['short']
+            print(f"   → To: {target_node['name']} ({target_name}) [{current_test}/{total_tests}]... ", end="", flush=True)
+
+            result = test_transmission(from_port, target_id, message_count, duty_cycle, ack_timeout, airtime_burst)
+
+            # Add metadata
+            result['from_name'] = from_name
+            result['from_full_name'] = from_device['name']
+            result['to_name'] = target_name
+            result['to_full_name'] = target_node['name']
+
+            all_results.append(result)
+
+            if result['successful'] > 0:
+                acked = f", {result['acked']} ACKed" if 'acked' in result else ""
+                print(f"✅ {result['throughput_kbps']:.2f} kbps ({result['successful']}/{message_count} success{acked})")
+            else:
+                print(f"❌ Failed")
+
+        print()
+
+    return all_results
+
+
+def print_table(results):
+    """Print results in a formatted table"""
+    print("\n" + "="*100)
+    print("TRANSMISSION SPEED TEST RESULTS")
+    print("="*100)
+    print()
+
+    # Table header
+    print(f"{'From':<15} {'To':<15} {'Success':<10} {'Avg Time':<12} {'Throughput':<15} {'SNR':<10} {'Status':<10}")
+    print("-" * 100)
+
+    for result in results:
+        from_name = result['from_name'][:14]
+        to_name = result['to_name'][:14]
+        success = f"{result['successful']}/{result['message_count']}"
+        avg_time = f"{result['avg_time']*1000:.1f}ms" if result['avg_time'] > 0 else "N/A"
+        throughput = f"{result['throughput_kbps']:.2f} kbps" if result['throughput_kbps'] > 0 else "N/A"
+        snr = f"{result['snr']:.2f} dB" if result['snr'] is not None else "N/A"
+
+        # Status
+        success_rate = (result['successful'] / result['message_count']) * 100 if result['message_count'] > 0 else 0
+        if success_rate >= 95:
+            status = "✅ Excellent"
+        elif success_rate >= 80:
+            status = "⚠️  Good"
+        else:
+            status = "❌ Poor"
+
+        print(f"{from_name:<15} {to_name:<15} {success:<10} {avg_time:<12} {throughput:<15} {snr:<10} {status:<10}")
+
+    print("-" * 100)
+    print()
+
+
+def print_summary_table(results):
+    """Print a summary matrix table"""
+    print("\n" + "="*100)
+    print("TRANSMISSION SPEED MATRIX (kbps)")
+    print("="*100)
+    print()
+
+    # Get unique device names
+    devices = set()
+    for result in results:
+        devices.add(result['from_name'])
+        devices.add(result['to_name'])
+
+    devices = sorted(list(devices))
+
+    # Create matrix
+    matrix = {}
+    for result in results:
+        key = (result['from_name'], result['to_name'])
+        matrix[key] = result['throughput_kbps']
+
+    # Print header
+    header = 'From \\ To'
+    print(f"{header:<15}", end="")
+    for to_dev in devices:
+        print(f"{to_dev[:12]:<13}", end="")
+    print()
+    print("-" * (15 + len(devices) * 13))
+
+    # Print rows
+    for from_dev in devices:
+        print(f"{from_dev[:14]:<15}", end="")
+        for to_dev in devices:
+            if from_dev == to_dev:
+                print(f"{'---':<13}", end="")
+            else:
+                key = (from_dev, to_dev)
+                if key in matrix:
+                    value = matrix[key]
+                    print(f"{value:>6.2f} kbps  ", end="")
+                else:
+                    print(f"{'N/A':<13}", end="")
+        print()
+
+    print()
+
+
+def run(ports, message_count=30, duty_cycle=None, ack_timeout=None, airtime_burst=None):
+    """Discover devices and test every pair; returns (devices, results)"""
+    devices = discover_devices(ports)
+    if not devices:
+        return devices, []
+    return devices, run_all_tests(devices, message_count, duty_cycle, ack_timeout, airtime_burst)
+
+
+def save_json(results, filename, phases=None):
+    """Save results to JSON file"""
+    data = {
+        'timestamp': datetime.now().isoformat(),
+        'results': results
+    }
+    if phases is not None:
+        data['phases'] = phases
+    with open(filename, 'w') as f:
+        json.dump(data, f, indent=2)
+    print(f"Results saved to: {filename}")
+
+
+def main(argv=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description="Test transmission speed between all device pairs")
+    parser.add_argument("--ports", nargs="+", help="Serial ports to test (e.g., /dev/cu.usbserial-0001 /dev/cu.usbserial-4)")
+    parser.add_argument("--count", type=int, default=30, help="Number of messages per test (default: 30)")
+    parser.add_argument("--json", help="Save results to JSON file")
+    parser.add_argument("--phases", action="store_true", help="Record per-phase timings (open, node DB sync, serial write, TX queue, ...) into the results")
+    parser.add_argument("--trace", help="Write a Chrome trace-event file of all phases (implies --phases)")
+    parser.add_argument("--profile", nargs="?", const="", help="Run under cProfile, print the top functions and optionally save stats to this file")
+    parser.add_argument("--duty-cycle", type=float, nargs="?", const=0, metavar="PERCENT",
+                        help="Pace sends by each radio's airtime budget instead of a fixed delay (default: the region's limit, 10%% on UA_433)")
+    parser.add_argument("--airtime-burst", type=float, metavar="SECONDS",
+                        help="With --duty-cycle, send at most this much airtime back to back (default: the whole hour's budget)")
+    parser.add_argument("--ack-timeout", type=float, metavar="SECONDS",
+                        help="Track the destination's ACKs, waiting up to this long after the last send, and report delivery")
+    args = parser.parse_args(argv)
+
+    # Default ports if not specified
+    ports = args.ports or find_serial_ports()
+    if not ports:
+        print("ERROR: No USB serial ports found. Please specify with --ports")
+        return 1
+
+    print("="*70)
+    print("MESHTASTIC ALL-DEVICE-PAIRS SPEED TEST")
+    print("="*70)
+    print(f"Ports: {', '.join(ports)}")
+    print(f"Messages per pair: {args.count}")
+    print()
+
+    if args.phases or args.trace:
+        enable_tracing()
+
+    # Discover devices and run all tests
+    if args.profile is not None:
+        devices, results = run_profiled(run, ports, args.count, args.duty_cycle, args.ack_timeout, args.airtime_burst,
+                                        dump=args.profile or None)
+    else:
+        devices, results = run(ports, args.count, args.duty_cycle, args.ack_timeout, args.airtime_burst)
+
+    if not devices:
+        print("ERROR: No devices found")
+        return 1
+
+    # Print results
+    print_table(results)
+    print_summary_table(results)
+
+    # Calculate statistics
+    if results:
+        total_tests = len(results)
+        successful_tests = len([r for r in results if r['successful'] > 0])
+        avg_throughput = sum(r['throughput_kbps'] for r in results if r['throughput_kbps'] > 0) / successful_tests if successful_tests > 0 else 0
+
+        print("="*100)
+        print("SUMMARY STATISTICS")
+        print("="*100)
+        print(f"Total tests: {total_tests}")
+        print(f"Successful: {successful_tests} ({successful_tests/total_tests*100:.1f}%)")
+        print(f"Average throughput: {avg_throughput:.2f} kbps")
+        print()
+
+    phases = tracer.phases() if tracer.enabled else None
+    if phases:
+        print("PHASE TIMINGS (all tests)")
+        print_phases(phases)
+        print()
+    if args.trace:
+        tracer.write_chrome_trace(args.trace)
+        print(f"Trace saved to: {args.trace} (open in chrome://tracing or ui.perfetto.dev)")
+
+    # Save to JSON if requested
+    if args.json:
+        save_json(results, args.json, phases)
+    return 0
@@ -0,0 +1,182 @@
+"""
+ping / speed: round-trip and message speed tests to one target node
+
+Backs test_mesh_speed.py (speed test by default, --ping for the ping test).
+"""
+
+import argparse
+
+from meshbench.engine import open_interface, find_target, send_loop, is_own_node, MESSAGE_OVERHEAD
+
+
+def print_mesh(iface):
+    nodes = iface.nodes
+    print(f"Nodes in mesh: {len(nodes)}")
+    for node_id, node in nodes.items():
+        if is_own_node(iface, node):
+            print(f"  - Self: {node.get('user', {}).get('longName', 'Unknown')}")
+        else:
+            print(f"  - {node.get('user', {}).get('longName', 'Unknown')} (Node: {node_id})")
+    print()
+
+
+def print_available(iface):
+    print("Available nodes:")
+    for node_id, node in iface.nodes.items():
+        if not is_own_node(iface, node):
+            print(f"  - {node.get('user', {}).get('longName', 'Unknown')}")
+
+
+def test_message_speed(port, target_node, message_count=10, message_size=100):
+    """Test message transmission speed to a target node"""
+    print(f"\n{'='*60}")
+    print(f"MESHTASTIC SPEED TEST")
+    print(f"{'='*60}")
+    print(f"Port: {port}")
+    print(f"Target Node: {target_node}")
+    print(f"Messages: {message_count}")
+    print(f"Message Size: {message_size} bytes")
+    print(f"{'='*60}\n")
+
+    try:
+        # Connect to device
+        print(f"Connecting to device on {port}...")
+        iface = open_interface(port)
+        print("✅ Connected\n")
+
+        print_mesh(iface)
+
+        # Find target node
+        index, target_num = find_target(iface, target_node)
+        target_id = None
+        if target_num is not None:
+            target_id = index.node_id(target_num)
+            print(f"✅ Found target: {index.name(target_num, '')} (Node: {target_id})")
+
+        if not target_id:
+            print(f"❌ Target node '{target_node}' not found in mesh")
+            print_available(iface)
+            iface.close()
+            return False
+
+        # Generate test message
+        test_data = "X" * message_size
+        test_message = f"SPEED_TEST_{test_data}"
+
+        print(f"\nStarting speed test...")
+        print(f"Sending {message_count} messages of {message_size} bytes each...\n")
+
+        # Note: sendText returns once the packet is queued - real ACK
+        # waiting would need async handling
+        stats = send_loop(
+            iface, target_id,
+            (f"TEST_{i:03d}_{test_message}" for i in range(message_count)),
+            delay=0.5, phase='speed',
+            on_send=lambda i: print(f"Sending message {i+1}/{message_count}...", end=" ", flush=True),
+            on_sent=lambda i, elapsed: print(f"✅ {elapsed:.3f}s"),
+            on_error=lambda i, e: print(f"❌ Failed: {e}"))
+        successful = stats['successful']
+        times = stats['times']
+
+        # Calculate statistics
+        print(f"\n{'='*60}")
+        print(f"TEST RESULTS")
+        print(f"{'='*60}")
+        print(f"Total Messages: {message_count}")
+        print(f"Successful: {successful}")
+        print(f"Failed: {stats['failed']}")
+        print(f"Success Rate: {(successful/message_count)*100:.1f}%")
+
+        if successful > 0:
+            avg_time = times.mean()
+
+            # Calculate throughput (bits per second) from the average
+            # message time, including the per-message overhead
+            effective_size = message_size + MESSAGE_OVERHEAD
+            throughput = (effective_size * 8) / avg_time
+
+            print(f"\nTiming Statistics:")
+            print(f"  Average: {avg_time:.3f} seconds")
+            print(f"  Minimum: {times.min():.3f} seconds")
+            print(f"  Maximum: {times.max():.3f} seconds")
+            print(f"\nThroughput:")
+            print(f"  Data Rate: {throughput:.2f} bps ({throughput/1000:.2f} kbps)")
+            print(f"  Messages/sec: {1/avg_time:.2f}")
+            print(f"  Bytes/sec: {effective_size/avg_time:.2f}")
+
+        print(f"{'='*60}\n")
+
+        iface.close()
+        return True
+
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        return False
+
+
+def test_ping(port, target_node, count=5):
+    """Simple ping test - send message and measure round-trip time"""
+    print(f"\n{'='*60}")
+    print(f"MESHTASTIC PING TEST")
+    print(f"{'='*60}")
+    print(f"Port: {port}")
+    print(f"Target: {target_node}")
+    print(f"Pings: {count}")
+    print(f"{'='*60}\n")
+
+    try:
+        iface = open_interface(port)
+
+        # Find target (by long name, short name or !hex id)
+        index, target_num = find_target(iface, target_node)
+        target_id = index.node_id(target_num) if target_num is not None else None
+
+        if not target_id:
+            print(f"❌ Target not found")
+            iface.close()
+            return
+
+        stats = send_loop(
+            iface, target_id, (f"PING_{i}" for i in range(count)), delay=1, phase='ping',
+            on_sent=lambda i, elapsed: print(f"Ping {i+1}: {elapsed:.3f}s"),
+            on_error=lambda i, e: print(f"Ping {i+1}: Failed - {e}"))
+
+        times = stats['times']
+        if times:
+            print(f"\nAverage: {times.mean():.3f}s")
+            print(f"Min: {times.min():.3f}s")
+            print(f"Max: {times.max():.3f}s")
+
+        iface.close()
+
+    except Exception as e:
+        print(f"❌ Error: {e}")
+
+
+def add_target_args(parser, count_default, count_help):
+    parser.add_argument("--port", required=True, help="Serial port (e.g., /dev/cu.usbserial-0001)")
+    parser.add_argument("--target", required=True, help="Target node name or short name")
+    parser.add_argument("--count", type=int, default=count_default, help=count_help)
+
+
+def main(argv=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description="Ping a Meshtastic node")
+    add_target_args(parser, 5, "Number of pings (default: 5)")
+    args = parser.parse_args(argv)
+
+    test_ping(args.port, args.target, args.count)
+    return 0
+
+
+def speed_main(argv=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description="Test Meshtastic mesh speed")
+    add_target_args(parser, 10, "Number of test messages (default: 10)")
+    parser.add_argument("--size", type=int, default=100, help="Message size in bytes (default: 100)")
+    parser.add_argument("--ping", action="store_true", help="Run ping test instead of speed test")
+    args = parser.parse_args(argv)
+
+    if args.ping:
+        test_ping(args.port, args.target, args.count)
+    else:
+        test_message_speed(args.port, args.target, args.count, args.size)
+    return 0
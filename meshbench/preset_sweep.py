@@ -0,0 +1,223 @@
+"""
+sweep: run the pair matrix under each modem preset in turn
+
+For every preset in the list, every attached node (the USB serial devices,
+plus any repeater_net inventory nodes given with --nodes, e.g. a TCP-reached
+repeater) is switched in one edit-settings transaction each
+(repeater_net/apply_config.py), all nodes at once. The sweep waits for the
+nodes to come back, lets the mesh settle and runs the pair matrix with ACK
+tracking, then tabulates delivered throughput, ACK latency and loss per
+preset. Delivery is counted from the destination's ACKs, since sendText
+returns once a packet is queued, and the sends are paced by each radio's
+airtime budget so that slow presets are not judged by a full TX queue. It
+picks the fastest preset under which every link seen in the sweep still
+delivers. At the end, even after Ctrl+C or an error, every node gets its
+original preset back, or the chosen one with --apply-best.
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+from lora_radio import MODEM_PRESETS, bitrate_bps
+from meshbench.engine import find_serial_ports
+from meshbench.pair_matrix import run, print_table
+from meshbench.stats import percentile
+
+REPEATER_NET = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'repeater_net')
+
+DEFAULT_PRESETS = ['SHORT_TURBO', 'SHORT_FAST', 'SHORT_SLOW', 'MEDIUM_FAST', 'LONG_FAST']
+
+
+def _repeater_net():
+    """apply_config, mesh_nodes and rollout from repeater_net/, imported on first use"""
+    if REPEATER_NET not in sys.path:
+        sys.path.insert(0, REPEATER_NET)
+    import apply_config
+    import mesh_nodes
+    import rollout
+    return apply_config, mesh_nodes, rollout
+
+
+def sweep_nodes(ports, inventory_names=None, inventory=None):
+    """Node entries (apply_config form) for the serial ports and the named inventory nodes"""
+    nodes = [{'name': port, 'port': port} for port in ports]
+    if inventory_names:
+        _, mesh_nodes, _ = _repeater_net()
+        found = mesh_nodes.load_nodes(inventory, inventory_names)
+        missing = set(inventory_names) - {n['name'] for n in found}
+        if missing:
+            raise ValueError(f"Not in the inventory: {', '.join(sorted(missing))}")
+        # A node given both ways is only configured once, over its serial port
+        nodes += [dict(n) for n in found if n.get('host') or n.get('port') not in ports]
+    return nodes
+
+
+def configure_all(nodes, specs, timeout=90, settle=8):
+    """Apply specs[i] to nodes[i], all nodes concurrently and one transaction each
+
+    The node's own profile is ignored, only the given settings change.
+    """
+    apply_config, _, _ = _repeater_net()
+    with ThreadPoolExecutor(max_workers=max(1, len(nodes))) as pool:
+        futures = [pool.submit(apply_config.apply_node, dict(node, profile=None, config=spec), {},
+                               False, True, timeout, settle) for node, spec in zip(nodes, specs)]
+        return [future.result() for future in futures]
+
+
+def preset_spec(preset):
+    return {'lora': {'use_preset': True, 'modem_preset': preset}}
+
+
+def summarize_preset(preset, results, expected_links):
+    """Delivered throughput, ACK latency and loss of one preset's pair matrix results"""
+    sent = sum(r.get('message_count', 0) for r in results)
+    delivered = sum(r.get('acked', 0) for r in results)
+    closed = {(r['from_name'], r['to_name']) for r in results if r.get('acked', 0) > 0}
+    times = sorted(t for r in results for t in (r.get('ack_times') or []))
+    throughputs = [r['delivered_kbps'] for r in results if r.get('delivered_kbps', 0) > 0]
+    return {
+        'preset': preset,
+        'bitrate_kbps': round(bitrate_bps(preset) / 1000, 2),
+        'links_tested': len(results),
+        'links_closed': len(closed & expected_links),
+        'links_expected': len(expected_links),
+        'open_links': sorted(f"{a}->{b}" for a, b in expected_links - closed),
+        'loss_percent': (1 - delivered / sent) * 100 if sent else None,
+        'avg_throughput_kbps': sum(throughputs) / len(throughputs) if throughputs else 0,
+        'p50_ms': percentile(times, 0.5) * 1000 if times else None,
+        'p95_ms': percentile(times, 0.95) * 1000 if times else None,
+    }
+
+
+def choose_preset(summaries, max_loss):
+    """The highest-throughput preset that closes every expected link within max_loss percent"""
+    good = [s for s in summaries
+            if s['links_expected'] and s['links_closed'] == s['links_expected']
+            and s['loss_percent'] is not None and s['loss_percent'] <= max_loss]
+    return max(good, key=lambda s: s['avg_throughput_kbps'])['preset'] if good else None
+
+
+def print_sweep_table(summaries, best):
+    print("\n" + "="*100)
+    print("MODEM PRESET SWEEP")
+    print("="*100)
+    print(f"{'Preset':<15} {'Raw kbps':>9} {'Links':>8} {'Loss':>7} {'ACK p50':>9} {'ACK p95':>9} {'Delivered':>12}")
+    print("-" * 100)
+    for s in summaries:
+        loss = f"{s['loss_percent']:.1f}%" if s['loss_percent'] is not None else "N/A"
+        p50 = f"{s['p50_ms']:.0f}ms" if s['p50_ms'] is not None else "N/A"
+        p95 = f"{s['p95_ms']:.0f}ms" if s['p95_ms'] is not None else "N/A"
+        mark = "  ⭐" if s['preset'] == best else ""
+        print(f"{s['preset']:<15} {s['bitrate_kbps']:>9.2f} {s['links_closed']:>3}/{s['links_expected']:<4} {loss:>7} "
+              f"{p50:>9} {p95:>9} {s['avg_throughput_kbps']:>7.2f} kbps{mark}")
+        if s['open_links']:
+            print(f"{'':<15} not closing: {', '.join(s['open_links'])}")
+    print("-" * 100)
+    if best:
+        print(f"Fastest preset closing every link: {best}")
+    else:
+        print("No preset closed every link")
+    print()
+
+
+def main(argv=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description="Run the pair matrix under each modem preset and pick the fastest that closes every link")
+    parser.add_argument("--presets", nargs="+", default=DEFAULT_PRESETS, choices=sorted(MODEM_PRESETS), metavar="PRESET",
+                        help=f"Presets to sweep, in order (default: {' '.join(DEFAULT_PRESETS)})")
+    parser.add_argument("--ports", nargs="+", help="Serial ports (default: all detected)")
+    parser.add_argument("--nodes", nargs="+", metavar="NAME", help="repeater_net inventory nodes to switch as well (e.g. a TCP repeater)")
+    parser.add_argument("--inventory", help="Node inventory file (default: repeater_net/nodes.json)")
+    parser.add_argument("--count", type=int, default=30, help="Messages per pair (default: 30)")
+    parser.add_argument("--settle", type=float, default=30, help="Seconds for the mesh to re-form after the reboots (default: 30)")
+    parser.add_argument("--timeout", type=float, default=90, help="Seconds to wait for a node after its reboot (default: 90)")
+    parser.add_argument("--ack-timeout", type=float, default=30, help="Seconds to wait for the last ACKs of each pair (default: 30)")
+    parser.add_argument("--duty-cycle", type=float, default=0, metavar="PERCENT",
+                        help="Pace each pair's sends by the radio's airtime budget at this duty cycle (default: 0, the region's limit)")
+    parser.add_argument("--max-loss", type=float, default=5.0, help="Loss in percent a preset may have and still count (default: 5)")
+    parser.add_argument("--apply-best", action="store_true", help="Leave the nodes on the chosen preset instead of their original one")
+    parser.add_argument("--dry-run", action="store_true", help="Only show the plan")
+    parser.add_argument("--json", help="Save every preset's results and the summary to this JSON file")
+    args = parser.parse_args(argv)
+
+    ports = args.ports or find_serial_ports()
+    if not ports:
+        print("ERROR: No USB serial ports found. Please specify with --ports")
+        return 1
+    try:
+        nodes = sweep_nodes(ports, args.nodes, args.inventory)
+    except (OSError, ValueError) as e:
+        print(f"ERROR: {e}")
+        return 1
+
+    print("="*70)
+    print("MESHTASTIC MODEM PRESET SWEEP")
+    print("="*70)
+    print(f"Presets: {', '.join(args.presets)}")
+    print(f"Nodes: {', '.join(n['name'] for n in nodes)}")
+    print(f"Messages per pair: {args.count}")
+    print()
+    if args.dry_run:
+        for preset in args.presets:
+            print(f"{preset}: switch {len(nodes)} nodes, wait {args.settle:g}s, pair matrix")
+        return 0
+
+    _, _, rollout = _repeater_net()
+    originals = {}
+    runs = []
+    summaries = []
+    best = None
+    try:
+        for preset in args.presets:
+            print("="*70)
+            print(f"PRESET {preset}")
+            print("="*70)
+            t = time.time()
+            configured = configure_all(nodes, [preset_spec(preset)] * len(nodes), args.timeout)
+            failed = [c for c in configured if c['error'] or c['verified'] is False]
+            for node, result in zip(nodes, configured):
+                # The first real change records what the node had before the sweep
+                if node['name'] not in originals and result['changes'] and result['applied']:
+                    originals[node['name']] = rollout.rollback_spec(result['changes'])
+                state = "❌ " + (result['error'] or "not verified") if result in failed else "✅"
+                print(f"   {state} {node['name']}: {len(result['changes'])} settings in {result['timings'].get('total_s', 0):.1f}s")
+            if failed:
+                print(f"⚠️  Skipping {preset}: {len(failed)} node(s) could not be switched")
+                runs.append({'preset': preset, 'configure': configured, 'results': [], 'error': 'configure failed'})
+                continue
+            print(f"Switched in {time.time() - t:.1f}s, waiting {args.settle:g}s for the mesh to re-form...")
+            time.sleep(args.settle)
+
+            # Paced by airtime: slow presets must not lose packets to a full TX queue
+            devices, results = run(ports, args.count, args.duty_cycle, args.ack_timeout)
+            if results:
+                print_table(results)
+            runs.append({'preset': preset, 'configure': configured, 'results': results})
+
+        # Every link any preset saw is expected to close under the chosen one
+        expected = {(r['from_name'], r['to_name']) for run_ in runs for r in run_['results']}
+        summaries = [summarize_preset(r['preset'], r['results'], expected) for r in runs]
+        best = choose_preset(summaries, args.max_loss)
+        print_sweep_table(summaries, best)
+    finally:
+        # Also after Ctrl+C or an error: a partly switched fleet cannot talk to itself
+        if args.apply_best and best:
+            print(f"Switching every node to {best}...")
+            finals = configure_all(nodes, [preset_spec(best)] * len(nodes), args.timeout)
+        else:
+            print("Restoring the original settings...")
+            changed = [node for node in nodes if node['name'] in originals]
+            finals = configure_all(changed, [originals[node['name']] for node in changed], args.timeout)
+        for result in finals:
+            print(f"   {'❌ ' + result['error'] if result['error'] else '✅'} {result['node']}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'timestamp': datetime.now().isoformat(), 'best': best, 'summary': summaries,
+                       'runs': runs}, f, indent=2)
+        print(f"Results saved to: {args.json}")
+    return 0 if best else 1
@@ -0,0 +1,78 @@
+"""
+Offline statistics over speed test result files
+
+Reads the JSON written by test_all_device_pairs.py / test_mesh_speed.py
+({"timestamp": ..., "results": [...]}) or a single result object and prints
+per-pair success rate, latency percentiles and throughput. Standard library
+only, so it starts without loading any radio modules.
+"""
+
+import json
+import argparse
+
+
+def percentile(ordered, q):
+    """Linear-interpolated percentile of an already sorted list"""
+    if not ordered:
+        return None
+    pos = (len(ordered) - 1) * q
+    low = int(pos)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (pos - low)
+
+
+def load_results(paths):
+    results = []
+    for path in paths:
+        with open(path, 'r') as f:
+            data = json.load(f)
+        if isinstance(data, dict) and isinstance(data.get('results'), list):
+            results.extend(data['results'])
+        elif isinstance(data, list):
+            results.extend(data)
+        elif isinstance(data, dict):
+            results.append(data)
+    return results
+
+
+def summarize(result):
+    times = sorted(result.get('times') or [])
+    successful = result.get('successful', result.get('messages_successful', 0))
+    failed = result.get('failed', result.get('messages_failed', 0))
+    total = successful + failed
+    return {
+        'from': result.get('from_name') or result.get('port'),
+        'to': result.get('to_name') or result.get('target_node') or result.get('target_id'),
+        'sent': total,
+        'success_rate': successful / total if total else None,
+        'p50_ms': percentile(times, 0.5) * 1000 if times else None,
+        'p95_ms': percentile(times, 0.95) * 1000 if times else None,
+        'max_ms': times[-1] * 1000 if times else None,
+        'throughput_kbps': result.get('throughput_kbps'),
+        'snr': result.get('snr')
+    }
+
+
+def fmt(value, spec):
+    return format(value, spec) if value is not None else "N/A"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="meshbench stats", description="Summarize speed test result files")
+    parser.add_argument("files", nargs="+", help="Result JSON files")
+    parser.add_argument("--json", action="store_true", help="Output the summary as JSON")
+    args = parser.parse_args(argv)
+
+    rows = [summarize(r) for r in load_results(args.files)]
+    if args.json:
+        print(json.dumps(rows, indent=2))
+        return 0
+
+    print(f"{'From':<12} {'To':<12} {'Sent':>5} {'Success':>8} {'p50':>9} {'p95':>9} {'Max':>9} {'kbps':>7} {'SNR':>7}")
+    print("-" * 86)
+    for row in rows:
+        rate = f"{row['success_rate']*100:.1f}%" if row['success_rate'] is not None else "N/A"
+        print(f"{str(row['from'])[:11]:<12} {str(row['to'])[:11]:<12} {row['sent']:>5} {rate:>8} "
+              f"{fmt(row['p50_ms'], '.1f'):>7}ms {fmt(row['p95_ms'], '.1f'):>7}ms {fmt(row['max_ms'], '.1f'):>7}ms "
+              f"{fmt(row['throughput_kbps'], '.2f'):>7} {fmt(row['snr'], '.2f'):>7}")
+    return 0
@@ -0,0 +1,183 @@
+"""
+two: detect two USB devices and speed test from the first to the second
+
+Backs test_two_devices.py.
+"""
+
+import argparse
+
+from meshbench.engine import (find_serial_ports, open_interface, get_device_info, send_loop, is_own_node,
+                              BYTES_PER_MESSAGE, MESSAGE_PAYLOAD)
+
+
+def find_target_node_id(port, target_device_id):
+    """Find target node ID by matching device ID"""
+    try:
+        iface = open_interface(port)
+
+        # Convert target device ID to hex format (like !9ee87284)
+        target_hex = f"!{target_device_id:08x}"
+
+        # Look for the target device ID in the nodes list
+        for node_id, node in iface.nodes.items():
+            if is_own_node(iface, node):
+                continue
+            # Check if this node matches the target device ID
+            # Node IDs are stored as strings like "!9ee87284"
+            if str(node_id) == target_hex or str(node_id) == str(target_device_id):
+                iface.close()
+                return node_id
+
+        iface.close()
+        return None
+    except Exception as e:
+        print(f"Error in find_target_node_id: {e}")
+        return None
+
+
+def test_speed(port, target_node_id, message_count=30):
+    """Test transmission speed to a target node
+
+    Unlike pair-matrix, throughput here is over the summed send times, so
+    the delay between messages is not counted.
+    """
+    try:
+        iface = open_interface(port)
+
+        test_message = "X" * MESSAGE_PAYLOAD
+        stats = send_loop(iface, target_node_id,
+                          (f"TEST_{i:03d}_{test_message}" for i in range(message_count)),
+                          delay=0.1, phase='two')
+
+        iface.close()
+
+        successful = stats['successful']
+        times = stats['times']
+        if times:
+            total_time = sum(times)
+            throughput_kbps = (successful * BYTES_PER_MESSAGE * 8) / total_time / 1000 if total_time > 0 else 0
+
+            return {
+                'successful': successful,
+                'failed': stats['failed'],
+                'avg_time': times.mean(),
+                'min_time': times.min(),
+                'max_time': times.max(),
+                'throughput_kbps': throughput_kbps,
+                'messages_per_sec': successful / total_time if total_time > 0 else 0
+            }
+        else:
+            return {
+                'successful': 0,
+                'failed': stats['failed'],
+                'avg_time': 0,
+                'min_time': 0,
+                'max_time': 0,
+                'throughput_kbps': 0,
+                'messages_per_sec': 0
+            }
+    except Exception as e:
+        return {
+            'successful': 0,
+            'failed': message_count,
+            'error': str(e)
+        }
+
+
+def main(argv=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description="Automatically detect two USB serial devices and test speed between them")
+    parser.add_argument("--count", type=int, default=30, help="Number of test messages (default: 30)")
+    args = parser.parse_args(argv)
+    count = args.count
+
+    # Auto-detect USB serial ports
+    ports = find_serial_ports()
+
+    if len(ports) < 2:
+        print("ERROR: Need at least 2 USB serial devices connected")
+        print(f"Found {len(ports)} device(s)")
+        return 1
+
+    print("="*70)
+    print("AUTOMATIC TWO-DEVICE SPEED TEST")
+    print("="*70)
+    print()
+
+    # Get info for all devices
+    devices = []
+    for port in ports[:2]:  # Use first 2 devices
+        info = get_device_info(port, report_errors=False)
+        if info:
+            devices.append(info)
+            print(f"✅ Device on {port}:")
+            print(f"   Name: {info['name']} ({info['short']})")
+            print(f"   Node ID: {info['id']}")
+            print()
+
+    if len(devices) < 2:
+        print("ERROR: Could not connect to 2 devices")
+        return 1
+
+    device1 = devices[0]
+    device2 = devices[1]
+
+    # Get node names from connected nodes if available
+    device1_name = device1['short']
+    device2_name = device2['short']
+
+    # Try to get better names from nodes list
+    for node_id, node in device1['nodes'].items():
+        if str(node_id) == str(device1['id']) or node_id == device1['id']:
+            device1_name = node.get('short', device1_name)
+            break
+
+    for node_id, node in device2['nodes'].items():
+        if str(node_id) == str(device2['id']) or node_id == device2['id']:
+            device2_name = node.get('short', device2_name)
+            break
+
+    # Also check if device2 is visible from device1's perspective
+    for node_id, node in device1['nodes'].items():
+        if str(node_id) == str(device2['id']) or node_id == device2['id']:
+            device2_name = node.get('short', f"Node {device2['id']}")
+            break
+
+    print(f"Testing from: {device1_name} (Node ID: {device1['id']})")
+    print(f"         to:   {device2_name} (Node ID: {device2['id']})")
+    print()
+
+    # Find target node ID by matching device2's ID
+    target_id = find_target_node_id(device1['port'], device2['id'])
+
+    if not target_id:
+        print(f"❌ Could not find target node (ID: {device2['id']}) from {device1['port']}")
+        print(f"Available nodes from {device1['port']}:")
+        for node_id, node in device1['nodes'].items():
+            print(f"  - {node.get('name', 'Unknown')} ({node.get('short', 'Unknown')}) - ID: {node_id}")
+        return 1
+
+    print(f"Starting speed test ({count} messages)...")
+    print("(This may take a few moments...)\n")
+
+    result = test_speed(device1['port'], target_id, count)
+
+    print("="*70)
+    print("TEST RESULTS")
+    print("="*70)
+    print(f"From: {device1_name} (Node ID: {device1['id']})")
+    print(f"To:   {device2_name} (Node ID: {device2['id']})")
+    print()
+    print(f"Successful: {result['successful']}/{count}")
+    print(f"Failed: {result['failed']}/{count}")
+
+    if result['successful'] > 0:
+        print(f"Average time: {result['avg_time']*1000:.1f} ms")
+        print(f"Min/Max time: {result['min_time']*1000:.1f} ms / {result['max_time']*1000:.1f} ms")
+        print(f"Throughput: {result['throughput_kbps']:.2f} kbps")
+        print(f"Messages/sec: {result['messages_per_sec']:.2f}")
+    else:
+        if 'error' in result:
+            print(f"Error: {result['error']}")
+
+    print("="*70)
+    return 0
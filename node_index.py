@@ -0,0 +1,393 @@
+#!/usr/bin/env python3
+"""
+Meshtastic Node Index
+Builds O(1) lookup tables over an interface's node database (by node number,
+!hex id and lowercased short/long name, plus a name prefix trie), keeps them
+updated from NODEINFO packets and snapshots/diffs the node list between runs
+
+Usage:
+    python3 node_index.py --port /dev/cu.usbserial-0001
+    python3 node_index.py --port /dev/cu.usbserial-0001 --snapshot nodes_snapshot.json
+"""
+
+import sys
+import json
+import argparse
+from datetime import datetime
+
+
+def node_num_to_id(num):
+    """Convert a node number to the !hex id form (e.g. !9ee87284)"""
+    return f"!{num:08x}"
+
+
+def node_id_to_num(node_id):
+    """Convert a !hex id to a node number, None if it is not one"""
+    if isinstance(node_id, int):
+        return node_id
+    text = str(node_id).strip()
+    if text.startswith('!'):
+        text = text[1:]
+    else:
+        return int(text) if text.isdigit() else None
+    try:
+        return int(text, 16)
+    except ValueError:
+        return None
+
+
+class NameTrie:
+    """Prefix trie over lowercased names, each level keeps the node numbers below it"""
+
+    def __init__(self):
+        self.root = {'nums': set(), 'children': {}}
+
+    def insert(self, name, num):
+        level = self.root
+        level['nums'].add(num)
+        for ch in name:
+            level = level['children'].setdefault(ch, {'nums': set(), 'children': {}})
+            level['nums'].add(num)
+
+    def remove(self, name, num):
+        level = self.root
+        path = [level]
+        for ch in name:
+            level = level['children'].get(ch)
+            if level is None:
+                return
+            path.append(level)
+        # Callers remove every name of a node together, so shared prefixes are safe
+        for level in path:
+            level['nums'].discard(num)
+
+    def prefix(self, prefix):
+        """Return the set of node numbers having a name that starts with prefix"""
+        level = self.root
+        for ch in prefix:
+            level = level['children'].get(ch)
+            if level is None:
+                return set()
+        return level['nums']
+
+
+class NodeIndex:
+    """Node database index with O(1) lookups by number, !hex id and name"""
+
+    def __init__(self, my_node_num=None):
+        self.my_node_num = my_node_num
+        self.by_num = {}
+        self.by_id = {}
+        self.by_name = {}
+        self.trie = NameTrie()
+        self._names = {}
+        self._iface = None
+
+    @classmethod
+    def from_interface(cls, iface, subscribe=True):
+        """Build the index once from an open interface
+
+        With subscribe=True the index keeps itself current from NODEINFO
+        packets received on that interface.
+        """
+        my_node_num = None
+        try:
+            my_node_num = iface.myInfo.my_node_num
+        except AttributeError:
+            pass
+
+        index = cls(my_node_num)
+        for node in (iface.nodes or {}).values():
+            index.update_node(node)
+
+        if subscribe:
+            index.attach(iface)
+        return index
+
+    @classmethod
+    def from_snapshot(cls, snapshot):
+        """Rebuild an index from a snapshot() dictionary"""
+        index = cls(snapshot.get('my_node_num'))
+        for entry in snapshot.get('nodes', {}).values():
+            index.update_node({
+                'num': entry['num'],
+                'user': {
+                    'id': entry.get('id'),
+                    'longName': entry.get('long_name', ''),
+                    'shortName': entry.get('short_name', '')
+                },
+                'snr': entry.get('snr')
+            })
+        return index
+
+    def attach(self, iface):
+        """Subscribe to NODEINFO packets from iface to update incrementally"""
+        from pubsub import pub
+
+        self._iface = iface
+        pub.subscribe(self._on_nodeinfo, "meshtastic.receive.user")
+
+    def detach(self):
+        """Stop receiving NODEINFO updates"""
+        if self._iface is None:
+            return
+        from pubsub import pub
+
+        pub.unsubscribe(self._on_nodeinfo, "meshtastic.receive.user")
+        self._iface = None
+
+    def _on_nodeinfo(self, packet, interface):
+        if interface is self._iface:
+            self.update_from_packet(packet)
+
+    def update_from_packet(self, packet):
+        """Apply a received NODEINFO packet (meshtastic packet dictionary)"""
+        user = packet.get('decoded', {}).get('user')
+        num = packet.get('from')
+        if not user or num is None:
+            return
+        node = dict(self.by_num.get(num, {}))
+        node['num'] = num
+        node['user'] = user
+        if 'rxSnr' in packet:
+            node['snr'] = packet['rxSnr']
+        self.update_node(node)
+
+    def update_node(self, node):
+        """Insert or refresh a node (a value from iface.nodes)"""
+        user = node.get('user', {})
+        num = node.get('num')
+        if num is None:
+            num = node_id_to_num(user.get('id', ''))
+        if num is None:
+            return
+
+        node_id = user.get('id') or node_num_to_id(num)
+        old = self.by_num.get(num)
+        if old is not None:
+            self._unindex_names(num)
+            old_id = old.get('user', {}).get('id')
+            if old_id and old_id != node_id:
+                self.by_id.pop(old_id, None)
+
+        self.by_num[num] = node
+        self.by_id[node_id] = num
+
+        names = set()
+        for key in ('longName', 'shortName'):
+            name = user.get(key)
+            if name:
+                names.add(name.lower())
+        for name in names:
+            self.by_name.setdefault(name, set()).add(num)
+            self.trie.insert(name, num)
+        self._names[num] = names
+
+    def remove_node(self, num):
+        """Drop a node from the index"""
+        node = self.by_num.pop(num, None)
+        if node is None:
+            return
+        self._unindex_names(num)
+        node_id = node.get('user', {}).get('id') or node_num_to_id(num)
+        self.by_id.pop(node_id, None)
+
+    def _unindex_names(self, num):
+        for name in self._names.pop(num, ()):
+            nums = self.by_name.get(name)
+            if nums is not None:
+                nums.discard(num)
+                if not nums:
+                    del self.by_name[name]
+            self.trie.remove(name, num)
+
+    def __len__(self):
+        return len(self.by_num)
+
+    def __contains__(self, num):
+        return num in self.by_num
+
+    def get(self, num):
+        """Return the node dictionary for a node number"""
+        return self.by_num.get(num)
+
+    def lookup(self, key):
+        """Exact lookup by node number, !hex id or (case-insensitive) name
+
+        Returns the node number or None.
+        """
+        if isinstance(key, int):
+            return key if key in self.by_num else None
+
+        text = str(key).strip()
+        if text in self.by_id:
+            return self.by_id[text]
+
+        num = node_id_to_num(text)
+        if num is not None and num in self.by_num:
+            return num
+
+        nums = self.by_name.get(text.lower())
+        if nums:
+            return self._pick(nums)
+        return None
+
+    def find(self, query, include_self=False):
+        """Resolve a user-supplied target to a node number
+
+        Tries an exact id/number/name match, then a name prefix match, then
+        falls back to the substring match the test scripts always used.
+        """
+        exclude = None if include_self else self.my_node_num
+
+        num = self.lookup(query)
+        if num is not None and num != exclude:
+            return num
+
+        text = str(query).strip().lower()
+        if not text:
+            return None
+
+        nums = self.trie.prefix(text) - {exclude}
+        if nums:
+            return self._pick(nums)
+
+        for num, names in self._names.items():
+            if num == exclude:
+                continue
+            if any(text in name for name in names):
+                return num
+        return None
+
+    def _pick(self, nums):
+        """Deterministic choice between several nodes sharing a name"""
+        if len(nums) == 1:
+            return next(iter(nums))
+        return min(nums)
+
+    def name(self, num, default='Unknown'):
+        """Long name of a node"""
+        node = self.by_num.get(num)
+        if node is None:
+            return default
+        return node.get('user', {}).get('longName', default) or default
+
+    def short_name(self, num, default='Unknown'):
+        """Short name of a node"""
+        node = self.by_num.get(num)
+        if node is None:
+            return default
+        return node.get('user', {}).get('shortName', default) or default
+
+    def node_id(self, num):
+        """!hex id of a node"""
+        node = self.by_num.get(num)
+        if node is not None and node.get('user', {}).get('id'):
+            return node['user']['id']
+        return node_num_to_id(num)
+
+    def others(self):
+        """Iterate (num, node) over every node except the local one"""
+        for num, node in self.by_num.items():
+            if num != self.my_node_num:
+                yield num, node
+
+    def snapshot(self):
+        """JSON-serializable view of the indexed nodes"""
+        nodes = {}
+        for num, node in self.by_num.items():
+            user = node.get('user', {})
+            nodes[self.node_id(num)] = {
+                'num': num,
+                'id': self.node_id(num),
+                'long_name': user.get('longName', ''),
+                'short_name': user.get('shortName', ''),
+                'snr': node.get('snr'),
+                'last_heard': node.get('lastHeard')
+            }
+        return {
+            'timestamp': datetime.now().isoformat(),
+            'my_node_num': self.my_node_num,
+            'nodes': nodes
+        }
+
+
+def diff_snapshots(old, new):
+    """Compare two snapshots, returning appeared/disappeared/renamed nodes"""
+    old_nodes = old.get('nodes', {})
+    new_nodes = new.get('nodes', {})
+
+    appeared = [new_nodes[k] for k in sorted(new_nodes.keys() - old_nodes.keys())]
+    disappeared = [old_nodes[k] for k in sorted(old_nodes.keys() - new_nodes.keys())]
+
+    renamed = []
+    for key in sorted(old_nodes.keys() & new_nodes.keys()):
+        before = old_nodes[key]
+        after = new_nodes[key]
+        if (before.get('long_name'), before.get('short_name')) != (after.get('long_name'), after.get('short_name')):
+            renamed.append({'id': key, 'before': before, 'after': after})
+
+    return {
+        'from': old.get('timestamp'),
+        'to': new.get('timestamp'),
+        'appeared': appeared,
+        'disappeared': disappeared,
+        'renamed': renamed
+    }
+
+
+def print_diff(diff):
+    """Print a snapshot diff"""
+    print(f"Changes since {diff['from']}:")
+    if not (diff['appeared'] or diff['disappeared'] or diff['renamed']):
+        print("   (no changes)")
+    for node in diff['appeared']:
+        print(f"   + {node['long_name']} ({node['short_name']}) - ID: {node['id']}")
+    for node in diff['disappeared']:
+        print(f"   - {node['long_name']} ({node['short_name']}) - ID: {node['id']}")
+    for change in diff['renamed']:
+        before = change['before']
+        after = change['after']
+        print(f"   ~ {change['id']}: {before['long_name']} ({before['short_name']}) -> {after['long_name']} ({after['short_name']})")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Index a device's node database and diff it against a previous snapshot")
+    parser.add_argument("--port", required=True, help="Serial port (e.g., /dev/cu.usbserial-0001)")
+    parser.add_argument("--snapshot", help="Snapshot file to diff against and update")
+    parser.add_argument("--find", help="Resolve a node name, short name or id")
+
+    args = parser.parse_args()
+
+    try:
+        import meshtastic.serial_interface
+    except ImportError:
+        print("ERROR: meshtastic module not found")
+        print("Install with: pip3 install meshtastic")
+        sys.exit(1)
+
+    iface = meshtastic.serial_interface.SerialInterface(devPath=args.port)
+    index = NodeIndex.from_interface(iface, subscribe=False)
+    iface.close()
+
+    print(f"Indexed {len(index)} nodes on {args.port}")
+
+    if args.find:
+        num = index.find(args.find)
+        if num is None:
+            print(f"❌ '{args.find}' not found")
+        else:
+            print(f"✅ {args.find} -> {index.name(num)} ({index.short_name(num)}) - ID: {index.node_id(num)}")
+
+    snapshot = index.snapshot()
+    if args.snapshot:
+        try:
+            with open(args.snapshot, 'r') as f:
+                previous = json.load(f)
+            print_diff(diff_snapshots(previous, snapshot))
+        except FileNotFoundError:
+            print(f"No previous snapshot at {args.snapshot}, creating it")
+
+        with open(args.snapshot, 'w') as f:
+            json.dump(snapshot, f, indent=2)
+        print(f"Snapshot saved to: {args.snapshot}")
@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+"""
+Path loss model calibration from measured SNR
+Collects SNR measurements between nodes with known positions: the snr field of
+speed test result JSON files (results.json, all_device_pairs_results.json),
+node_index.py snapshots, and manual FROM,TO,SNR samples. It turns each one
+into a measured path loss with the configured radio and fits a log-distance
+model, optionally with a terrain diffraction weight, by linear least squares
+(NumPy).
+
+The fitted model is saved as JSON, where link_predictor.py,
+coverage_map.py and repeater_placement.py pick it up with --model and
+calculate_3min_capacity.py for its per-link capacity.
+
+Usage:
+    python3 path_loss_calibration.py --nodes positions.json all_device_pairs_results.json nodes_snapshot.json
+    python3 path_loss_calibration.py --nodes positions.json --sample 666c,7284,11.75 --sample 666c,bb14,2.25
+    python3 path_loss_calibration.py --nodes positions.json results.json --fit log-distance --out path_loss_model.json
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+from datetime import datetime
+
+try:
+    import numpy as np
+except ImportError:
+    raise ImportError("numpy module not found. Install with: pip3 install numpy")
+
+from dem import DEFAULT_DEM_DIR
+from lora_radio import MODEM_PRESETS, DEFAULT_PROFILES_FILE, radio_from_profile
+from link_predictor import LinkPredictor, PathLossModel, dem_elevation, load_positions
+
+DEFAULT_MODEL_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'path_loss_model.json')
+
+# Parameters fitted by each model, fewest first
+FITS = {
+    'offset': ('clutter_db',),
+    'log-distance': ('intercept_db', 'exponent'),
+    'terrain': ('intercept_db', 'exponent', 'diffraction_weight'),
+}
+
+
+def position_lookup(positions):
+    """{identifier: position} by name, !hex id, port and host"""
+    lookup = {}
+    for position in positions:
+        for key in ('name', 'id', 'port', 'host'):
+            if position.get(key):
+                lookup[str(position[key])] = position
+    return lookup
+
+
+def samples_from_file(path):
+    """(from, to, snr, source) measurements in a result JSON or node snapshot"""
+    with open(path, 'r') as f:
+        data = json.load(f)
+    samples = []
+    if 'results' in data:
+        for result in data['results']:
+            if result.get('snr') is None:
+                continue
+            # The sender's node database holds the SNR it last heard the target at
+            sender = next((result[k] for k in ('from_id', 'from_name', 'port') if result.get(k) not in (None, 'Unknown')), None)
+            target = next((result[k] for k in ('target_id', 'to_name') if result.get(k) not in (None, 'Unknown')), None)
+            if sender is not None and target is not None:
+                samples.append((str(target), str(sender), float(result['snr']), path))
+    elif 'nodes' in data and 'my_node_num' in data:
+        me = f"!{data['my_node_num']:08x}" if data.get('my_node_num') is not None else None
+        for node_id, node in data['nodes'].items():
+            if me and node_id != me and node.get('snr') is not None:
+                samples.append((node_id, me, float(node['snr']), path))
+    return samples
+
+
+def parse_sample(text):
+    """'FROM,TO,SNR' -> sample tuple"""
+    try:
+        a, b, snr = text.split(',')
+        return a.strip(), b.strip(), float(snr), 'manual'
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected FROM,TO,SNR, got {text!r}")
+
+
+def match_samples(samples, positions):
+    """Split samples into (matched (from position, to position, snr), unmatched samples)"""
+    lookup = position_lookup(positions)
+    matched = []
+    unmatched = []
+    for a, b, snr, source in samples:
+        pa = lookup.get(a)
+        pb = lookup.get(b)
+        if pa is None or pb is None or pa is pb:
+            unmatched.append((a, b, snr, source))
+        else:
+            matched.append((pa, pb, snr))
+    return matched, unmatched
+
+
+def link_terms(predictor, matched):
+    """Distance and knife-edge loss per sample, predicting each distinct link once
+
+    Returns (link keys, link index of every sample, predict() arrays per link).
+    """
+    links = {}
+    index = []
+    for pa, pb, _ in matched:
+        key = tuple(sorted((pa['name'], pb['name'])))
+        links.setdefault(key, (len(links), pa, pb))
+        index.append(links[key][0])
+    pairs = [(pa, pb) for _, pa, pb in links.values()]
+    out = predictor.predict([a['latitude'] for a, _ in pairs], [a['longitude'] for a, _ in pairs],
+                            np.array([a['antenna_m'] for a, _ in pairs]),
+                            [b['latitude'] for _, b in pairs], [b['longitude'] for _, b in pairs],
+                            np.array([b['antenna_m'] for _, b in pairs]))
+    return list(links), np.array(index, dtype=np.intp), out
+
+
+def fit_model(distance_m, diffraction_db, loss_db, frequency_mhz, fit='auto'):
+    """Least-squares PathLossModel for measured losses; returns (model, fit name, stats)
+
+    'auto' picks the richest model the samples support: at least three
+    samples per parameter, varying diffraction loss for the terrain weight
+    and at least two distances for the exponent.
+    """
+    distance_m = np.asarray(distance_m, dtype='f8')
+    diffraction_db = np.asarray(diffraction_db, dtype='f8')
+    loss_db = np.asarray(loss_db, dtype='f8')
+    log_d = 10 * np.log10(np.maximum(distance_m, 1.0) / 1000)
+    free_space = PathLossModel()
+
+    if fit == 'auto':
+        fit = 'offset'
+        for name in ('terrain', 'log-distance'):
+            columns = np.column_stack([np.ones_like(log_d), log_d, diffraction_db][:len(FITS[name])])
+            if len(loss_db) >= 3 * len(FITS[name]) and np.linalg.matrix_rank(np.unique(columns, axis=0)) == len(FITS[name]):
+                fit = name
+                break
+
+    if fit == 'offset':
+        residual = loss_db - free_space.loss(distance_m, diffraction_db, frequency_mhz)
+        model = PathLossModel(clutter_db=float(residual.mean()))
+    elif fit == 'log-distance':
+        X = np.column_stack([np.ones_like(log_d), log_d])
+        (intercept, exponent), *_ = np.linalg.lstsq(X, loss_db - diffraction_db, rcond=None)
+        model = PathLossModel(intercept_db=float(intercept), exponent=float(exponent))
+    else:
+        X = np.column_stack([np.ones_like(log_d), log_d, diffraction_db])
+        (intercept, exponent, weight), *_ = np.linalg.lstsq(X, loss_db, rcond=None)
+        model = PathLossModel(intercept_db=float(intercept), exponent=float(exponent), diffraction_weight=float(weight))
+
+    predicted = model.loss(distance_m, diffraction_db, frequency_mhz)
+    residual = loss_db - predicted
+    spread = ((loss_db - loss_db.mean()) ** 2).sum()
+    baseline = loss_db - free_space.loss(distance_m, diffraction_db, frequency_mhz)
+    stats = {
+        'samples': int(len(loss_db)),
+        'rmse_db': float(np.sqrt((residual ** 2).mean())),
+        'r2': float(1 - (residual ** 2).sum() / spread) if spread > 0 else None,
+        'free_space_rmse_db': float(np.sqrt((baseline ** 2).mean())),
+    }
+    return model, fit, stats
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Fit the path loss model to measured SNR between nodes with known positions",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  python3 path_loss_calibration.py --nodes positions.json all_device_pairs_results.json nodes_snapshot.json
+  python3 path_loss_calibration.py --nodes positions.json --sample 666c,7284,11.75 --sample 666c,bb14,2.25
+        """
+    )
+    parser.add_argument("files", nargs='*', help="Result JSON files (snr field) and node_index.py snapshots")
+    parser.add_argument("--nodes", required=True, help="JSON file of named positions (latitude, longitude, antenna_m; id/port/host to match results)")
+    parser.add_argument("--sample", action='append', type=parse_sample, default=[], metavar="FROM,TO,SNR",
+                        help="A measured SNR in dB between two nodes (repeatable)")
+    parser.add_argument("--fit", choices=('auto',) + tuple(FITS), default='auto',
+                        help="offset (free space + clutter), log-distance, terrain (adds a diffraction weight) or auto")
+    parser.add_argument("--profile", default="base", help="Radio profile the measurements were taken with (default: base)")
+    parser.add_argument("--profiles", default=DEFAULT_PROFILES_FILE, help="Profiles file")
+    parser.add_argument("--preset", choices=sorted(MODEM_PRESETS), help="Modem preset (default: the profile's)")
+    parser.add_argument("--tx-power", type=float, help="TX power in dBm (default: the profile's, else the region limit)")
+    parser.add_argument("--gain", type=float, help="Antenna gain in dBi at both ends (default: 2.15)")
+    parser.add_argument("--dem-dir", default=DEFAULT_DEM_DIR, help=f"Directory with .hgt tiles (default: {DEFAULT_DEM_DIR})")
+    parser.add_argument("--offline", action="store_true", help="Only use local tiles, never the elevation web services")
+    parser.add_argument("--api-key", help="Google Elevation API key for the web fallback")
+    parser.add_argument("--out", default=DEFAULT_MODEL_FILE, help=f"Model output (default: {DEFAULT_MODEL_FILE})")
+    parser.add_argument("--json", action="store_true", help="Print the calibration JSON")
+    args = parser.parse_args()
+
+    try:
+        radio = radio_from_profile(args.profile, args.profiles, preset=args.preset, tx_power_dbm=args.tx_power,
+                                   antenna_gain_dbi=args.gain)
+    except (OSError, ValueError) as e:
+        print(f"ERROR: {e}")
+        return 1
+
+    samples = list(args.sample)
+    for path in args.files:
+        try:
+            samples.extend(samples_from_file(path))
+        except (OSError, ValueError) as e:
+            print(f"⚠️  Skipping {path}: {e}")
+    matched, unmatched = match_samples(samples, load_positions(args.nodes))
+    for a, b, snr, source in unmatched:
+        print(f"⚠️  No positions for {a} -> {b} ({snr} dB, {source})")
+    if not matched:
+        print("ERROR: no SNR samples between nodes with known positions")
+        return 1
+
+    fallback = None
+    if not args.offline:
+        from get_altitude import ElevationCache
+        fallback = {'api_key': args.api_key, 'dem_dir': args.dem_dir, 'cache': ElevationCache()}
+    predictor = LinkPredictor(dem_elevation(args.dem_dir, fallback), radio)
+
+    start = time.perf_counter()
+    keys, index, terms = link_terms(predictor, matched)
+    if fallback is not None:
+        fallback['cache'].save()
+    snr = np.array([s for _, _, s in matched])
+    # What the receiver must have lost for the radio to report this SNR
+    loss = radio.eirp_dbm + radio.antenna_gain_dbi - radio.cable_loss_db - radio.noise_floor_dbm - snr
+    model, fit, stats = fit_model(terms['distance_m'][index], terms['diffraction_db'][index], loss,
+                                  radio.frequency_mhz, args.fit)
+    stats['seconds'] = round(time.perf_counter() - start, 4)
+
+    links = []
+    for i, key in enumerate(keys):
+        measured = snr[index == i]
+        link_loss = float(model.loss(terms['distance_m'][i], terms['diffraction_db'][i], radio.frequency_mhz))
+        link_snr = radio.eirp_dbm + radio.antenna_gain_dbi - radio.cable_loss_db - link_loss - radio.noise_floor_dbm
+        links.append({
+            'from': key[0], 'to': key[1],
+            'distance_m': round(float(terms['distance_m'][i]), 1),
+            'diffraction_db': round(float(terms['diffraction_db'][i]), 2),
+            'samples': int(len(measured)),
+            'measured_snr_db': round(float(measured.mean()), 2),
+            'predicted_snr_db': round(link_snr, 2),
+            'free_space_snr_db': round(float(terms['snr_db'][i]), 2),
+        })
+
+    calibration = {
+        'timestamp': datetime.now().isoformat(),
+        'fit': fit,
+        'model': model.to_dict(),
+        'radio': radio.describe(),
+        'stats': {k: (round(v, 3) if isinstance(v, float) else v) for k, v in stats.items()},
+        'links': links,
+    }
+    with open(args.out, 'w') as f:
+        json.dump(calibration, f, indent=2)
+
+    if args.json:
+        print(json.dumps(calibration, indent=2))
+        return 0
+
+    print("="*80)
+    print(f"PATH LOSS CALIBRATION  {stats['samples']} samples on {len(links)} links, fit: {fit}")
+    print("="*80)
+    intercept = "free space" if model.intercept_db is None else f"{model.intercept_db:.1f} dB"
+    print(f"Loss at 1 km: {intercept}, exponent: {model.exponent:.2f}, "
+          f"diffraction weight: {model.diffraction_weight:.2f}, clutter: {model.clutter_db:.1f} dB")
+    r2 = f", R² {stats['r2']:.2f}" if stats['r2'] is not None else ""
+    print(f"RMSE: {stats['rmse_db']:.2f} dB (free space: {stats['free_space_rmse_db']:.2f} dB){r2}, "
+          f"fitted in {stats['seconds'] * 1000:.1f} ms")
+    print()
+    print(f"{'From':<12} {'To':<12} {'km':>7} {'Diffr dB':>9} {'n':>4} {'Measured':>9} {'Predicted':>10} {'Free sp.':>9}")
+    for link in links:
+        print(f"{link['from']:<12} {link['to']:<12} {link['distance_m']/1000:>7.2f} {link['diffraction_db']:>9.1f} "
+              f"{link['samples']:>4} {link['measured_snr_db']:>9.1f} {link['predicted_snr_db']:>10.1f} "
+              f"{link['free_space_snr_db']:>9.1f}")
+    print("="*80)
+    print(f"Model written: {args.out} (use with --model)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
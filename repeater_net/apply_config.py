@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+"""
+Transactional configuration of repeater network nodes
+Applies a declarative per-node spec (profiles.json, selected by the node's
+"profile" in nodes.json plus optional per-node "config" overrides) over a
+single connection: every changed setting is written inside one
+begin/commit edit-settings transaction, so the node reboots once instead of
+once per setting.
+
+Usage:
+    python3 apply_config.py bb14
+    python3 apply_config.py bb14 --port /dev/cu.usbserial-0001
+    python3 apply_config.py 666c --host 192.168.0.11 --dry-run
+    python3 apply_config.py --all --json
+"""
+
+import sys
+import copy
+import json
+import time
+import argparse
+import os
+
+try:
+    import meshtastic
+    from meshtastic.protobuf import config_pb2, module_config_pb2
+except ImportError:
+    print("ERROR: meshtastic module not found")
+    sys.exit(1)
+
+from mesh_nodes import load_nodes, connect, describe
+
+DEFAULT_PROFILES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "profiles.json")
+
+LOCAL_SECTIONS = set(config_pb2.Config.DESCRIPTOR.fields_by_name)
+MODULE_SECTIONS = set(module_config_pb2.ModuleConfig.DESCRIPTOR.fields_by_name)
+
+
+def load_profiles(path=None):
+    with open(path or DEFAULT_PROFILES_FILE, 'r') as f:
+        return json.load(f).get('profiles', {})
+
+
+def merge(base, override):
+    """Deep-merge two {section: {field: value}} specs"""
+    result = copy.deepcopy(base)
+    for key, value in override.items():
+        if isinstance(value, dict) and isinstance(result.get(key), dict):
+            result[key] = merge(result[key], value)
+        else:
+            result[key] = copy.deepcopy(value)
+    return result
+
+
+def resolve_profile(profiles, name, seen=()):
+    """Expand a profile and everything it extends"""
+    if name not in profiles:
+        raise ValueError(f"Unknown profile: {name}")
+    if name in seen:
+        raise ValueError(f"Profile cycle: {' -> '.join(seen + (name,))}")
+    profile = dict(profiles[name])
+    parent = profile.pop('extends', None)
+    if parent:
+        return merge(resolve_profile(profiles, parent, seen + (name,)), profile)
+    return profile
+
+
+def node_spec(node, profiles):
+    """Desired {section: {field: value}} for an inventory node"""
+    spec = {}
+    if node.get('profile'):
+        spec = resolve_profile(profiles, node['profile'])
+    return merge(spec, node.get('config', {}))
+
+
+def config_section(local_node, section):
+    """The protobuf message holding a config section (localConfig or moduleConfig)"""
+    if section in LOCAL_SECTIONS:
+        return getattr(local_node.localConfig, section)
+    if section in MODULE_SECTIONS:
+        return getattr(local_node.moduleConfig, section)
+    raise ValueError(f"Unknown config section: {section}")
+
+
+def to_wire(message, field, value):
+    """Convert a spec value to what the protobuf field stores (enum names -> numbers)"""
+    fd = message.DESCRIPTOR.fields_by_name.get(field)
+    if fd is None:
+        raise ValueError(f"Unknown setting: {message.DESCRIPTOR.name}.{field}")
+    if fd.enum_type is not None and isinstance(value, str):
+        enum_value = fd.enum_type.values_by_name.get(value)
+        if enum_value is None:
+            choices = ', '.join(sorted(fd.enum_type.values_by_name))
+            raise ValueError(f"{field} has no value {value} (choices: {choices})")
+        return enum_value.number
+    return value
+
+
+def from_wire(message, field):
+    """Read a field back in spec form (enum numbers -> names)"""
+    fd = message.DESCRIPTOR.fields_by_name[field]
+    value = getattr(message, field)
+    if fd.enum_type is not None:
+        enum_value = fd.enum_type.values_by_number.get(value)
+        return enum_value.name if enum_value else value
+    return value
+
+
+def plan_changes(local_node, spec):
+    """List the settings whose current value differs from the spec"""
+    changes = []
+    for section, fields in spec.items():
+        message = config_section(local_node, section)
+        for field, desired in fields.items():
+            wire = to_wire(message, field, desired)
+            if getattr(message, field) != wire:
+                changes.append({
+                    'section': section,
+                    'field': field,
+                    'current': from_wire(message, field),
+                    'desired': desired
+                })
+    return changes
+
+
+def apply_changes(local_node, changes):
+    """Write all changes inside one edit-settings transaction"""
+    if not changes:
+        return
+    sections = []
+    local_node.beginSettingsTransaction()
+    for change in changes:
+        message = config_section(local_node, change['section'])
+        setattr(message, change['field'], to_wire(message, change['field'], change['desired']))
+        if change['section'] not in sections:
+            sections.append(change['section'])
+    for section in sections:
+        local_node.writeConfig(section)
+    local_node.commitSettingsTransaction()
+
+
+def wait_for_node(node, timeout=90, settle=8, interval=3):
+    """Reconnect after the commit reboot; returns the new interface or None"""
+    time.sleep(settle)
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            return connect(node)
+        except Exception:
+            time.sleep(interval)
+    return None
+
+
+def apply_node(node, profiles, dry_run=False, wait=True, timeout=90, settle=8):
+    """Connect once, apply the node's spec in one transaction and verify
+
+    Returns a result dictionary with the planned changes and phase timings.
+    """
+    result = {
+        'node': node['name'],
+        'address': describe(node),
+        'changes': [],
+        'applied': False,
+        'verified': None,
+        'timings': {},
+        'error': None
+    }
+    start = time.time()
+    iface = None
+    try:
+        spec = node_spec(node, profiles)
+        iface = connect(node)
+        result['timings']['connect_s'] = time.time() - start
+
+        changes = plan_changes(iface.localNode, spec)
+        result['changes'] = changes
+        if not changes:
+            result['verified'] = True
+            return result
+        if dry_run:
+            return result
+
+        t = time.time()
+        apply_changes(iface.localNode, changes)
+        result['applied'] = True
+        result['timings']['apply_s'] = time.time() - t
+        iface.close()
+        iface = None
+
+        if wait:
+            t = time.time()
+            iface = wait_for_node(node, timeout=timeout, settle=settle)
+            result['timings']['reboot_s'] = time.time() - t
+            if iface is None:
+                result['error'] = f"Node did not come back within {timeout}s"
+                result['verified'] = False
+                return result
+            result['remaining'] = plan_changes(iface.localNode, spec)
+            result['verified'] = not result['remaining']
+        return result
+    except Exception as e:
+        result['error'] = str(e)
+        return result
+    finally:
+        if iface is not None:
+            try:
+                iface.close()
+            except Exception:
+                pass
+        result['timings']['total_s'] = time.time() - start
+
+
+def print_result(result):
+    print(f"📡 {result['node']} ({result['address']})")
+    if result['error']:
+        print(f"   ❌ {result['error']}")
+    if not result['changes'] and not result['error']:
+        print("   ✅ Already up to date")
+    for change in result['changes']:
+        print(f"   {change['section']}.{change['field']}: {change['current']} -> {change['desired']}")
+    if result['applied']:
+        print(f"   ✅ Applied {len(result['changes'])} settings in one transaction")
+    if result['verified'] and result['applied']:
+        print("   ✅ Verified after reboot")
+    elif result['verified'] is False and result.get('remaining'):
+        for change in result['remaining']:
+            print(f"   ⚠️  {change['section']}.{change['field']} is {change['current']}, expected {change['desired']}")
+    timings = ', '.join(f"{k[:-2]} {v:.1f}s" for k, v in result['timings'].items())
+    print(f"   Timing: {timings}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Apply declarative configuration to repeater network nodes")
+    parser.add_argument("nodes", nargs="*", help="Node names from the inventory")
+    parser.add_argument("--all", action="store_true", help="Apply to every node in the inventory")
+    parser.add_argument("--config", help="Node inventory file (default: nodes.json)")
+    parser.add_argument("--profiles", help="Profiles file (default: profiles.json)")
+    parser.add_argument("--profile", help="Use this profile instead of the node's own")
+    parser.add_argument("--host", help="Override the node's TCP address")
+    parser.add_argument("--port", help="Override the node's serial port")
+    parser.add_argument("--dry-run", action="store_true", help="Only show what would change")
+    parser.add_argument("--no-wait", action="store_true", help="Do not wait for the reboot and verify")
+    parser.add_argument("--timeout", type=float, default=90, help="Seconds to wait for the node after reboot (default: 90)")
+    parser.add_argument("--json", action="store_true", help="Output results as JSON")
+    args = parser.parse_args()
+
+    if not args.nodes and not args.all:
+        parser.error("give node names or --all")
+
+    nodes = load_nodes(args.config, None if args.all else args.nodes)
+    if not nodes:
+        print("ERROR: No matching nodes in inventory")
+        sys.exit(1)
+    profiles = load_profiles(args.profiles)
+
+    results = []
+    for node in nodes:
+        node = dict(node)
+        if args.profile:
+            node['profile'] = args.profile
+        if args.host:
+            node['host'] = args.host
+            node.pop('port', None)
+        elif args.port:
+            node['port'] = args.port
+            node.pop('host', None)
+        result = apply_node(node, profiles, dry_run=args.dry_run, wait=not args.no_wait, timeout=args.timeout)
+        results.append(result)
+        if not args.json:
+            print_result(result)
+            print()
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+
+    if any(r['error'] or r['verified'] is False for r in results):
+        sys.exit(1)
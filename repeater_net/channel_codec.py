@@ -0,0 +1,347 @@
+#!/usr/bin/env python3
+"""
+Channel URL codec and channel provisioning
+Decodes and encodes Meshtastic channel URLs (https://meshtastic.org/e/#...,
+a base64url ChannelSet protobuf with the channels and LoRa settings),
+computes the 8-bit channel hash the firmware puts in every packet header, and
+pushes a channel set to many nodes in parallel (one connection per node),
+checking afterwards that each node ends up with the same channel hashes.
+
+Usage:
+    python3 channel_codec.py decode "$(cat primary_channel_url.txt)"
+    python3 channel_codec.py export bb14 --out primary_channel_url.txt
+    python3 channel_codec.py provision 7284 666c --url "$(cat primary_channel_url.txt)"
+    python3 channel_codec.py provision --all --from-node bb14
+"""
+
+import sys
+import json
+import time
+import base64
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import meshtastic
+    from meshtastic.protobuf import apponly_pb2, channel_pb2, config_pb2
+    from meshtastic.util import generate_channel_hash
+except ImportError:
+    print("ERROR: meshtastic module not found")
+    sys.exit(1)
+
+from mesh_nodes import load_nodes, connect, describe
+from apply_config import wait_for_node
+
+URL_PREFIX = "https://meshtastic.org/e/#"
+ADD_URL_PREFIX = "https://meshtastic.org/e/?add=true#"
+
+# Name the firmware uses for a channel with an empty name (DisplayFormatters)
+PRESET_NAMES = {
+    'SHORT_TURBO': 'ShortTurbo',
+    'SHORT_FAST': 'ShortFast',
+    'SHORT_SLOW': 'ShortSlow',
+    'MEDIUM_FAST': 'MediumFast',
+    'MEDIUM_SLOW': 'MediumSlow',
+    'LONG_TURBO': 'LongTurbo',
+    'LONG_FAST': 'LongFast',
+    'LONG_MODERATE': 'LongMod',
+    'LONG_SLOW': 'LongSlow',
+    'VERY_LONG_SLOW': 'VLongSlow',
+}
+
+
+def decode_url(url):
+    """Channel URL (or bare base64 payload) -> ChannelSet protobuf"""
+    payload = url.strip().split('#', 1)[-1]
+    payload += '=' * (-len(payload) % 4)
+    channel_set = apponly_pb2.ChannelSet()
+    channel_set.ParseFromString(base64.urlsafe_b64decode(payload))
+    if len(channel_set.settings) == 0:
+        raise ValueError("Channel URL contains no channels")
+    return channel_set
+
+
+def encode_url(channel_set, add_only=False):
+    """ChannelSet protobuf -> channel URL (unpadded base64url, as the apps produce)"""
+    payload = base64.urlsafe_b64encode(channel_set.SerializeToString()).decode('ascii').rstrip('=')
+    return (ADD_URL_PREFIX if add_only else URL_PREFIX) + payload
+
+
+def channel_set_from_node(local_node, include_all=True):
+    """ChannelSet for a node's PRIMARY (and SECONDARY) channels plus its LoRa config"""
+    channel_set = apponly_pb2.ChannelSet()
+    for c in sorted(local_node.channels or [], key=lambda c: c.index):
+        if c.role == channel_pb2.Channel.Role.PRIMARY or (
+                include_all and c.role == channel_pb2.Channel.Role.SECONDARY):
+            channel_set.settings.append(c.settings)
+    channel_set.lora_config.CopyFrom(local_node.localConfig.lora)
+    return channel_set
+
+
+def effective_name(settings, lora_config):
+    """Channel name as the firmware hashes it (empty name -> modem preset name)"""
+    if settings.name:
+        return settings.name
+    if not lora_config.use_preset:
+        return 'Custom'
+    preset = config_pb2.Config.LoRaConfig.ModemPreset.Name(lora_config.modem_preset)
+    return PRESET_NAMES.get(preset, preset)
+
+
+def channel_hash(settings, lora_config):
+    """8-bit channel hash: xor of name bytes xor of PSK bytes (1-byte PSKs expand to the default key)"""
+    return generate_channel_hash(effective_name(settings, lora_config), settings.psk)
+
+
+def channel_hashes(channel_set):
+    """Hashes of every channel in a set, in index order"""
+    return [channel_hash(s, channel_set.lora_config) for s in channel_set.settings]
+
+
+def psk_kind(psk):
+    # A one-byte 0 means no encryption to the firmware, like an empty key
+    if len(psk) == 0 or psk == b'\x00':
+        return 'none'
+    if len(psk) == 1:
+        return 'default' if psk[0] == 1 else f'simple{psk[0] - 1}'
+    return f'aes{len(psk) * 8}'
+
+
+def describe_channel_set(channel_set):
+    """Plain dict summary of a ChannelSet (PSKs are not included)"""
+    lora = channel_set.lora_config
+    return {
+        'channels': [{
+            'index': i,
+            'name': s.name,
+            'effective_name': effective_name(s, lora),
+            'psk': psk_kind(s.psk),
+            'hash': channel_hash(s, lora),
+            'uplink': s.uplink_enabled,
+            'downlink': s.downlink_enabled
+        } for i, s in enumerate(channel_set.settings)],
+        'lora': {
+            'region': config_pb2.Config.LoRaConfig.RegionCode.Name(lora.region),
+            'modem_preset': config_pb2.Config.LoRaConfig.ModemPreset.Name(lora.modem_preset),
+            'use_preset': lora.use_preset,
+            'hop_limit': lora.hop_limit,
+            'tx_enabled': lora.tx_enabled,
+            'channel_num': lora.channel_num
+        }
+    }
+
+
+def export_url(node, include_all=True):
+    """Read a node's channel URL over one connection (no node DB download)"""
+    iface = connect(node, noNodes=True)
+    try:
+        return encode_url(channel_set_from_node(iface.localNode, include_all))
+    finally:
+        iface.close()
+
+
+def apply_channel_set(local_node, channel_set):
+    """Write channels and LoRa settings in one edit-settings transaction
+
+    Channels beyond the set are disabled so the node ends up with exactly
+    the channels in the URL.
+    """
+    local_node.beginSettingsTransaction()
+    for i, c in enumerate(sorted(local_node.channels or [], key=lambda c: c.index)):
+        ch = channel_pb2.Channel(index=c.index)
+        if i < len(channel_set.settings):
+            ch.role = channel_pb2.Channel.Role.PRIMARY if i == 0 else channel_pb2.Channel.Role.SECONDARY
+            ch.settings.CopyFrom(channel_set.settings[i])
+        elif c.role == channel_pb2.Channel.Role.DISABLED:
+            continue
+        else:
+            ch.role = channel_pb2.Channel.Role.DISABLED
+        if ch == c:
+            continue
+        local_node.channels[c.index].CopyFrom(ch)
+        local_node.writeChannel(c.index)
+    local_node.localConfig.lora.CopyFrom(channel_set.lora_config)
+    local_node.writeConfig('lora')
+    local_node.commitSettingsTransaction()
+
+
+def node_hashes(local_node):
+    return channel_hashes(channel_set_from_node(local_node))
+
+
+def provision_node(node, channel_set, verify=True, timeout=90, settle=8):
+    """Push a channel set to one node and check the channel hashes afterwards"""
+    expected = channel_hashes(channel_set)
+    result = {
+        'node': node['name'],
+        'address': describe(node),
+        'expected_hashes': expected,
+        'hashes_before': None,
+        'hashes_after': None,
+        'applied': False,
+        'verified': None,
+        'timings': {},
+        'error': None
+    }
+    start = time.time()
+    iface = None
+    try:
+        iface = connect(node, noNodes=True)
+        result['timings']['connect_s'] = time.time() - start
+        current = channel_set_from_node(iface.localNode)
+        result['hashes_before'] = channel_hashes(current)
+        if current == channel_set:
+            result['hashes_after'] = result['hashes_before']
+            result['verified'] = True
+            return result
+
+        t = time.time()
+        apply_channel_set(iface.localNode, channel_set)
+        result['applied'] = True
+        result['timings']['apply_s'] = time.time() - t
+        iface.close()
+        iface = None
+
+        if verify:
+            t = time.time()
+            iface = wait_for_node(node, timeout=timeout, settle=settle)
+            result['timings']['reboot_s'] = time.time() - t
+            if iface is None:
+                result['error'] = f"Node did not come back within {timeout}s"
+                result['verified'] = False
+                return result
+            result['hashes_after'] = node_hashes(iface.localNode)
+            result['verified'] = result['hashes_after'] == expected
+        return result
+    except Exception as e:
+        result['error'] = str(e)
+        return result
+    finally:
+        if iface is not None:
+            try:
+                iface.close()
+            except Exception:
+                pass
+        result['timings']['total_s'] = time.time() - start
+
+
+def provision(nodes, channel_set, verify=True, timeout=90, workers=None):
+    """Provision many nodes concurrently; results are in inventory order"""
+    with ThreadPoolExecutor(max_workers=workers or max(1, len(nodes))) as pool:
+        return list(pool.map(lambda n: provision_node(n, channel_set, verify, timeout), nodes))
+
+
+def print_channel_set(info):
+    lora = info['lora']
+    print(f"LoRa: region {lora['region']}, preset {lora['modem_preset']}, hop limit {lora['hop_limit']}, "
+          f"TX {'on' if lora['tx_enabled'] else 'off'}")
+    for c in info['channels']:
+        role = 'PRIMARY' if c['index'] == 0 else 'SECONDARY'
+        print(f"   [{c['index']}] {role:<9} {c['effective_name']:<12} psk={c['psk']:<8} hash=0x{c['hash']:02x}")
+
+
+def node_override(args, node):
+    node = dict(node)
+    if args.host:
+        node['host'] = args.host
+        node.pop('port', None)
+    elif args.port:
+        node['port'] = args.port
+        node.pop('host', None)
+    return node
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Decode, encode and provision Meshtastic channel URLs")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("decode", help="Show the channels and LoRa settings in a URL")
+    p.add_argument("url")
+    p.add_argument("--json", action="store_true", help="Output as JSON")
+
+    p = sub.add_parser("export", help="Read a node's channel URL")
+    p.add_argument("node", help="Node name from the inventory")
+    p.add_argument("--primary-only", action="store_true", help="Only include the PRIMARY channel")
+    p.add_argument("--out", help="Also write the URL to this file")
+
+    p = sub.add_parser("provision", help="Push a channel URL to nodes in parallel and verify the hashes")
+    p.add_argument("nodes", nargs="*", help="Node names from the inventory")
+    p.add_argument("--all", action="store_true", help="Every node in the inventory")
+    source = p.add_mutually_exclusive_group(required=True)
+    source.add_argument("--url", help="Channel URL to apply")
+    source.add_argument("--url-file", help="Read the channel URL from this file")
+    source.add_argument("--from-node", help="Copy the channels of this inventory node")
+    p.add_argument("--no-verify", action="store_true", help="Do not reconnect and check the hashes")
+    p.add_argument("--timeout", type=float, default=90, help="Seconds to wait for each node after reboot (default: 90)")
+    p.add_argument("--json", action="store_true", help="Output results as JSON")
+
+    for p in (sub.choices["export"], sub.choices["provision"]):
+        p.add_argument("--config", help="Node inventory file (default: nodes.json)")
+        p.add_argument("--host", help="Override the node's TCP address")
+        p.add_argument("--port", help="Override the node's serial port")
+    args = parser.parse_args()
+
+    if args.command == "decode":
+        info = describe_channel_set(decode_url(args.url))
+        if args.json:
+            print(json.dumps(info, indent=2))
+        else:
+            print_channel_set(info)
+        sys.exit(0)
+
+    if args.command == "export":
+        nodes = load_nodes(args.config, [args.node])
+        if not nodes:
+            print(f"ERROR: Node {args.node} not in inventory", file=sys.stderr)
+            sys.exit(1)
+        url = export_url(node_override(args, nodes[0]), include_all=not args.primary_only)
+        if args.out:
+            with open(args.out, 'w') as f:
+                f.write(url + "\n")
+        print(url)
+        sys.exit(0)
+
+    if not args.nodes and not args.all:
+        parser.error("give node names or --all")
+    if args.from_node:
+        source_nodes = load_nodes(args.config, [args.from_node])
+        if not source_nodes:
+            print(f"ERROR: Node {args.from_node} not in inventory")
+            sys.exit(1)
+        url = export_url(source_nodes[0])
+    elif args.url_file:
+        with open(args.url_file, 'r') as f:
+            url = f.read().strip()
+    else:
+        url = args.url
+    channel_set = decode_url(url)
+
+    nodes = load_nodes(args.config, None if args.all else args.nodes)
+    nodes = [node_override(args, n) for n in nodes if n['name'] != args.from_node]
+    if not nodes:
+        print("ERROR: No matching nodes in inventory")
+        sys.exit(1)
+
+    if not args.json:
+        print_channel_set(describe_channel_set(channel_set))
+        print()
+    results = provision(nodes, channel_set, verify=not args.no_verify, timeout=args.timeout)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        for r in results:
+            after = ', '.join(f"0x{h:02x}" for h in r['hashes_after'] or [])
+            if r['error']:
+                print(f"❌ {r['node']} ({r['address']}): {r['error']}")
+            elif not r['applied']:
+                print(f"✅ {r['node']} ({r['address']}): already on this channel set ({after})")
+            elif r['verified']:
+                print(f"✅ {r['node']} ({r['address']}): provisioned, hashes {after}")
+            elif r['verified'] is None:
+                print(f"⚠️  {r['node']} ({r['address']}): written, not verified")
+            else:
+                print(f"❌ {r['node']} ({r['address']}): hash mismatch, got {after}")
+
+    if any(r['error'] or r['verified'] is False for r in results):
+        sys.exit(1)
@@ -0,0 +1,337 @@
+#!/usr/bin/env python3
+"""
+Configuration drift detection across the repeater network
+Fetches localConfig, moduleConfig and channels from all nodes in parallel,
+normalizes them into one canonical structure (enum names, secrets replaced by
+hashes), diffs each node against its desired profile and the nodes against
+each other (region, modem preset, hop limit, channel name/PSK/hash), and can
+push only the fields that drifted.
+
+Fetched configs are cached (config_cache.json); nodes fetched within
+--max-age seconds are not contacted again.
+
+Usage:
+    python3 config_drift.py
+    python3 config_drift.py --refresh --json
+    python3 config_drift.py --compare 7284 666c
+    python3 config_drift.py --push
+"""
+
+import os
+import sys
+import json
+import time
+import hashlib
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import meshtastic
+    from meshtastic.protobuf import channel_pb2
+except ImportError:
+    print("ERROR: meshtastic module not found")
+    sys.exit(1)
+
+from mesh_nodes import load_nodes, connect, describe
+from apply_config import load_profiles, node_spec, apply_node
+from channel_codec import channel_hash
+
+DEFAULT_CACHE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "config_cache.json")
+
+# Settings every node on the mesh must agree on
+FLEET_FIELDS = (
+    'config.lora.region',
+    'config.lora.modem_preset',
+    'config.lora.use_preset',
+    'config.lora.hop_limit',
+    'config.lora.channel_num',
+    'channels.0.name',
+    'channels.0.psk_hash',
+    'channels.0.hash',
+)
+
+SECRET_FIELDS = ('psk', 'private_key', 'public_key', 'admin_key', 'password', 'wifi_psk')
+
+
+def secret_hash(value):
+    """Short stable hash so secrets can be compared without being stored"""
+    if isinstance(value, str):
+        value = value.encode('utf-8')
+    if not value:
+        return ''
+    return 'sha256:' + hashlib.sha256(value).hexdigest()[:16]
+
+
+def canonical_message(message):
+    """Protobuf message -> plain dict with every field (defaults included)"""
+    result = {}
+    for fd in message.DESCRIPTOR.fields:
+        value = getattr(message, fd.name)
+        secret = fd.name in SECRET_FIELDS
+        if fd.is_repeated:
+            if fd.message_type is not None:
+                result[fd.name] = [canonical_message(v) for v in value]
+            elif secret:
+                result[fd.name] = [secret_hash(v) for v in value]
+            else:
+                result[fd.name] = [_scalar(fd, v) for v in value]
+        elif fd.message_type is not None:
+            result[fd.name] = canonical_message(value)
+        elif secret:
+            result[fd.name] = secret_hash(value)
+        else:
+            result[fd.name] = _scalar(fd, value)
+    return result
+
+
+def _scalar(fd, value):
+    if fd.enum_type is not None:
+        enum_value = fd.enum_type.values_by_number.get(value)
+        return enum_value.name if enum_value else value
+    if isinstance(value, bytes):
+        return value.hex()
+    return value
+
+
+def canonical_channels(channels, lora_config):
+    result = []
+    for c in channels or []:
+        if c.role == channel_pb2.Channel.Role.DISABLED:
+            continue
+        result.append({
+            'index': c.index,
+            'role': channel_pb2.Channel.Role.Name(c.role),
+            'name': c.settings.name,
+            'psk_hash': secret_hash(c.settings.psk),
+            'hash': channel_hash(c.settings, lora_config)
+        })
+    return result
+
+
+def fetch_config(node):
+    """Connect (without the node DB) and return the node's canonical config"""
+    start = time.time()
+    iface = connect(node, noNodes=True)
+    try:
+        local = iface.localNode
+        metadata = iface.metadata
+        return {
+            'node': node['name'],
+            'node_num': iface.myInfo.my_node_num if iface.myInfo else None,
+            'firmware': metadata.firmware_version if metadata else None,
+            'fetched_at': time.time(),
+            'fetch_s': time.time() - start,
+            'config': canonical_message(local.localConfig),
+            'module_config': canonical_message(local.moduleConfig),
+            'channels': canonical_channels(local.channels, local.localConfig.lora)
+        }
+    finally:
+        iface.close()
+
+
+def load_cache(path):
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def save_cache(path, cache):
+    with open(path, 'w') as f:
+        json.dump(cache, f, indent=2)
+
+
+def fetch_all(nodes, cache, max_age=3600, refresh=False):
+    """Fetch every node not fresh in the cache, in parallel
+
+    Returns ({name: canonical config}, {name: error}).
+    """
+    now = time.time()
+    configs = {}
+    stale = []
+    for node in nodes:
+        cached = cache.get(node['name'])
+        if not refresh and cached and now - cached.get('fetched_at', 0) < max_age:
+            configs[node['name']] = dict(cached, cached=True)
+        else:
+            stale.append(node)
+
+    errors = {}
+    if stale:
+        with ThreadPoolExecutor(max_workers=len(stale)) as pool:
+            futures = {node['name']: pool.submit(fetch_config, node) for node in stale}
+            for name, future in futures.items():
+                try:
+                    config = future.result()
+                    cache[name] = config
+                    configs[name] = dict(config, cached=False)
+                except Exception as e:
+                    errors[name] = str(e)
+    return configs, errors
+
+
+def get_path(config, path):
+    """Look up a dotted path like 'config.lora.region' or 'channels.0.name'"""
+    value = config
+    for part in path.split('.'):
+        if isinstance(value, list):
+            matches = [c for c in value if str(c.get('index')) == part]
+            value = matches[0] if matches else None
+        elif isinstance(value, dict):
+            value = value.get(part)
+        else:
+            return None
+        if value is None:
+            return None
+    return value
+
+
+def diff_desired(config, spec):
+    """Fields whose current value differs from the node's spec"""
+    drift = []
+    for section, fields in spec.items():
+        root = 'config' if section in config['config'] else 'module_config'
+        for field, desired in fields.items():
+            actual = get_path(config, f"{root}.{section}.{field}")
+            if actual != desired:
+                drift.append({'path': f"{root}.{section}.{field}", 'actual': actual, 'desired': desired})
+    return drift
+
+
+def diff_fleet(configs, fields=FLEET_FIELDS):
+    """Fields that are not identical on every node"""
+    mismatches = []
+    for path in fields:
+        values = {name: get_path(config, path) for name, config in configs.items()}
+        if len(set(json.dumps(v, sort_keys=True) for v in values.values())) > 1:
+            mismatches.append({'path': path, 'values': values})
+    return mismatches
+
+
+def flatten(value, prefix=''):
+    """{'a': {'b': 1}} -> {'a.b': 1}; lists of channels are keyed by index"""
+    flat = {}
+    if isinstance(value, dict):
+        for key, item in value.items():
+            flat.update(flatten(item, f"{prefix}{key}."))
+    elif isinstance(value, list) and value and isinstance(value[0], dict) and 'index' in value[0]:
+        for item in value:
+            flat.update(flatten(item, f"{prefix}{item['index']}."))
+    else:
+        flat[prefix[:-1]] = value
+    return flat
+
+
+def diff_nodes(a, b):
+    """Full field-by-field diff between two canonical configs"""
+    flat_a = flatten({k: a[k] for k in ('config', 'module_config', 'channels')})
+    flat_b = flatten({k: b[k] for k in ('config', 'module_config', 'channels')})
+    return [{'path': path, a['node']: flat_a.get(path), b['node']: flat_b.get(path)}
+            for path in sorted(flat_a.keys() | flat_b.keys())
+            if flat_a.get(path) != flat_b.get(path)]
+
+
+def check_drift(nodes, profiles, cache, max_age=3600, refresh=False):
+    configs, errors = fetch_all(nodes, cache, max_age, refresh)
+    report = {
+        'timestamp': time.time(),
+        'nodes': {},
+        'fleet_mismatches': diff_fleet(configs) if len(configs) > 1 else [],
+        'errors': errors
+    }
+    for node in nodes:
+        config = configs.get(node['name'])
+        if config is None:
+            continue
+        report['nodes'][node['name']] = {
+            'cached': config['cached'],
+            'firmware': config.get('firmware'),
+            'fetch_s': None if config['cached'] else config.get('fetch_s'),
+            'drift': diff_desired(config, node_spec(node, profiles))
+        }
+    return report, configs
+
+
+def print_report(report):
+    print("="*70)
+    print("CONFIGURATION DRIFT REPORT")
+    print("="*70)
+    for name, entry in report['nodes'].items():
+        source = "cached" if entry['cached'] else f"fetched in {entry['fetch_s']:.1f}s"
+        status = "✅ in sync" if not entry['drift'] else f"⚠️  {len(entry['drift'])} drifted"
+        print(f"📡 {name} ({source}, firmware {entry['firmware']}): {status}")
+        for d in entry['drift']:
+            print(f"   {d['path']}: {d['actual']} (desired {d['desired']})")
+    for name, error in report['errors'].items():
+        print(f"❌ {name}: {error}")
+    print()
+    if report['fleet_mismatches']:
+        print("Fleet mismatches:")
+        for m in report['fleet_mismatches']:
+            values = ', '.join(f"{n}={v}" for n, v in m['values'].items())
+            print(f"   ⚠️  {m['path']}: {values}")
+    else:
+        print("✅ Shared LoRa and channel settings match on all nodes")
+    print("="*70)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Detect configuration drift across repeater network nodes")
+    parser.add_argument("--config", help="Node inventory file (default: nodes.json)")
+    parser.add_argument("--profiles", help="Profiles file (default: profiles.json)")
+    parser.add_argument("--nodes", nargs="+", help="Only check these node names")
+    parser.add_argument("--cache", default=DEFAULT_CACHE_FILE, help="Config cache file (default: config_cache.json)")
+    parser.add_argument("--max-age", type=float, default=3600, help="Reuse cached configs younger than this many seconds (default: 3600)")
+    parser.add_argument("--refresh", action="store_true", help="Ignore the cache and fetch every node")
+    parser.add_argument("--compare", nargs=2, metavar=("NODE_A", "NODE_B"), help="Show every differing field between two nodes")
+    parser.add_argument("--push", action="store_true", help="Push drifted fields to the nodes that need them")
+    parser.add_argument("--json", action="store_true", help="Output the report as JSON")
+    args = parser.parse_args()
+
+    names = args.compare or args.nodes
+    nodes = load_nodes(args.config, names)
+    if not nodes:
+        print("ERROR: No matching nodes in inventory")
+        sys.exit(1)
+    profiles = load_profiles(args.profiles)
+    cache = load_cache(args.cache)
+
+    report, configs = check_drift(nodes, profiles, cache, args.max_age, args.refresh)
+
+    if args.compare:
+        a, b = args.compare
+        if a not in configs or b not in configs:
+            print(f"ERROR: Could not fetch {a if a not in configs else b}")
+            sys.exit(1)
+        report['compare'] = diff_nodes(configs[a], configs[b])
+
+    if args.push:
+        report['pushed'] = {}
+        for node in nodes:
+            entry = report['nodes'].get(node['name'])
+            if not entry or not entry['drift']:
+                continue
+            if not args.json:
+                print(f"Pushing {len(entry['drift'])} changed fields to {node['name']} ({describe(node)})...")
+            result = apply_node(node, profiles)
+            report['pushed'][node['name']] = result
+            # Its config changed, so the cached copy is no longer valid
+            cache.pop(node['name'], None)
+
+    save_cache(args.cache, cache)
+
+    if args.json:
+        print(json.dumps(report, indent=2, default=str))
+    else:
+        print_report(report)
+        for row in report.get('compare', []):
+            a, b = args.compare
+            print(f"   {row['path']}: {a}={row[a]}  {b}={row[b]}")
+        for name, result in report.get('pushed', {}).items():
+            status = "✅ verified" if result['verified'] else f"❌ {result['error'] or 'not verified'}"
+            print(f"Pushed {name}: {status}")
+
+    drifted = any(entry['drift'] for entry in report['nodes'].values())
+    if report['errors'] or (drifted and not args.push):
+        sys.exit(1)
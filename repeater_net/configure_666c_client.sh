@@ -45,45 +45,16 @@ python3 -m meshtastic --host "$IP_ADDRESS" --info | grep -E "Owner|666c" || {
 echo "✅ Connected"
 echo ""
 
-# Set CLIENT role
-echo "2. Setting device role to CLIENT..."
-python3 -m meshtastic --host "$IP_ADDRESS" --set device.role CLIENT
-echo "✅ Role set to CLIENT"
-echo ""
-
-# Set rebroadcast mode to ALL (to participate in mesh routing)
-echo "3. Setting rebroadcast mode to ALL..."
-python3 -m meshtastic --host "$IP_ADDRESS" --set device.rebroadcast_mode ALL
-echo "✅ Rebroadcast mode set to ALL"
-echo ""
-
-# Set LoRa region to UA_433 (must match repeater)
-echo "4. Setting LoRa region to UA_433..."
-python3 -m meshtastic --host "$IP_ADDRESS" --set lora.region UA_433
-echo "✅ Region set to UA_433"
-echo ""
-
-# Set modem preset to SHORT_FAST (must match repeater)
-echo "5. Setting modem preset to SHORT_FAST..."
-python3 -m meshtastic --host "$IP_ADDRESS" --set lora.modem_preset SHORT_FAST
-echo "✅ Modem preset set to SHORT_FAST"
-echo ""
-
-# Set hop limit (must match repeater)
-echo "6. Setting hop limit to 3..."
-python3 -m meshtastic --host "$IP_ADDRESS" --set lora.hop_limit 3
-echo "✅ Hop limit set to 3"
-echo ""
-
-# Ensure TX is enabled
-echo "7. Ensuring TX is enabled..."
-python3 -m meshtastic --host "$IP_ADDRESS" --set lora.tx_enabled true
-echo "✅ TX enabled"
+# Apply role, rebroadcast mode, region, modem preset, hop limit and TX
+# from profiles.json in one settings transaction (one connection, one reboot)
+echo "2. Applying CLIENT profile (role, rebroadcast mode, LoRa settings)..."
+python3 apply_config.py 666c --host "$IP_ADDRESS"
+echo "✅ CLIENT profile applied"
 echo ""
 
 # Set PRIMARY channel to match repeater
-echo "8. Setting PRIMARY channel to match repeater..."
-python3 -m meshtastic --host "$IP_ADDRESS" --ch-set url "$CHANNEL_URL"
+echo "3. Setting PRIMARY channel to match repeater..."
+python3 channel_codec.py provision 666c --host "$IP_ADDRESS" --url "$CHANNEL_URL"
 echo "✅ PRIMARY channel synchronized with repeater"
 echo ""
 
@@ -91,7 +62,7 @@ echo ""
 sleep 2
 
 # Verify configuration
-echo "9. Verifying configuration..."
+echo "4. Verifying configuration..."
 echo ""
 python3 -m meshtastic --host "$IP_ADDRESS" --info | grep -E "role|rebroadcast|region|modemPreset|hop" || true
 echo ""
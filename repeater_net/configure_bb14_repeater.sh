@@ -37,45 +37,16 @@ python3 -m meshtastic --port "$PORT" --info | grep -E "Owner|bb14" || {
 echo "✅ Connected"
 echo ""
 
-# Set REPEATER role
-echo "2. Setting device role to REPEATER..."
-python3 -m meshtastic --port "$PORT" --set device.role REPEATER
-echo "✅ Role set to REPEATER"
-echo ""
-
-# Set rebroadcast mode to ALL (REPEATER always rebroadcasts, but this ensures it)
-echo "3. Setting rebroadcast mode to ALL..."
-python3 -m meshtastic --port "$PORT" --set device.rebroadcast_mode ALL
-echo "✅ Rebroadcast mode set to ALL"
-echo ""
-
-# Set LoRa region to UA_433 (433 MHz - Ukraine)
-echo "4. Setting LoRa region to UA_433..."
-python3 -m meshtastic --port "$PORT" --set lora.region UA_433
-echo "✅ Region set to UA_433"
-echo ""
-
-# Set modem preset to SHORT_FAST (fastest data speed)
-echo "5. Setting modem preset to SHORT_FAST..."
-python3 -m meshtastic --port "$PORT" --set lora.modem_preset SHORT_FAST
-echo "✅ Modem preset set to SHORT_FAST"
-echo ""
-
-# Set hop limit (default is 3, but ensure it's set)
-echo "6. Setting hop limit to 3..."
-python3 -m meshtastic --port "$PORT" --set lora.hop_limit 3
-echo "✅ Hop limit set to 3"
-echo ""
-
-# Ensure TX is enabled
-echo "7. Ensuring TX is enabled..."
-python3 -m meshtastic --port "$PORT" --set lora.tx_enabled true
-echo "✅ TX enabled"
+# Apply role, rebroadcast mode, region, modem preset, hop limit and TX
+# from profiles.json in one settings transaction (one connection, one reboot)
+echo "2. Applying REPEATER profile (role, rebroadcast mode, LoRa settings)..."
+python3 apply_config.py bb14 --port "$PORT"
+echo "✅ REPEATER profile applied"
 echo ""
 
 # Get PRIMARY channel URL for sharing with clients
-echo "8. Getting PRIMARY channel URL..."
-CHANNEL_URL=$(python3 -m meshtastic --port "$PORT" --info | grep "Primary channel URL" | cut -d: -f2- | xargs)
+echo "3. Getting PRIMARY channel URL..."
+CHANNEL_URL=$(python3 channel_codec.py export bb14 --port "$PORT" --primary-only)
 echo "✅ PRIMARY channel URL: $CHANNEL_URL"
 echo ""
 
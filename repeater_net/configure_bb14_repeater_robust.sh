@@ -1,7 +1,8 @@
 #!/bin/bash
 #
 # Robust configuration script for bb14 (REPEATER node)
-# Handles device reboots during configuration
+# Handles device reboots during configuration (settings are applied in one
+# transaction by apply_config.py, which waits for the single reboot)
 #
 
 set -e
@@ -32,31 +33,6 @@ wait_for_device() {
     return 1
 }
 
-configure_with_retry() {
-    local port=$1
-    local setting=$2
-    local value=$3
-    local description=$4
-    local max_attempts=3
-    local attempt=1
-    
-    while [ $attempt -le $max_attempts ]; do
-        echo "   Attempt $attempt: Setting $description..."
-        if timeout 10 python3 -m meshtastic --port "$port" --set "$setting" "$value" 2>&1 | grep -q "Set\|Writing"; then
-            echo "✅ $description set successfully"
-            sleep 3  # Wait for potential reboot
-            wait_for_device "$port" && return 0
-        fi
-        echo "   Retrying..."
-        sleep 2
-        attempt=$((attempt + 1))
-    done
-    
-    echo "⚠️  Warning: $description may not have been set (device may have rebooted)"
-    wait_for_device "$port"
-    return 0
-}
-
 # Step 1: Verify initial connection
 echo "1. Verifying connection to bb14..."
 if ! python3 -m meshtastic --port "$PORT" --info | grep -q "bb14"; then
@@ -66,40 +42,17 @@ fi
 echo "✅ Connected"
 echo ""
 
-# Step 2: Set REPEATER role
-echo "2. Setting device role to REPEATER..."
-configure_with_retry "$PORT" "device.role" "REPEATER" "REPEATER role"
-echo ""
-
-# Step 3: Set rebroadcast mode
-echo "3. Setting rebroadcast mode to ALL..."
-configure_with_retry "$PORT" "device.rebroadcast_mode" "ALL" "Rebroadcast mode"
-echo ""
-
-# Step 4: Set LoRa region
-echo "4. Setting LoRa region to UA_433..."
-configure_with_retry "$PORT" "lora.region" "UA_433" "LoRa region"
-echo ""
-
-# Step 5: Set modem preset
-echo "5. Setting modem preset to SHORT_FAST..."
-configure_with_retry "$PORT" "lora.modem_preset" "SHORT_FAST" "Modem preset"
-echo ""
-
-# Step 6: Set hop limit
-echo "6. Setting hop limit to 3..."
-configure_with_retry "$PORT" "lora.hop_limit" "3" "Hop limit"
-echo ""
-
-# Step 7: Enable TX
-echo "7. Ensuring TX is enabled..."
-configure_with_retry "$PORT" "lora.tx_enabled" "true" "TX enabled"
+# Step 2: Apply role, rebroadcast mode, region, modem preset, hop limit and TX
+# from profiles.json in one settings transaction (one connection, one reboot)
+echo "2. Applying REPEATER profile (role, rebroadcast mode, LoRa settings)..."
+python3 apply_config.py bb14 --port "$PORT" --timeout 120
+echo "✅ REPEATER profile applied"
 echo ""
 
-# Step 8: Get PRIMARY channel URL
-echo "8. Getting PRIMARY channel URL..."
+# Step 3: Get PRIMARY channel URL
+echo "3. Getting PRIMARY channel URL..."
 wait_for_device "$PORT"
-CHANNEL_URL=$(python3 -m meshtastic --port "$PORT" --info 2>/dev/null | grep "Primary channel URL" | cut -d: -f2- | xargs)
+CHANNEL_URL=$(python3 channel_codec.py export bb14 --port "$PORT" --primary-only 2>/dev/null)
 
 if [ -z "$CHANNEL_URL" ]; then
     echo "⚠️  Warning: Could not get channel URL"
@@ -111,7 +64,7 @@ fi
 echo ""
 
 # Final verification
-echo "9. Verifying final configuration..."
+echo "4. Verifying final configuration..."
 wait_for_device "$PORT"
 echo ""
 python3 -m meshtastic --port "$PORT" --info | grep -E "role|rebroadcast|region|modemPreset|hop" || true
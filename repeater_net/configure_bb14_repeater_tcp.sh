@@ -24,51 +24,16 @@ fi
 echo "✅ Connected"
 echo ""
 
-# Set REPEATER role
-echo "2. Setting device role to REPEATER..."
-python3 -m meshtastic --host "$IP_ADDRESS" --set device.role REPEATER
-echo "✅ Role set to REPEATER"
-sleep 2
-echo ""
-
-# Set rebroadcast mode to ALL
-echo "3. Setting rebroadcast mode to ALL..."
-python3 -m meshtastic --host "$IP_ADDRESS" --set device.rebroadcast_mode ALL
-echo "✅ Rebroadcast mode set to ALL"
-sleep 2
-echo ""
-
-# Set LoRa region to UA_433
-echo "4. Setting LoRa region to UA_433..."
-python3 -m meshtastic --host "$IP_ADDRESS" --set lora.region UA_433
-echo "✅ Region set to UA_433"
-sleep 2
-echo ""
-
-# Set modem preset to SHORT_FAST
-echo "5. Setting modem preset to SHORT_FAST..."
-python3 -m meshtastic --host "$IP_ADDRESS" --set lora.modem_preset SHORT_FAST
-echo "✅ Modem preset set to SHORT_FAST"
-sleep 2
-echo ""
-
-# Set hop limit
-echo "6. Setting hop limit to 3..."
-python3 -m meshtastic --host "$IP_ADDRESS" --set lora.hop_limit 3
-echo "✅ Hop limit set to 3"
-sleep 2
-echo ""
-
-# Ensure TX is enabled
-echo "7. Ensuring TX is enabled..."
-python3 -m meshtastic --host "$IP_ADDRESS" --set lora.tx_enabled true
-echo "✅ TX enabled"
-sleep 2
+# Apply role, rebroadcast mode, region, modem preset, hop limit and TX
+# from profiles.json in one settings transaction (one connection, one reboot)
+echo "2. Applying REPEATER profile (role, rebroadcast mode, LoRa settings)..."
+python3 apply_config.py bb14 --host "$IP_ADDRESS"
+echo "✅ REPEATER profile applied"
 echo ""
 
 # Get PRIMARY channel URL
-echo "8. Getting PRIMARY channel URL..."
-CHANNEL_URL=$(python3 -m meshtastic --host "$IP_ADDRESS" --info 2>/dev/null | grep "Primary channel URL" | cut -d: -f2- | xargs)
+echo "3. Getting PRIMARY channel URL..."
+CHANNEL_URL=$(python3 channel_codec.py export bb14 --host "$IP_ADDRESS" --primary-only 2>/dev/null)
 
 if [ -z "$CHANNEL_URL" ]; then
     echo "⚠️  Warning: Could not get channel URL"
@@ -80,7 +45,7 @@ fi
 echo ""
 
 # Verify configuration
-echo "9. Verifying configuration..."
+echo "4. Verifying configuration..."
 echo ""
 python3 -m meshtastic --host "$IP_ADDRESS" --info | grep -E "role|rebroadcast|region|modemPreset|hop" || true
 echo ""
@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+Repeater network node inventory
+Loads nodes.json (name, node id, role and how to reach each node: "host" for
+TCP/IP, "port" for USB serial) and opens interfaces to them
+"""
+
+import os
+import json
+
+DEFAULT_NODES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "nodes.json")
+DEFAULT_TCP_PORT = 4403
+
+
+def load_nodes(path=None, names=None):
+    """Return the node entries from an inventory file, optionally filtered by name"""
+    with open(path or DEFAULT_NODES_FILE, 'r') as f:
+        data = json.load(f)
+    nodes = data.get('nodes', [])
+    if names:
+        wanted = set(names)
+        nodes = [n for n in nodes if n['name'] in wanted]
+    return nodes
+
+
+def describe(node):
+    """Human-readable address of a node"""
+    if node.get('host'):
+        return f"{node['host']}:{node.get('tcp_port', DEFAULT_TCP_PORT)}"
+    return node.get('port', 'unknown')
+
+
+def connect(node, noNodes=False, timeout=300):
+    """Open a meshtastic interface to an inventory node (TCP if it has a host)"""
+    if node.get('host'):
+        import meshtastic.tcp_interface
+        return meshtastic.tcp_interface.TCPInterface(
+            hostname=node['host'],
+            portNumber=node.get('tcp_port', DEFAULT_TCP_PORT),
+            noNodes=noNodes,
+            timeout=timeout
+        )
+    import meshtastic.serial_interface
+    return meshtastic.serial_interface.SerialInterface(devPath=node['port'], noNodes=noNodes, timeout=timeout)
@@ -1,11 +1,14 @@
 #!/usr/bin/env python3
 """
 Monitor message delivery to 666c
-Listens for incoming messages and displays routing information
+Listens for incoming messages and displays routing information.
+The meshtastic callback only captures (if enabled) and enqueues packets;
+decoding, name lookup and printing run on receive pipeline worker threads
 """
 import sys
 import time
 import signal
+import argparse
 
 try:
     import meshtastic
@@ -14,6 +17,9 @@ except ImportError:
     print("ERROR: meshtastic module not found")
     sys.exit(1)
 
+from packet_capture import CaptureWriter, CaptureReader, ReplayInterface, capture_metadata
+from receive_pipeline import ReceivePipeline, print_metrics
+
 # Global flag for graceful shutdown
 running = True
 
@@ -22,29 +28,75 @@ def signal_handler(sig, frame):
     print("\n\nStopping message monitor...")
     running = False
 
-def on_receive(packet, interface):
-    """Callback for received messages"""
-    if packet.get('decoded'):
-        decoded = packet['decoded']
-        if decoded.get('portnum') == 'TEXT_MESSAGE_APP':
-            text = decoded.get('text', '')
-            sender = packet.get('from')
-            sender_id = packet.get('fromId', 'Unknown')
-            
-            # Get sender name
-            sender_name = "Unknown"
-            if sender in interface.nodes:
-                sender_name = interface.nodes[sender].get('user', {}).get('longName', 'Unknown')
-            
-            print(f"\n{'='*70}")
-            print(f"📨 MESSAGE RECEIVED on 666c")
-            print(f"{'='*70}")
-            print(f"From: {sender_name} ({sender_id})")
-            print(f"Message: {text}")
-            print(f"Time: {time.strftime('%Y-%m-%d %H:%M:%S')}")
-            print(f"{'='*70}\n")
-
-def monitor_messages(ip_address, duration=60):
+def make_capture(writer):
+    """Callback that records every packet, ahead of the pipeline queues
+
+    The pipeline drops packets under backpressure, so the capture is written
+    on the callback thread to stay complete.
+    """
+    def capture_packet(packet, interface=None):
+        raw = packet.get('raw')
+        if raw is not None:
+            writer.write(time.time(), raw.SerializeToString())
+    return capture_packet
+
+# Pipeline stages: the meshtastic callback only enqueues (see build_pipeline),
+# everything below runs on pipeline worker threads
+
+def decode_packet(item):
+    """Pull the fields later stages need out of the packet dictionary"""
+    rx_time, packet, interface = item
+    decoded = packet.get('decoded') or {}
+    return {
+        'rx_time': rx_time,
+        'interface': interface,
+        'raw': packet.get('raw'),
+        'portnum': decoded.get('portnum'),
+        'text': decoded.get('text', ''),
+        'from': packet.get('from'),
+        'from_id': packet.get('fromId') or 'Unknown'
+    }
+
+def enrich_packet(record):
+    """Resolve the sender's name from the interface node DB"""
+    sender_name = "Unknown"
+    interface = record['interface']
+    nodes_by_num = getattr(interface, 'nodesByNum', None) or {}
+    node = nodes_by_num.get(record['from'])
+    if node is None:
+        node = (getattr(interface, 'nodes', None) or {}).get(record['from_id'])
+    if node is not None:
+        sender_name = node.get('user', {}).get('longName', 'Unknown')
+    record['sender_name'] = sender_name
+    return record
+
+def filter_text(record):
+    """Pass only text messages on to display"""
+    if record['portnum'] != 'TEXT_MESSAGE_APP':
+        return None
+    return record
+
+def display_message(record):
+    """Print a received text message"""
+    print(f"\n{'='*70}")
+    print(f"📨 MESSAGE RECEIVED on 666c")
+    print(f"{'='*70}")
+    print(f"From: {record['sender_name']} ({record['from_id']})")
+    print(f"Message: {record['text']}")
+    print(f"Time: {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(record['rx_time']))}")
+    print(f"{'='*70}\n")
+    return record
+
+def build_pipeline(queue_size=1024):
+    """Receive pipeline: decode -> enrich -> filter -> display"""
+    pipeline = ReceivePipeline(maxsize=queue_size)
+    pipeline.add_stage("decode", decode_packet)
+    pipeline.add_stage("enrich", enrich_packet)
+    pipeline.add_stage("filter", filter_text)
+    pipeline.add_stage("display", display_message)
+    return pipeline
+
+def monitor_messages(ip_address, duration=60, capture_file=None, queue_size=1024, show_metrics=False):
     """Monitor messages on a node"""
     print("="*70)
     print(f"MONITORING MESSAGE DELIVERY ON 666c")
@@ -56,12 +108,27 @@ def monitor_messages(ip_address, duration=60):
     print("(Send messages from 7284 to test routing)")
     print()
     
+    from pubsub import pub
+
+    iface = None
+    writer = None
+    capture = None
+    pipeline = None
     try:
         iface = meshtastic.tcp_interface.TCPInterface(hostname=ip_address)
         time.sleep(1)
         
-        # Register callback for received messages
-        iface.subscribe(on_receive)
+        # Record every packet, not just text messages, when capturing
+        if capture_file:
+            writer = CaptureWriter(capture_file, capture_metadata(iface, ip_address))
+            capture = make_capture(writer)
+            pub.subscribe(capture, "meshtastic.receive")
+            print(f"✅ Capturing all packets to {capture_file}")
+        
+        # Register callback for received messages (enqueue only)
+        pipeline = build_pipeline(queue_size)
+        pipeline.start()
+        pipeline.subscribe("meshtastic.receive")
         
         # Get node info
         local_node = iface.myInfo.my_node_num
@@ -73,20 +140,65 @@ def monitor_messages(ip_address, duration=60):
         while running and (time.time() - start_time) < duration:
             time.sleep(0.5)
         
-        iface.close()
-        print("\n✅ Monitoring stopped")
-        
     except KeyboardInterrupt:
         print("\n\nMonitoring interrupted by user")
     except Exception as e:
         print(f"\n❌ Error: {e}")
         return False
+    finally:
+        if capture is not None:
+            pub.unsubscribe(capture, "meshtastic.receive")
+        if pipeline is not None:
+            pipeline.stop()
+        if iface is not None:
+            iface.close()
+        if writer:
+            writer.close()
+            print(f"✅ Captured {writer.count} packets")
+        if show_metrics and pipeline is not None:
+            print_metrics(pipeline.metrics())
+        print("\n✅ Monitoring stopped")
+    
+    return True
+
+def replay_messages(capture_file, speed=1.0, queue_size=1024, show_metrics=False):
+    """Replay a capture through the same receive pipeline"""
+    print("="*70)
+    print(f"REPLAYING CAPTURE {capture_file}")
+    print(f"Speed: {speed}x" if speed else "Speed: as fast as possible")
+    print("="*70)
+    
+    with CaptureReader(capture_file) as reader:
+        iface = ReplayInterface(reader, speed=speed)
+        pipeline = build_pipeline(queue_size)
+        pipeline.start()
+        pipeline.subscribe("meshtastic.receive")
+        count = iface.replay()
+        iface.wait_published()
+        pipeline.stop()
+        print(f"\n✅ Replayed {count} packets")
+        if show_metrics:
+            print_metrics(pipeline.metrics())
     
     return True
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Monitor message delivery on 666c")
+    parser.add_argument("--host", default="192.168.0.11", help="Node IP address (default: 192.168.0.11)")
+    parser.add_argument("--duration", type=float, default=120, help="Monitoring time in seconds (default: 120)")
+    parser.add_argument("--capture", help="Also record every packet to this capture log")
+    parser.add_argument("--replay", help="Replay a capture log instead of connecting to a node")
+    parser.add_argument("--speed", type=float, default=1.0, help="Replay speed factor, 0 = as fast as possible (default: 1.0)")
+    parser.add_argument("--queue-size", type=int, default=1024, help="Pipeline queue size per stage (default: 1024)")
+    parser.add_argument("--metrics", action="store_true", help="Print pipeline queue/drop metrics when done")
+    args = parser.parse_args()
+    
     signal.signal(signal.SIGINT, signal_handler)
     
-    # Monitor on 666c
-    monitor_messages("192.168.0.11", duration=120)
+    if args.replay:
+        replay_messages(args.replay, args.speed, args.queue_size, args.metrics)
+    else:
+        # Monitor on 666c
+        monitor_messages(args.host, duration=args.duration, capture_file=args.capture,
+                         queue_size=args.queue_size, show_metrics=args.metrics)
 
@@ -0,0 +1,315 @@
+#!/usr/bin/env python3
+"""
+Monitor the whole repeater network at once
+Attaches to every node in nodes.json (TCP or serial) from one asyncio
+process, tags each received packet with the node that heard it (observer),
+deduplicates the same packet heard by several observers and measures how long
+it took to reach each observer after the first one heard it.
+
+Memory stays constant: in-flight packets live in a bounded window and only
+running statistics are kept for finished ones.
+
+Usage:
+    python3 monitor_network.py
+    python3 monitor_network.py --nodes 7284 666c --duration 600 --jsonl propagation.jsonl
+"""
+
+import sys
+import json
+import time
+import signal
+import asyncio
+import argparse
+from collections import OrderedDict
+
+try:
+    import meshtastic
+    from pubsub import pub
+except ImportError:
+    print("ERROR: meshtastic module not found")
+    sys.exit(1)
+
+from mesh_nodes import load_nodes, connect, describe
+
+
+class RunningStats:
+    """Count/mean/min/max/stddev without keeping samples (Welford)"""
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = None
+        self.max = None
+
+    def add(self, value):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def to_dict(self):
+        stddev = (self.m2 / (self.count - 1)) ** 0.5 if self.count > 1 else 0
+        return {'count': self.count, 'mean': self.mean, 'min': self.min, 'max': self.max, 'stddev': stddev}
+
+
+class PropagationTracker:
+    """Deduplicates packets across observers and records propagation delay"""
+
+    def __init__(self, window=30.0, max_pending=10000):
+        self.window = window
+        self.max_pending = max_pending
+        self.pending = OrderedDict()
+        self.heard = {}
+        self.unique = 0
+        self.duplicates = 0
+        self.unidentified = 0
+        self.completed = 0
+        self.delays = {}
+        self.pair_delays = {}
+
+    def observe(self, observer, rx_time, packet):
+        """Record one reception; returns True the first time a packet is seen"""
+        self.heard[observer] = self.heard.get(observer, 0) + 1
+
+        packet_id = packet.get('id', 0)
+        if not packet_id:
+            # Without an id there is nothing to correlate across observers
+            self.unidentified += 1
+            return True
+
+        key = (packet.get('from', 0), packet_id)
+        entry = self.pending.get(key)
+        is_new = entry is None
+        if is_new:
+            self.unique += 1
+            entry = {
+                'from': packet.get('from'),
+                'from_id': packet.get('fromId'),
+                'id': packet_id,
+                'portnum': (packet.get('decoded') or {}).get('portnum', 'ENCRYPTED'),
+                'first': rx_time,
+                'observers': {}
+            }
+            self.pending[key] = entry
+        else:
+            self.duplicates += 1
+
+        if observer not in entry['observers']:
+            hops = None
+            if 'hopStart' in packet and 'hopLimit' in packet:
+                hops = packet['hopStart'] - packet['hopLimit']
+            entry['observers'][observer] = {
+                'time': rx_time,
+                'snr': packet.get('rxSnr'),
+                'rssi': packet.get('rxRssi'),
+                'hops': hops
+            }
+        return is_new
+
+    def expire(self, now):
+        """Finish packets older than the window (or beyond capacity)"""
+        finished = []
+        while self.pending:
+            key, entry = next(iter(self.pending.items()))
+            if now - entry['first'] < self.window and len(self.pending) <= self.max_pending:
+                break
+            del self.pending[key]
+            finished.append(self._finish(entry))
+        return finished
+
+    def _finish(self, entry):
+        self.completed += 1
+        observers = sorted(entry['observers'].items(), key=lambda item: item[1]['time'])
+        first_name, first = observers[0]
+        delays = {}
+        for name, seen in observers:
+            delay = seen['time'] - first['time']
+            delays[name] = delay
+            if name == first_name:
+                continue
+            self.delays.setdefault(name, RunningStats()).add(delay)
+            self.pair_delays.setdefault(f"{first_name}->{name}", RunningStats()).add(delay)
+        return {
+            'from': entry['from_id'] or entry['from'],
+            'id': entry['id'],
+            'portnum': entry['portnum'],
+            'first_seen': entry['first'],
+            'first_observer': first_name,
+            'observers': {name: dict(seen, delay=delays[name]) for name, seen in observers}
+        }
+
+    def summary(self):
+        return {
+            'unique_packets': self.unique,
+            'duplicates': self.duplicates,
+            'unidentified': self.unidentified,
+            'pending': len(self.pending),
+            'completed': self.completed,
+            'heard': dict(self.heard),
+            'pair_delays': {pair: stats.to_dict() for pair, stats in self.pair_delays.items()}
+        }
+
+
+def print_summary(summary, dropped, connected):
+    print(f"\n{'='*70}")
+    print(f"NETWORK MONITOR  {time.strftime('%Y-%m-%d %H:%M:%S')}")
+    print(f"{'='*70}")
+    print(f"Observers connected: {', '.join(sorted(connected)) or 'none'}")
+    print(f"Unique packets: {summary['unique_packets']}  Duplicates: {summary['duplicates']}  "
+          f"Pending: {summary['pending']}  Dropped: {dropped}")
+    for name, count in sorted(summary['heard'].items()):
+        print(f"   {name:<8} heard {count}")
+    if summary['pair_delays']:
+        print(f"\n   {'First -> Observer':<20} {'Count':>7} {'Mean':>10} {'Min':>10} {'Max':>10}")
+        for pair, stats in sorted(summary['pair_delays'].items()):
+            print(f"   {pair:<20} {stats['count']:>7} {stats['mean']*1000:>8.1f}ms "
+                  f"{stats['min']*1000:>8.1f}ms {stats['max']*1000:>8.1f}ms")
+    print(f"{'='*70}")
+
+
+class NetworkMonitor:
+    """One asyncio loop fed by every node's meshtastic callback"""
+
+    def __init__(self, nodes, window=30.0, queue_size=10000, report_every=30.0, jsonl=None):
+        self.nodes = nodes
+        self.tracker = PropagationTracker(window=window)
+        self.queue_size = queue_size
+        self.report_every = report_every
+        self.jsonl = jsonl
+        self.observers = {}
+        self.dropped = 0
+        self.stopping = False
+        self.loop = None
+        self.queue = None
+
+    # Called on the meshtastic publishing thread: hand off and return
+
+    def _on_packet(self, packet, interface):
+        name = self.observers.get(interface)
+        if name is not None:
+            self.loop.call_soon_threadsafe(self._enqueue, (name, time.time(), packet))
+
+    def _on_lost(self, interface):
+        # observers is only changed on the loop, which also iterates it for the summary
+        self.loop.call_soon_threadsafe(self._lost, interface)
+
+    # Event loop side
+
+    def _lost(self, interface):
+        name = self.observers.pop(interface, None)
+        if name is not None and not self.stopping:
+            self._schedule_reconnect(name, interface)
+
+    def _enqueue(self, item):
+        try:
+            self.queue.put_nowait(item)
+        except asyncio.QueueFull:
+            self.dropped += 1
+
+    def _schedule_reconnect(self, name, interface):
+        print(f"⚠️  Lost connection to {name}, reconnecting...")
+        try:
+            interface.close()
+        except Exception:
+            pass
+        node = next(n for n in self.nodes if n['name'] == name)
+        self.loop.create_task(self._attach(node, retry=True))
+
+    async def _attach(self, node, retry=False):
+        delay = 2
+        while not self.stopping:
+            try:
+                iface = await self.loop.run_in_executor(None, connect, node)
+                self.observers[iface] = node['name']
+                print(f"✅ {node['name']} attached ({describe(node)})")
+                return iface
+            except Exception as e:
+                print(f"❌ {node['name']} ({describe(node)}): {e}")
+                if not retry:
+                    return None
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 60)
+
+    async def _consume(self):
+        while True:
+            name, rx_time, packet = await self.queue.get()
+            self.tracker.observe(name, rx_time, packet)
+
+    async def _housekeeping(self, out):
+        last_report = time.time()
+        while True:
+            await asyncio.sleep(1)
+            now = time.time()
+            for record in self.tracker.expire(now):
+                if out is not None:
+                    out.write(json.dumps(record) + "\n")
+            if out is not None:
+                out.flush()
+            if now - last_report >= self.report_every:
+                last_report = now
+                print_summary(self.tracker.summary(), self.dropped, list(self.observers.values()))
+
+    async def run(self, duration=None):
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=self.queue_size)
+        pub.subscribe(self._on_packet, "meshtastic.receive")
+        pub.subscribe(self._on_lost, "meshtastic.connection.lost")
+
+        stop = asyncio.Event()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            self.loop.add_signal_handler(sig, stop.set)
+
+        out = open(self.jsonl, 'a') if self.jsonl else None
+        # Attach in the background so one unreachable node does not hold up the rest
+        tasks = [asyncio.create_task(self._attach(node, retry=True)) for node in self.nodes]
+        tasks += [asyncio.create_task(self._consume()), asyncio.create_task(self._housekeeping(out))]
+        try:
+            await asyncio.wait_for(stop.wait(), timeout=duration)
+        except asyncio.TimeoutError:
+            pass
+
+        self.stopping = True
+        for task in tasks:
+            task.cancel()
+        pub.unsubscribe(self._on_packet, "meshtastic.receive")
+        pub.unsubscribe(self._on_lost, "meshtastic.connection.lost")
+        for iface in list(self.observers):
+            await self.loop.run_in_executor(None, iface.close)
+
+        # Flush everything still in the window
+        for record in self.tracker.expire(float('inf')):
+            if out is not None:
+                out.write(json.dumps(record) + "\n")
+        if out is not None:
+            out.close()
+        print_summary(self.tracker.summary(), self.dropped, [])
+        return self.tracker.summary()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Monitor all repeater network nodes concurrently")
+    parser.add_argument("--config", help="Node inventory file (default: nodes.json next to this script)")
+    parser.add_argument("--nodes", nargs="+", help="Only attach to these node names")
+    parser.add_argument("--duration", type=float, help="Stop after this many seconds (default: run until Ctrl+C)")
+    parser.add_argument("--window", type=float, default=30.0, help="Seconds to wait for other observers of a packet (default: 30)")
+    parser.add_argument("--report-every", type=float, default=30.0, help="Summary interval in seconds (default: 30)")
+    parser.add_argument("--jsonl", help="Append one JSON line per deduplicated packet to this file")
+    args = parser.parse_args()
+
+    nodes = load_nodes(args.config, args.nodes)
+    if not nodes:
+        print("ERROR: No nodes to monitor")
+        sys.exit(1)
+
+    print("="*70)
+    print("REPEATER NETWORK MONITOR")
+    print("="*70)
+    for node in nodes:
+        print(f"   {node['name']:<8} {node.get('role', ''):<10} {describe(node)}")
+    print()
+
+    monitor = NetworkMonitor(nodes, window=args.window, report_every=args.report_every, jsonl=args.jsonl)
+    asyncio.run(monitor.run(args.duration))
@@ -0,0 +1,379 @@
+#!/usr/bin/env python3
+"""
+Packet capture and deterministic replay
+Records every packet received on an interface (raw MeshPacket protobuf bytes
+plus receive timestamp) to a length-prefixed binary log with an mmap-able
+offset index, and replays a log through a fake interface at the original or
+an accelerated speed
+
+Log format (little endian):
+    header:  b'MSHCAP1\\n', u32 metadata length, metadata JSON
+    record:  f64 receive time, u32 length, MeshPacket bytes
+Index (<log>.idx):
+    header:  b'MSHIDX1\\n'
+    entry:   u64 record offset, f64 receive time
+
+Usage:
+    python3 packet_capture.py capture --host 192.168.0.11 --out 666c.mcap --duration 600
+    python3 packet_capture.py capture --port /dev/cu.usbserial-0001 --out bb14.mcap
+    python3 packet_capture.py info 666c.mcap
+    python3 packet_capture.py replay 666c.mcap --speed 10
+"""
+
+import os
+import sys
+import json
+import mmap
+import time
+import struct
+import argparse
+import threading
+from collections import Counter
+
+try:
+    import meshtastic
+    import meshtastic.serial_interface
+    import meshtastic.tcp_interface
+    from meshtastic import publishingThread
+    from meshtastic.mesh_interface import MeshInterface
+    from meshtastic.protobuf import mesh_pb2, portnums_pb2
+    from pubsub import pub
+except ImportError:
+    print("ERROR: meshtastic module not found")
+    print("Install with: pip3 install meshtastic")
+    sys.exit(1)
+
+
+LOG_MAGIC = b'MSHCAP1\n'
+INDEX_MAGIC = b'MSHIDX1\n'
+META_LEN = struct.Struct('<I')
+RECORD = struct.Struct('<dI')
+INDEX_ENTRY = struct.Struct('<Qd')
+
+
+def index_path(path):
+    return path + '.idx'
+
+
+class CaptureWriter:
+    """Append-only writer for a capture log and its index"""
+
+    def __init__(self, path, metadata=None, flush_every=64):
+        self.path = path
+        self.count = 0
+        self.flush_every = flush_every
+        self.lock = threading.Lock()
+
+        meta = json.dumps(metadata or {}).encode('utf-8')
+        self.log = open(path, 'wb')
+        self.log.write(LOG_MAGIC + META_LEN.pack(len(meta)) + meta)
+        self.index = open(index_path(path), 'wb')
+        self.index.write(INDEX_MAGIC)
+        self.offset = self.log.tell()
+
+    def write(self, rx_time, data):
+        """Append one packet; safe to call from the meshtastic callback thread"""
+        with self.lock:
+            self.log.write(RECORD.pack(rx_time, len(data)))
+            self.log.write(data)
+            self.index.write(INDEX_ENTRY.pack(self.offset, rx_time))
+            self.offset += RECORD.size + len(data)
+            self.count += 1
+            if self.count % self.flush_every == 0:
+                self.log.flush()
+                self.index.flush()
+
+    def close(self):
+        with self.lock:
+            self.log.close()
+            self.index.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class CaptureReader:
+    """Random-access reader over a capture log (mmap of log and index)"""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'rb')
+        self.data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if self.data[:len(LOG_MAGIC)] != LOG_MAGIC:
+            raise ValueError(f"{path} is not a packet capture log")
+        meta_len, = META_LEN.unpack_from(self.data, len(LOG_MAGIC))
+        start = len(LOG_MAGIC) + META_LEN.size
+        self.metadata = json.loads(self.data[start:start + meta_len].decode('utf-8'))
+        self.first_offset = start + meta_len
+
+        self._index_file = None
+        self.index = None
+        self._load_index()
+
+    def _load_index(self):
+        """Map the index, rebuilding it when missing or behind the log"""
+        path = index_path(self.path)
+        if not os.path.exists(path) or not self._index_complete(path):
+            self._rebuild_index(path)
+        self._index_file = open(path, 'rb')
+        self.index = mmap.mmap(self._index_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def _index_complete(self, path):
+        size = os.path.getsize(path) - len(INDEX_MAGIC)
+        if size < 0 or size % INDEX_ENTRY.size:
+            return False
+        if size == 0:
+            return self.first_offset == len(self.data)
+        with open(path, 'rb') as f:
+            f.seek(-INDEX_ENTRY.size, os.SEEK_END)
+            offset, _ = INDEX_ENTRY.unpack(f.read(INDEX_ENTRY.size))
+        if offset + RECORD.size > len(self.data):
+            return False
+        _, length = RECORD.unpack_from(self.data, offset)
+        return offset + RECORD.size + length == len(self.data)
+
+    def _rebuild_index(self, path):
+        with open(path, 'wb') as f:
+            f.write(INDEX_MAGIC)
+            for offset, rx_time, _ in self._scan():
+                f.write(INDEX_ENTRY.pack(offset, rx_time))
+
+    def _scan(self):
+        """Sequential walk over records, stops at a truncated tail"""
+        data = self.data
+        offset = self.first_offset
+        end = len(data)
+        while offset + RECORD.size <= end:
+            rx_time, length = RECORD.unpack_from(data, offset)
+            start = offset + RECORD.size
+            if start + length > end:
+                break
+            yield offset, rx_time, data[start:start + length]
+            offset = start + length
+
+    def __len__(self):
+        return (len(self.index) - len(INDEX_MAGIC)) // INDEX_ENTRY.size
+
+    def __getitem__(self, i):
+        """(receive time, MeshPacket bytes) of record i"""
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        offset, rx_time = INDEX_ENTRY.unpack_from(self.index, len(INDEX_MAGIC) + i * INDEX_ENTRY.size)
+        _, length = RECORD.unpack_from(self.data, offset)
+        start = offset + RECORD.size
+        return rx_time, self.data[start:start + length]
+
+    def __iter__(self):
+        for _, rx_time, payload in self._scan():
+            yield rx_time, payload
+
+    def index_array(self):
+        """NumPy view of the index (fields 'offset' and 'rx_time') without copying"""
+        import numpy as np
+
+        dtype = np.dtype([('offset', '<u8'), ('rx_time', '<f8')])
+        return np.frombuffer(self.index, dtype=dtype, offset=len(INDEX_MAGIC))
+
+    def time_range(self):
+        if len(self) == 0:
+            return None, None
+        return self[0][0], self[-1][0]
+
+    def close(self):
+        self.index.close()
+        self._index_file.close()
+        self.data.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def capture_metadata(iface, source):
+    """Header metadata: where the capture came from and the node DB at start"""
+    nodes = {}
+    for node_id, node in (iface.nodes or {}).items():
+        nodes[node_id] = {k: v for k, v in node.items() if k != 'raw'}
+    return {
+        'source': source,
+        'started': time.time(),
+        'my_node_num': iface.myInfo.my_node_num if iface.myInfo else None,
+        'nodes': nodes
+    }
+
+
+def start_capture(iface, writer):
+    """Record every packet iface publishes; returns the listener to unsubscribe later"""
+    def on_packet(packet, interface):
+        if interface is not iface:
+            return
+        raw = packet.get('raw')
+        if raw is not None:
+            writer.write(time.time(), raw.SerializeToString())
+
+    pub.subscribe(on_packet, "meshtastic.receive")
+    return on_packet
+
+
+def stop_capture(listener):
+    pub.unsubscribe(listener, "meshtastic.receive")
+
+
+class ReplayInterface(MeshInterface):
+    """Fake interface that feeds a capture log through the normal receive path
+
+    Subscribers see exactly the packet dictionaries and pubsub topics a live
+    interface would publish.
+    """
+
+    def __init__(self, reader, speed=1.0):
+        super().__init__(noProto=True)
+        self.reader = reader
+        self.speed = speed
+
+        metadata = reader.metadata
+        self.nodes = {}
+        self.nodesByNum = {}
+        for node_id, node in metadata.get('nodes', {}).items():
+            self.nodes[node_id] = node
+            if 'num' in node:
+                self.nodesByNum[node['num']] = node
+        self.myInfo = mesh_pb2.MyNodeInfo()
+        if metadata.get('my_node_num') is not None:
+            self.myInfo.my_node_num = metadata['my_node_num']
+        self.isConnected.set()
+
+    def replay(self, limit=None):
+        """Publish the captured packets, paced by speed (0 = as fast as possible)
+
+        Returns the number of packets replayed.
+        """
+        count = 0
+        first = None
+        start = time.perf_counter()
+        for rx_time, data in self.reader:
+            if limit is not None and count >= limit:
+                break
+            if self.speed:
+                if first is None:
+                    first = rx_time
+                delay = (rx_time - first) / self.speed - (time.perf_counter() - start)
+                if delay > 0:
+                    time.sleep(delay)
+            packet = mesh_pb2.MeshPacket()
+            packet.ParseFromString(data)
+            self._handlePacketFromRadio(packet)
+            count += 1
+        return count
+
+    def wait_published(self, timeout=None):
+        """Block until every replayed packet has been delivered to subscribers"""
+        done = threading.Event()
+        publishingThread.queueWork(done.set)
+        return done.wait(timeout)
+
+
+def connect(args):
+    if args.host:
+        return meshtastic.tcp_interface.TCPInterface(hostname=args.host), args.host
+    return meshtastic.serial_interface.SerialInterface(devPath=args.port), args.port
+
+
+def run_capture(args):
+    iface, source = connect(args)
+    writer = CaptureWriter(args.out, capture_metadata(iface, source))
+    listener = start_capture(iface, writer)
+
+    print(f"✅ Capturing packets from {source} to {args.out}")
+    print("   Press Ctrl+C to stop")
+    start = time.time()
+    try:
+        while args.duration is None or time.time() - start < args.duration:
+            time.sleep(1)
+            print(f"   Packets captured: {writer.count}", end="\r", flush=True)
+    except KeyboardInterrupt:
+        pass
+
+    stop_capture(listener)
+    iface.close()
+    writer.close()
+    print(f"\n✅ Captured {writer.count} packets in {time.time() - start:.1f}s")
+
+
+def run_info(args):
+    with CaptureReader(args.log) as reader:
+        first, last = reader.time_range()
+        ports = Counter()
+        for _, data in reader:
+            packet = mesh_pb2.MeshPacket()
+            packet.ParseFromString(data)
+            if packet.HasField('decoded'):
+                ports[portnums_pb2.PortNum.Name(packet.decoded.portnum)] += 1
+            else:
+                ports['ENCRYPTED'] += 1
+
+        print(f"Capture: {args.log}")
+        print(f"Source: {reader.metadata.get('source', 'unknown')}")
+        print(f"Packets: {len(reader)}")
+        if first is not None:
+            print(f"Duration: {last - first:.1f}s")
+        for name, count in ports.most_common():
+            print(f"   {name:<25} {count}")
+
+
+def run_replay(args):
+    with CaptureReader(args.log) as reader:
+        iface = ReplayInterface(reader, speed=args.speed)
+        received = Counter()
+
+        def on_packet(packet, interface):
+            if interface is iface:
+                received[packet.get('decoded', {}).get('portnum', 'ENCRYPTED')] += 1
+
+        pub.subscribe(on_packet, "meshtastic.receive")
+        start = time.perf_counter()
+        count = iface.replay()
+        iface.wait_published()
+        elapsed = time.perf_counter() - start
+        pub.unsubscribe(on_packet, "meshtastic.receive")
+
+        print(f"✅ Replayed {count} packets in {elapsed:.2f}s ({count / elapsed if elapsed > 0 else 0:,.0f} packets/s)")
+        for name, n in received.most_common():
+            print(f"   {name:<25} {n}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Capture and replay Meshtastic packets")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    capture = sub.add_parser("capture", help="Record packets from a node")
+    source = capture.add_mutually_exclusive_group(required=True)
+    source.add_argument("--host", help="Node IP address (TCP)")
+    source.add_argument("--port", help="Serial port (e.g., /dev/cu.usbserial-0001)")
+    capture.add_argument("--out", required=True, help="Capture log file")
+    capture.add_argument("--duration", type=float, help="Stop after this many seconds (default: until Ctrl+C)")
+
+    info = sub.add_parser("info", help="Summarize a capture log")
+    info.add_argument("log", help="Capture log file")
+
+    replay = sub.add_parser("replay", help="Replay a capture log through a fake interface")
+    replay.add_argument("log", help="Capture log file")
+    replay.add_argument("--speed", type=float, default=1.0, help="Speed factor, 0 = as fast as possible (default: 1.0)")
+
+    args = parser.parse_args()
+
+    if args.command == "capture":
+        run_capture(args)
+    elif args.command == "info":
+        run_info(args)
+    else:
+        run_replay(args)
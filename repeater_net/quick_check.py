@@ -1,59 +1,255 @@
 #!/usr/bin/env python3
 """
-Quick accessibility check for all three nodes
+Health probe for all repeater network nodes
+Probes every node in nodes.json concurrently within one timeout budget. Each
+probe opens the TCP or serial stream, sends a config-only want_config
+request (no node database) and reads just enough of the reply to get the
+node's identity, firmware version, uptime and channel utilization; the node
+number is checked against the id in the inventory.
+
+Exit status: 0 all nodes ok, 1 some degraded, 2 some down or wrong node,
+so it can run from cron or a monitoring system.
+
+Usage:
+    python3 quick_check.py
+    python3 quick_check.py --json --timeout 10
 """
-import socket
-import glob
+
+import os
 import sys
+import json
+import time
+import asyncio
+import argparse
+
+try:
+    import meshtastic
+    from meshtastic import NODELESS_WANT_CONFIG_ID
+    from meshtastic.protobuf import mesh_pb2
+    from meshtastic.stream_interface import START1, START2, HEADER_LEN, MAX_TO_FROM_RADIO_SIZE
+except ImportError:
+    print("ERROR: meshtastic module not found")
+    sys.exit(1)
+
+from mesh_nodes import load_nodes, describe, DEFAULT_TCP_PORT
+
+EXIT_CODES = {'ok': 0, 'degraded': 1, 'down': 2, 'wrong_node': 2}
+
+
+def frame(to_radio):
+    """ToRadio protobuf -> stream frame (START1 START2 len_hi len_lo payload)"""
+    payload = to_radio.SerializeToString()
+    return bytes([START1, START2, len(payload) >> 8, len(payload) & 0xFF]) + payload
+
+
+def want_config_frame():
+    # A run of START2 first makes a device that is mid-frame resync
+    return bytes([START2] * 32) + frame(mesh_pb2.ToRadio(want_config_id=NODELESS_WANT_CONFIG_ID))
+
+
+class FrameParser:
+    """Splits a byte stream into FromRadio payloads, skipping log noise"""
+
+    def __init__(self):
+        self.buf = bytearray()
+
+    def feed(self, data):
+        self.buf += data
+        frames = []
+        while True:
+            start = self.buf.find(bytes([START1, START2]))
+            if start < 0:
+                # Keep a trailing START1 in case START2 is in the next read
+                del self.buf[:max(0, len(self.buf) - 1)]
+                return frames
+            del self.buf[:start]
+            if len(self.buf) < HEADER_LEN:
+                return frames
+            length = (self.buf[2] << 8) | self.buf[3]
+            if length > MAX_TO_FROM_RADIO_SIZE:
+                del self.buf[:1]
+                continue
+            if len(self.buf) < HEADER_LEN + length:
+                return frames
+            frames.append(bytes(self.buf[HEADER_LEN:HEADER_LEN + length]))
+            del self.buf[:HEADER_LEN + length]
+
+
+class HandshakeState:
+    """Collects my_info, metadata and our own node_info from the config stream"""
+
+    def __init__(self):
+        self.my_node_num = None
+        self.firmware = None
+        self.hw_model = None
+        self.role = None
+        self.metrics = None
+        self.long_name = None
+        self.complete = False
+
+    def handle(self, payload):
+        msg = mesh_pb2.FromRadio()
+        try:
+            msg.ParseFromString(payload)
+        except Exception:
+            return
+        kind = msg.WhichOneof('payload_variant')
+        if kind == 'my_info':
+            self.my_node_num = msg.my_info.my_node_num
+        elif kind == 'metadata':
+            self.firmware = msg.metadata.firmware_version
+            self.hw_model = mesh_pb2.HardwareModel.Name(msg.metadata.hw_model)
+        elif kind == 'node_info' and msg.node_info.num == self.my_node_num:
+            self.long_name = msg.node_info.user.long_name
+            if msg.node_info.HasField('device_metrics'):
+                self.metrics = msg.node_info.device_metrics
+        elif kind == 'config_complete_id' and msg.config_complete_id == NODELESS_WANT_CONFIG_ID:
+            self.complete = True
+
+    @property
+    def done(self):
+        # Everything the probe reports is known; no need to wait for the rest of the config
+        return self.complete or (self.my_node_num is not None and self.firmware is not None
+                                 and self.metrics is not None)
+
 
-def check_tcp_port(host, port=4403, timeout=2):
-    """Quick TCP port check"""
+async def handshake_tcp(node, state, deadline):
+    reader, writer = await asyncio.wait_for(
+        asyncio.open_connection(node['host'], node.get('tcp_port', DEFAULT_TCP_PORT)),
+        timeout=max(0.1, deadline - time.monotonic()))
     try:
-        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        sock.settimeout(timeout)
-        result = sock.connect_ex((host, port))
-        sock.close()
-        return result == 0
-    except:
-        return False
-
-def find_bb14_port():
-    """Find bb14 USB port"""
-    ports = glob.glob("/dev/cu.usbserial*") + glob.glob("/dev/cu.usbmodem*")
-    return ports[0] if ports else None
-
-print("="*70)
-print("QUICK NODE ACCESSIBILITY CHECK")
-print("="*70)
-print()
-
-# Check bb14 (USB)
-print("1. bb14 (USB Serial):")
-bb14_port = find_bb14_port()
-if bb14_port:
-    print(f"   ✅ USB device found: {bb14_port}")
-else:
-    print(f"   ❌ No USB device found")
-print()
-
-# Check 7284 (TCP)
-print("2. 7284 (TCP/IP at 192.168.0.10):")
-if check_tcp_port("192.168.0.10", 4403):
-    print(f"   ✅ Port 4403 is open")
-else:
-    print(f"   ❌ Port 4403 is not accessible")
-print()
-
-# Check 666c (TCP)
-print("3. 666c (TCP/IP at 192.168.0.11):")
-if check_tcp_port("192.168.0.11", 4403):
-    print(f"   ✅ Port 4403 is open")
-else:
-    print(f"   ❌ Port 4403 is not accessible")
-print()
-
-print("="*70)
-print("Note: Port accessibility does not guarantee Meshtastic connection.")
-print("Use configuration scripts to verify full connectivity.")
-print("="*70)
+        writer.write(want_config_frame())
+        await writer.drain()
+        parser = FrameParser()
+        while not state.done:
+            data = await asyncio.wait_for(reader.read(4096), timeout=max(0.1, deadline - time.monotonic()))
+            if not data:
+                raise ConnectionError("connection closed by node")
+            for payload in parser.feed(data):
+                state.handle(payload)
+    finally:
+        writer.close()
+
+
+def handshake_serial(node, state, deadline):
+    """Blocking serial handshake, run in a worker thread"""
+    import serial
+
+    with serial.Serial(node['port'], 115200, timeout=0.2, exclusive=True) as port:
+        port.write(want_config_frame())
+        parser = FrameParser()
+        while not state.done and time.monotonic() < deadline:
+            data = port.read(4096)
+            for payload in parser.feed(data):
+                state.handle(payload)
+    if not state.done:
+        raise TimeoutError()
+
+
+def node_num(node):
+    node_id = node.get('id', '')
+    return int(node_id[1:], 16) if node_id.startswith('!') else None
+
+
+async def probe(node, budget=8.0, max_channel_util=50.0):
+    """Probe one node; never raises, always returns a status dictionary"""
+    start = time.monotonic()
+    deadline = start + budget
+    state = HandshakeState()
+    result = {
+        'node': node['name'],
+        'address': describe(node),
+        'status': 'down',
+        'identity_ok': None,
+        'node_id': None,
+        'firmware': None,
+        'hw_model': None,
+        'uptime_s': None,
+        'channel_utilization': None,
+        'air_util_tx': None,
+        'latency_ms': None,
+        'error': None
+    }
+    try:
+        if node.get('host'):
+            await handshake_tcp(node, state, deadline)
+        elif node.get('port') and os.path.exists(node['port']):
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(None, handshake_serial, node, state, deadline)
+        else:
+            raise FileNotFoundError(f"serial port {node.get('port')} not present")
+    except (asyncio.TimeoutError, TimeoutError):
+        result['error'] = f"no complete handshake within {budget:.0f}s"
+    except Exception as e:
+        result['error'] = str(e) or type(e).__name__
+
+    result['latency_ms'] = round((time.monotonic() - start) * 1000, 1)
+    if state.my_node_num is not None:
+        result['node_id'] = f"!{state.my_node_num:08x}"
+    result['firmware'] = state.firmware
+    result['hw_model'] = state.hw_model
+    if state.metrics is not None:
+        result['uptime_s'] = state.metrics.uptime_seconds
+        result['channel_utilization'] = round(state.metrics.channel_utilization, 2)
+        result['air_util_tx'] = round(state.metrics.air_util_tx, 2)
+
+    if state.my_node_num is None:
+        return result
+    expected = node_num(node)
+    result['identity_ok'] = expected is None or expected == state.my_node_num
+    if not result['identity_ok']:
+        result['status'] = 'wrong_node'
+        result['error'] = f"expected {node['id']}, found {result['node_id']}"
+    elif result['error'] or (result['channel_utilization'] or 0) > max_channel_util:
+        result['status'] = 'degraded'
+    else:
+        result['status'] = 'ok'
+    return result
+
+
+async def probe_all(nodes, budget=8.0, max_channel_util=50.0):
+    return await asyncio.gather(*(probe(node, budget, max_channel_util) for node in nodes))
+
+
+def print_results(results, elapsed):
+    icons = {'ok': '✅', 'degraded': '⚠️ ', 'down': '❌', 'wrong_node': '❌'}
+    print("="*70)
+    print("NODE HEALTH CHECK")
+    print("="*70)
+    for r in results:
+        print(f"{icons[r['status']]} {r['node']:<6} {r['address']:<32} {r['status'].upper()} ({r['latency_ms']:.0f} ms)")
+        if r['node_id']:
+            uptime = f"{r['uptime_s'] // 3600}h{r['uptime_s'] % 3600 // 60:02d}m" if r['uptime_s'] is not None else "?"
+            chutil = f"{r['channel_utilization']:.1f}%" if r['channel_utilization'] is not None else "?"
+            print(f"   {r['node_id']} {r['hw_model']} firmware {r['firmware']}, up {uptime}, channel util {chutil}")
+        if r['error']:
+            print(f"   {r['error']}")
+    print(f"Checked {len(results)} nodes in {elapsed:.1f}s")
+    print("="*70)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Concurrent health probe for repeater network nodes")
+    parser.add_argument("--config", help="Node inventory file (default: nodes.json)")
+    parser.add_argument("--nodes", nargs="+", help="Only probe these node names")
+    parser.add_argument("--timeout", type=float, default=8.0, help="Time budget for the whole check in seconds (default: 8)")
+    parser.add_argument("--max-channel-util", type=float, default=50.0,
+                        help="Report nodes above this channel utilization %% as degraded (default: 50)")
+    parser.add_argument("--json", action="store_true", help="Output results as JSON")
+    args = parser.parse_args()
+
+    nodes = load_nodes(args.config, args.nodes)
+    if not nodes:
+        print("ERROR: No matching nodes in inventory")
+        sys.exit(2)
+
+    start = time.monotonic()
+    results = asyncio.run(probe_all(nodes, args.timeout, args.max_channel_util))
+    elapsed = time.monotonic() - start
+
+    if args.json:
+        print(json.dumps({'timestamp': time.time(), 'elapsed_s': round(elapsed, 3), 'nodes': results}, indent=2))
+    else:
+        print_results(results, elapsed)
 
+    sys.exit(max(EXIT_CODES[r['status']] for r in results))
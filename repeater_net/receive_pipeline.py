@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+Receive pipeline for Meshtastic packet handlers
+The meshtastic callback only timestamps and enqueues packets into a bounded
+queue; worker threads run the decode, enrich, store and display stages.
+Queue depth, high-water marks, backpressure events and drops are counted per
+stage and exposed through metrics()
+"""
+
+import time
+import threading
+from collections import deque
+
+
+class BoundedQueue:
+    """Bounded FIFO built on deque append/popleft, which are atomic in CPython
+
+    Producers never block: when full, either the oldest item is evicted
+    ('drop_oldest') or the new one is refused ('drop_newest'), and the drop is
+    counted. A dequeued item counts as in flight until done(), and both are
+    changed under one lock, so idle() never misses an item between the two.
+    """
+
+    def __init__(self, maxsize=1024, policy='drop_oldest'):
+        if policy not in ('drop_oldest', 'drop_newest'):
+            raise ValueError(f"Unknown drop policy: {policy}")
+        self.maxsize = maxsize
+        self.policy = policy
+        self.items = deque()
+        self.ready = threading.Event()
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.enqueued = 0
+        self.dropped = 0
+        self.high_water = 0
+        self.backpressure = 0
+
+    def put(self, item):
+        """Enqueue without blocking; returns False if an item was dropped"""
+        ok = True
+        depth = len(self.items)
+        if depth >= self.maxsize:
+            self.dropped += 1
+            ok = False
+            if self.policy == 'drop_newest':
+                return False
+            try:
+                self.items.popleft()
+            except IndexError:
+                pass
+        elif depth >= self.maxsize * 0.8:
+            self.backpressure += 1
+
+        self.items.append(item)
+        self.enqueued += 1
+        depth = len(self.items)
+        if depth > self.high_water:
+            self.high_water = depth
+        self.ready.set()
+        return ok
+
+    def _take(self):
+        with self.lock:
+            item = self.items.popleft()
+            self.in_flight += 1
+            return item
+
+    def get(self, timeout=None):
+        """Dequeue, waiting up to timeout; raises IndexError when still empty
+
+        Call done() once the item is handled.
+        """
+        try:
+            return self._take()
+        except IndexError:
+            pass
+        self.ready.clear()
+        # Re-check after clearing so a put() between popleft and clear is not missed
+        if not self.items:
+            self.ready.wait(timeout)
+        return self._take()
+
+    def done(self):
+        """Mark an item from get() as handled"""
+        with self.lock:
+            self.in_flight -= 1
+
+    def idle(self):
+        """Nothing queued and nothing dequeued but not done"""
+        with self.lock:
+            return not self.items and self.in_flight == 0
+
+    def __len__(self):
+        return len(self.items)
+
+
+class Stage:
+    """One pipeline stage: a function applied by worker threads to queued items
+
+    The function returns the item for the next stage, or None to drop it
+    from the pipeline (e.g. a filter).
+    """
+
+    def __init__(self, name, func, workers=1, maxsize=1024, policy='drop_oldest'):
+        self.name = name
+        self.func = func
+        self.workers = workers
+        self.queue = BoundedQueue(maxsize, policy)
+        self.next = None
+        self.processed = 0
+        self.filtered = 0
+        self.errors = 0
+        self.busy_time = 0.0
+        self.last_error = None
+        self.lock = threading.Lock()
+        self.threads = []
+
+    def _run(self, stop):
+        while True:
+            try:
+                item = self.queue.get(timeout=0.2)
+            except IndexError:
+                if stop.is_set():
+                    return
+                continue
+
+            start = time.perf_counter()
+            error = None
+            try:
+                result = self.func(item)
+            except Exception as e:
+                error = str(e)
+                result = None
+            elapsed = time.perf_counter() - start
+
+            # Hand on before done(), so drain() always sees the item somewhere
+            if result is not None and self.next is not None:
+                self.next.queue.put(result)
+            self.queue.done()
+
+            with self.lock:
+                self.busy_time += elapsed
+                self.processed += 1
+                if error is not None:
+                    self.errors += 1
+                    self.last_error = error
+                elif result is None:
+                    self.filtered += 1
+
+    def metrics(self):
+        q = self.queue
+        return {
+            'depth': len(q),
+            'maxsize': q.maxsize,
+            'high_water': q.high_water,
+            'enqueued': q.enqueued,
+            'dropped': q.dropped,
+            'backpressure_events': q.backpressure,
+            'processed': self.processed,
+            'filtered': self.filtered,
+            'errors': self.errors,
+            'last_error': self.last_error,
+            'avg_service_ms': (self.busy_time / self.processed * 1000) if self.processed else 0
+        }
+
+
+class ReceivePipeline:
+    """Chain of stages fed from the meshtastic receive callback"""
+
+    def __init__(self, maxsize=1024, policy='drop_oldest'):
+        self.maxsize = maxsize
+        self.policy = policy
+        self.stages = []
+        self.stop_event = threading.Event()
+        self.received = 0
+        self.started = None
+        self._topic = None
+
+    def add_stage(self, name, func, workers=1, maxsize=None):
+        """Append a stage; stages run in the order they are added"""
+        stage = Stage(name, func, workers, maxsize or self.maxsize, self.policy)
+        if self.stages:
+            self.stages[-1].next = stage
+        self.stages.append(stage)
+        return stage
+
+    def submit(self, packet, interface=None):
+        """Callback-thread entry point: timestamp and enqueue, nothing else"""
+        self.received += 1
+        self.stages[0].queue.put((time.time(), packet, interface))
+
+    def subscribe(self, topic="meshtastic.receive"):
+        """Feed the pipeline from a meshtastic pubsub topic"""
+        from pubsub import pub
+
+        self._topic = topic
+        pub.subscribe(self.submit, topic)
+
+    def start(self):
+        self.started = time.time()
+        self.stop_event.clear()
+        for stage in self.stages:
+            for i in range(stage.workers):
+                thread = threading.Thread(target=stage._run, args=(self.stop_event,),
+                                          name=f"pipeline-{stage.name}-{i}", daemon=True)
+                thread.start()
+                stage.threads.append(thread)
+
+    def drain(self, timeout=5.0):
+        """Wait until every stage queue is empty (or timeout)"""
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            if all(stage.queue.idle() for stage in self.stages):
+                return True
+            time.sleep(0.01)
+        return False
+
+    def stop(self, drain=True, timeout=5.0):
+        if self._topic is not None:
+            from pubsub import pub
+
+            pub.unsubscribe(self.submit, self._topic)
+            self._topic = None
+        if drain:
+            self.drain(timeout)
+        self.stop_event.set()
+        for stage in self.stages:
+            for thread in stage.threads:
+                thread.join(timeout)
+            stage.threads = []
+
+    def metrics(self):
+        """Counters for every stage plus totals"""
+        stages = {stage.name: stage.metrics() for stage in self.stages}
+        elapsed = time.time() - self.started if self.started else 0
+        return {
+            'received': self.received,
+            'dropped': sum(s['dropped'] for s in stages.values()),
+            'errors': sum(s['errors'] for s in stages.values()),
+            'uptime_s': elapsed,
+            'packets_per_sec': self.received / elapsed if elapsed > 0 else 0,
+            'stages': stages
+        }
+
+
+def print_metrics(metrics):
+    """Print pipeline metrics as a table"""
+    print(f"Pipeline: {metrics['received']} received, {metrics['dropped']} dropped, "
+          f"{metrics['errors']} errors, {metrics['packets_per_sec']:.1f} packets/s")
+    print(f"   {'Stage':<10} {'Depth':>6} {'HWM':>6} {'Done':>8} {'Dropped':>8} {'BP':>6} {'Errors':>7} {'ms/pkt':>8}")
+    for name, s in metrics['stages'].items():
+        print(f"   {name:<10} {s['depth']:>6} {s['high_water']:>6} {s['processed']:>8} {s['dropped']:>8} "
+              f"{s['backpressure_events']:>6} {s['errors']:>7} {s['avg_service_ms']:>8.3f}")
@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+Fleet-wide configuration rollout
+Applies each node's profile (see apply_config.py) to many nodes concurrently
+with a bounded worker pool. Reboots are staggered: commits are spaced at
+least --stagger seconds apart and fewer repeaters than the fleet has reboot
+at the same time, so with two or more repeaters the mesh always keeps one
+up. A lone repeater still has to reboot, and the mesh has no repeater while
+it is down; a warning is printed for that. After the reboot each node is
+verified; nodes that fail verification are rolled back to the settings
+they had before the rollout.
+
+Progress events are printed as JSON lines, followed by one JSON summary.
+
+Usage:
+    python3 rollout.py --all
+    python3 rollout.py --all --concurrency 4 --stagger 20
+    python3 rollout.py 7284 666c --dry-run
+"""
+
+import sys
+import json
+import time
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from mesh_nodes import load_nodes, connect, describe
+from apply_config import (load_profiles, node_spec, plan_changes, apply_changes, wait_for_node)
+
+REPEATER_ROLES = ('REPEATER', 'ROUTER', 'ROUTER_LATE', 'ROUTER_CLIENT')
+
+
+def is_repeater(node, spec):
+    role = spec.get('device', {}).get('role') or node.get('role', '')
+    return role.upper() in REPEATER_ROLES
+
+
+def rollback_spec(changes):
+    """Spec that restores the values the node had before the changes"""
+    spec = {}
+    for change in changes:
+        spec.setdefault(change['section'], {})[change['field']] = change['current']
+    return spec
+
+
+def plan_changes_on(node, spec):
+    """Connect and plan a spec against the node's current settings"""
+    iface = connect(node)
+    try:
+        return plan_changes(iface.localNode, spec)
+    finally:
+        iface.close()
+
+
+class RebootGate:
+    """Spaces commits apart and limits how many repeaters are down at once"""
+
+    def __init__(self, stagger=10.0, repeater_slots=1):
+        self.stagger = stagger
+        self.repeaters = threading.BoundedSemaphore(max(1, repeater_slots))
+        self.lock = threading.Lock()
+        self.last_commit = 0.0
+
+    def enter(self, repeater):
+        if repeater:
+            self.repeaters.acquire()
+        with self.lock:
+            wait = self.last_commit + self.stagger - time.time()
+            if wait > 0:
+                time.sleep(wait)
+            self.last_commit = time.time()
+
+    def leave(self, repeater):
+        if repeater:
+            self.repeaters.release()
+
+
+class Rollout:
+    """Runs rollout_node for every node on a bounded thread pool"""
+
+    def __init__(self, nodes, profiles, concurrency=4, stagger=10.0, timeout=90,
+                 settle=8, dry_run=False, rollback=True, out=sys.stdout):
+        self.nodes = nodes
+        self.profiles = profiles
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.settle = settle
+        self.dry_run = dry_run
+        self.rollback = rollback
+        self.out = out
+        self.out_lock = threading.Lock()
+        self.specs = {node['name']: node_spec(node, profiles) for node in nodes}
+        repeaters = [node['name'] for node in nodes if is_repeater(node, self.specs[node['name']])]
+        if len(repeaters) == 1:
+            # stderr, so the JSON events on stdout stay parseable
+            print(f"⚠️  {repeaters[0]} is the only repeater: the mesh has none while it reboots", file=sys.stderr)
+        self.gate = RebootGate(stagger, repeater_slots=len(repeaters) - 1)
+        self.start = None
+
+    def event(self, node, phase, **fields):
+        record = {'time': time.time(), 'elapsed_s': round(time.time() - self.start, 3),
+                  'node': node['name'], 'phase': phase}
+        record.update(fields)
+        if self.out is not None:
+            with self.out_lock:
+                self.out.write(json.dumps(record, default=str) + "\n")
+                self.out.flush()
+
+    def _reboot_and_verify(self, node, spec, changes, result, prefix=''):
+        """Commit changes, wait for the node and return the settings still wrong"""
+        repeater = is_repeater(node, self.specs[node['name']])
+        iface = None
+        self.gate.enter(repeater)
+        try:
+            t = time.time()
+            iface = connect(node)
+            apply_changes(iface.localNode, changes)
+            iface.close()
+            iface = None
+            result['timings'][f'{prefix}apply_s'] = time.time() - t
+            self.event(node, f'{prefix}committed', changes=len(changes))
+
+            t = time.time()
+            iface = wait_for_node(node, timeout=self.timeout, settle=self.settle)
+            result['timings'][f'{prefix}reboot_s'] = time.time() - t
+            if iface is None:
+                return None
+            self.event(node, f'{prefix}back', reboot_s=round(time.time() - t, 1))
+            return plan_changes(iface.localNode, spec)
+        finally:
+            if iface is not None:
+                try:
+                    iface.close()
+                except Exception:
+                    pass
+            self.gate.leave(repeater)
+
+    def rollout_node(self, node):
+        spec = self.specs[node['name']]
+        result = {
+            'node': node['name'],
+            'address': describe(node),
+            'repeater': is_repeater(node, spec),
+            'changes': [],
+            'applied': False,
+            'verified': None,
+            'rolled_back': None,
+            'timings': {},
+            'error': None
+        }
+        start = time.time()
+        try:
+            self.event(node, 'connecting')
+            iface = connect(node)
+            try:
+                changes = plan_changes(iface.localNode, spec)
+            finally:
+                iface.close()
+            result['changes'] = changes
+            result['timings']['plan_s'] = time.time() - start
+            self.event(node, 'planned', changes=len(changes))
+            if not changes:
+                result['verified'] = True
+                return result
+            if self.dry_run:
+                return result
+
+            remaining = self._reboot_and_verify(node, spec, changes, result)
+            result['applied'] = True
+            if remaining is None:
+                result['error'] = f"Node did not come back within {self.timeout}s"
+            else:
+                result['remaining'] = remaining
+            result['verified'] = remaining == []
+            self.event(node, 'verified' if result['verified'] else 'verify_failed')
+
+            if not result['verified'] and self.rollback and remaining is not None:
+                restore = rollback_spec(changes)
+                undo = plan_changes_on(node, restore)
+                left = self._reboot_and_verify(node, restore, undo, result, prefix='rollback_') if undo else []
+                result['rolled_back'] = left == []
+                self.event(node, 'rolled_back' if result['rolled_back'] else 'rollback_failed')
+            return result
+        except Exception as e:
+            result['error'] = str(e)
+            self.event(node, 'error', error=str(e))
+            return result
+        finally:
+            result['timings']['total_s'] = time.time() - start
+
+    def run(self):
+        self.start = time.time()
+        with ThreadPoolExecutor(max_workers=max(1, self.concurrency)) as pool:
+            results = list(pool.map(self.rollout_node, self.nodes))
+        return {
+            'timestamp': self.start,
+            'duration_s': time.time() - self.start,
+            'dry_run': self.dry_run,
+            'concurrency': self.concurrency,
+            'stagger_s': self.gate.stagger,
+            'ok': all(not r['error'] and r['verified'] is not False for r in results),
+            'results': results
+        }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Roll out configuration to repeater network nodes concurrently")
+    parser.add_argument("nodes", nargs="*", help="Node names from the inventory")
+    parser.add_argument("--all", action="store_true", help="Roll out to every node in the inventory")
+    parser.add_argument("--config", help="Node inventory file (default: nodes.json)")
+    parser.add_argument("--profiles", help="Profiles file (default: profiles.json)")
+    parser.add_argument("--concurrency", type=int, default=4, help="Nodes configured at the same time (default: 4)")
+    parser.add_argument("--stagger", type=float, default=10.0, help="Minimum seconds between reboots (default: 10)")
+    parser.add_argument("--timeout", type=float, default=90, help="Seconds to wait for each node after reboot (default: 90)")
+    parser.add_argument("--no-rollback", action="store_true", help="Leave nodes that fail verification as they are")
+    parser.add_argument("--dry-run", action="store_true", help="Only plan the changes")
+    parser.add_argument("--quiet", action="store_true", help="Only print the final summary")
+    args = parser.parse_args()
+
+    if not args.nodes and not args.all:
+        parser.error("give node names or --all")
+
+    nodes = load_nodes(args.config, None if args.all else args.nodes)
+    if not nodes:
+        print("ERROR: No matching nodes in inventory")
+        sys.exit(1)
+
+    rollout = Rollout(nodes, load_profiles(args.profiles), concurrency=args.concurrency,
+                      stagger=args.stagger, timeout=args.timeout, dry_run=args.dry_run,
+                      rollback=not args.no_rollback, out=None if args.quiet else sys.stdout)
+    summary = rollout.run()
+    print(json.dumps(summary, indent=2, default=str))
+
+    if not summary['ok']:
+        sys.exit(1)
@@ -0,0 +1,363 @@
+#!/usr/bin/env python3
+"""
+Repeater placement optimizer
+Picks the repeater site(s) among candidates that maximize the worst-case
+predicted link margin to a set of fixed client positions (link_predictor.py
+model). With several repeaters each client counts its best repeater, and the
+repeaters themselves must stay connected: the weakest link of their best
+spanning tree counts too.
+
+The terrain of the whole area is looked up once into a grid (local SRTM
+tiles, falling back to get_altitude.py's cached web lookups) and kept in
+an .npz cache, so re-running with other candidates or settings needs no
+lookups at all. Every client x candidate link is evaluated in one batch.
+
+Usage:
+    python3 repeater_placement.py --nodes positions.json --area-grid 30
+    python3 repeater_placement.py --nodes positions.json --candidates rooftops.csv --height 15
+    python3 repeater_placement.py --nodes positions.json --area-grid 40 --repeaters 2 --search anneal
+"""
+
+import os
+import sys
+import json
+import math
+import time
+import argparse
+
+try:
+    import numpy as np
+except ImportError:
+    raise ImportError("numpy module not found. Install with: pip3 install numpy")
+
+from dem import DEFAULT_DEM_DIR
+from lora_radio import MODEM_PRESETS, DEFAULT_PROFILES_FILE, radio_from_profile
+from link_predictor import LinkPredictor, PathLossModel, dem_elevation, link_dict, load_positions, K_FACTOR
+from coverage_map import Grid, TerrainRaster, METERS_PER_DEGREE
+
+DEFAULT_TERRAIN_CACHE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'terrain_grid.npz')
+DEFAULT_TERRAIN_GRID = 500
+DEFAULT_REPEATER_HEIGHT = 10.0
+DEFAULT_SAMPLES = 128
+
+# Grids with more cells than this without elevation are not cached (missing tiles, offline)
+MAX_CACHED_MISSING = 0.5
+
+
+def area_grid(positions, margin_km, size):
+    """Grid covering every position plus margin_km on each side"""
+    lats = [p['latitude'] for p in positions]
+    lons = [p['longitude'] for p in positions]
+    lat = (max(lats) + min(lats)) / 2
+    lon = (max(lons) + min(lons)) / 2
+    half_lat_km = (max(lats) - min(lats)) / 2 * METERS_PER_DEGREE / 1000
+    half_lon_km = (max(lons) - min(lons)) / 2 * METERS_PER_DEGREE * math.cos(math.radians(lat)) / 1000
+    return Grid(lat, lon, max(half_lat_km, half_lon_km) + margin_km, size)
+
+
+def cached_terrain(grid, elevation, path, source=''):
+    """Cell-centre heights of grid from path if it holds this grid, else looked up and saved there
+
+    source names where the heights come from (tile directory, offline or
+    not), so a lookup with other sources does not reuse the grid. Grids that
+    are mostly missing are not saved.
+    """
+    key = f"{grid.north:.6f},{grid.south:.6f},{grid.west:.6f},{grid.east:.6f},{grid.size},{source}"
+    if path and os.path.exists(path):
+        try:
+            with np.load(path) as cached:
+                if str(cached['key']) == key:
+                    return cached['heights'], True
+        except (OSError, ValueError, KeyError):
+            pass
+    lats, lons = grid.centers()
+    heights = elevation(np.ascontiguousarray(lats).ravel(), np.ascontiguousarray(lons).ravel()).reshape(lats.shape)
+    if path and np.isnan(heights).mean() <= MAX_CACHED_MISSING:
+        np.savez_compressed(path, key=key, heights=heights)
+    return heights, False
+
+
+def json_round(value, digits):
+    """Rounded float, None when not finite (JSON has no NaN)"""
+    value = float(value)
+    return round(value, digits) if math.isfinite(value) else None
+
+
+def link_matrix(predictor, a, b, height_a, height_b):
+    """Predict every a x b link; predict() arrays reshaped to (len(a), len(b))"""
+    n, m = len(a), len(b)
+    lat_a = np.repeat([p['latitude'] for p in a], m)
+    lon_a = np.repeat([p['longitude'] for p in a], m)
+    lat_b = np.tile([p['latitude'] for p in b], n)
+    lon_b = np.tile([p['longitude'] for p in b], n)
+    out = predictor.predict(lat_a, lon_a, np.repeat(height_a, m), lat_b, lon_b, np.tile(height_b, n))
+    return {key: values.reshape(n, m) for key, values in out.items()}
+
+
+def pair_margins(predictor, sites, heights):
+    """Symmetric site x site margin matrix, each pair predicted once (-inf on the diagonal)"""
+    n = len(sites)
+    a, b = np.triu_indices(n, 1)
+    lats = np.array([p['latitude'] for p in sites])
+    lons = np.array([p['longitude'] for p in sites])
+    out = predictor.predict(lats[a], lons[a], heights[a], lats[b], lons[b], heights[b])
+    margins = np.full((n, n), -np.inf)
+    margins[a, b] = out['margin_db']
+    margins[b, a] = out['margin_db']
+    return margins
+
+
+def backbone_margin(margins, chosen):
+    """Weakest link of the maximum spanning tree between the chosen repeaters (Prim's)"""
+    if len(chosen) < 2:
+        return np.inf
+    sub = margins[np.ix_(chosen, chosen)]
+    best = sub[0].copy()
+    connected = np.zeros(len(chosen), dtype=bool)
+    connected[0] = True
+    weakest = np.inf
+    for _ in range(len(chosen) - 1):
+        candidates = np.where(connected, -np.inf, best)
+        j = int(np.argmax(candidates))
+        weakest = min(weakest, candidates[j])
+        connected[j] = True
+        best = np.maximum(best, sub[j])
+    return weakest
+
+
+def score(client_margins, backbone, chosen):
+    """Worst-case margin: each client's best repeater, and the repeater backbone"""
+    clients = client_margins[:, chosen].max(axis=1).min()
+    if backbone is None:
+        return clients
+    return min(clients, backbone_margin(backbone, chosen))
+
+
+def greedy(client_margins, backbone, count):
+    """Add repeaters one at a time, each the candidate that raises the worst case most"""
+    chosen = []
+    best = np.full(client_margins.shape[0], -np.inf)
+    link = np.inf
+    for _ in range(count):
+        # Worst case with each candidate added, for all candidates at once
+        totals = np.maximum(best[:, None], client_margins).min(axis=0)
+        if chosen:
+            joins = backbone[:, chosen].max(axis=1)
+            totals = np.minimum(totals, np.minimum(link, joins))
+        totals[chosen] = -np.inf
+        j = int(np.argmax(totals))
+        if chosen:
+            link = min(link, backbone[j, chosen].max())
+        chosen.append(j)
+        best = np.maximum(best, client_margins[:, j])
+    return chosen
+
+
+def anneal(client_margins, backbone, chosen, steps=5000, start_temperature=5.0, seed=1):
+    """Improve a placement by swapping one repeater for another candidate (simulated annealing)"""
+    rng = np.random.default_rng(seed)
+    candidates = client_margins.shape[1]
+    current = list(chosen)
+    current_score = score(client_margins, backbone, current)
+    best, best_score = list(current), current_score
+    if len(current) >= candidates:
+        return best
+    for step in range(steps):
+        temperature = start_temperature * (1 - step / steps) + 1e-3
+        trial = list(current)
+        replacement = int(rng.integers(candidates))
+        if replacement in trial:
+            continue
+        trial[int(rng.integers(len(trial)))] = replacement
+        trial_score = score(client_margins, backbone, trial)
+        if trial_score >= current_score or rng.random() < math.exp((trial_score - current_score) / temperature):
+            current, current_score = trial, trial_score
+            if current_score > best_score:
+                best, best_score = list(current), current_score
+    return best
+
+
+def area_candidates(grid, count):
+    """count x count candidate sites spread evenly over a grid's area"""
+    lats = np.linspace(grid.north, grid.south, count + 2)[1:-1]
+    lons = np.linspace(grid.west, grid.east, count + 2)[1:-1]
+    return [{'name': f"site{r:02d}x{c:02d}", 'latitude': float(lat), 'longitude': float(lon)}
+            for r, lat in enumerate(lats) for c, lon in enumerate(lons)]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Pick repeater sites that maximize the worst-case predicted link margin to fixed clients",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  python3 repeater_placement.py --nodes positions.json --area-grid 30
+  python3 repeater_placement.py --nodes positions.json --candidates rooftops.csv --height 15
+  python3 repeater_placement.py --nodes positions.json --area-grid 40 --repeaters 2 --search anneal
+        """
+    )
+    parser.add_argument("--nodes", required=True, help="JSON file of named positions (latitude, longitude, antenna_m)")
+    parser.add_argument("--clients", help="Comma-separated client names (default: nodes with role CLIENT, else all)")
+    parser.add_argument("--candidates", help="Candidate sites, CSV or JSON as for get_altitude.py --batch")
+    parser.add_argument("--area-grid", type=int, metavar="N", help="Use N x N candidate sites spread over the area instead")
+    parser.add_argument("--margin-km", type=float, default=2.0, help="Area around the clients in km (default: 2)")
+    parser.add_argument("--height", type=float, default=DEFAULT_REPEATER_HEIGHT,
+                        help=f"Repeater antenna height in meters (default: {DEFAULT_REPEATER_HEIGHT:g}, or a candidate's antenna_m)")
+    parser.add_argument("--repeaters", type=int, default=1, help="Number of repeaters to place (default: 1)")
+    parser.add_argument("--search", choices=("greedy", "anneal"), default="greedy",
+                        help="greedy, or greedy refined by simulated annealing (default: greedy)")
+    parser.add_argument("--steps", type=int, default=5000, help="Annealing steps (default: 5000)")
+    parser.add_argument("--top", type=int, default=5, help="Also list the N best single sites (default: 5)")
+    parser.add_argument("--profile", default="base", help="Radio profile in profiles.json (default: base)")
+    parser.add_argument("--profiles", default=DEFAULT_PROFILES_FILE, help="Profiles file")
+    parser.add_argument("--preset", choices=sorted(MODEM_PRESETS), help="Modem preset (default: the profile's)")
+    parser.add_argument("--tx-power", type=float, help="TX power in dBm (default: the profile's, else the region limit)")
+    parser.add_argument("--gain", type=float, help="Antenna gain in dBi at both ends (default: 2.15)")
+    parser.add_argument("--clutter", type=float, default=0.0, help="Extra loss in dB for buildings/foliage (default: 0)")
+    parser.add_argument("--model", help="Calibrated path loss model (path_loss_calibration.py output)")
+    parser.add_argument("--samples", type=int, default=DEFAULT_SAMPLES, help=f"Profile samples per link (default: {DEFAULT_SAMPLES})")
+    parser.add_argument("--terrain-grid", type=int, default=DEFAULT_TERRAIN_GRID,
+                        help=f"Terrain grid cells per side (default: {DEFAULT_TERRAIN_GRID})")
+    parser.add_argument("--terrain-cache", default=DEFAULT_TERRAIN_CACHE, help="Terrain grid cache file ('' to disable)")
+    parser.add_argument("--dem-dir", default=DEFAULT_DEM_DIR, help=f"Directory with .hgt tiles (default: {DEFAULT_DEM_DIR})")
+    parser.add_argument("--offline", action="store_true", help="Only use local tiles, never the elevation web services")
+    parser.add_argument("--api-key", help="Google Elevation API key for the web fallback")
+    parser.add_argument("--json", action="store_true", help="Print JSON instead of a report")
+    args = parser.parse_args()
+
+    try:
+        radio = radio_from_profile(args.profile, args.profiles, preset=args.preset, tx_power_dbm=args.tx_power,
+                                   antenna_gain_dbi=args.gain)
+        model = PathLossModel.load(args.model) if args.model else None
+    except (OSError, ValueError, TypeError) as e:
+        print(f"ERROR: {e}")
+        return 1
+
+    with open(args.nodes, 'r') as f:
+        data = json.load(f)
+    roles = {n.get('name'): n.get('role') for n in (data.get('nodes', []) if isinstance(data, dict) else data)}
+    positions = load_positions(args.nodes)
+    if args.clients:
+        wanted = [name.strip() for name in args.clients.split(',')]
+        clients = [p for p in positions if p['name'] in wanted]
+        unknown = set(wanted) - {p['name'] for p in clients}
+        if unknown:
+            print(f"ERROR: no position for {', '.join(sorted(unknown))}")
+            return 1
+    else:
+        clients = [p for p in positions if roles.get(p['name']) == 'CLIENT'] or positions
+    if not clients:
+        print("ERROR: no client positions")
+        return 1
+
+    grid_positions = list(clients)
+    candidates = []
+    if args.candidates:
+        from get_altitude import load_points
+        candidates = [dict(p, name=str(p.get('name', f"site{i}"))) for i, p in enumerate(load_points(args.candidates))]
+        grid_positions += candidates
+    elif not args.area_grid:
+        parser.error("give --candidates or --area-grid")
+    grid = area_grid(grid_positions, args.margin_km, args.terrain_grid)
+    if args.area_grid:
+        candidates = area_candidates(grid, args.area_grid)
+    if args.repeaters > len(candidates):
+        print(f"ERROR: {args.repeaters} repeaters but only {len(candidates)} candidates")
+        return 1
+
+    fallback = None
+    if not args.offline:
+        from get_altitude import ElevationCache
+        fallback = {'api_key': args.api_key, 'dem_dir': args.dem_dir, 'cache': ElevationCache()}
+    start = time.perf_counter()
+    heights, cached = cached_terrain(grid, dem_elevation(args.dem_dir, fallback), args.terrain_cache,
+                                     f"{os.path.abspath(args.dem_dir)}|{'offline' if args.offline else 'web'}")
+    if fallback is not None:
+        fallback['cache'].save()
+    terrain_time = time.perf_counter() - start
+
+    predictor = LinkPredictor(TerrainRaster(heights, grid), radio, args.samples, K_FACTOR, args.clutter, model=model)
+    site_heights = np.array([float(c.get('antenna_m', args.height)) for c in candidates])
+    client_heights = np.array([c['antenna_m'] for c in clients])
+
+    start = time.perf_counter()
+    links = link_matrix(predictor, clients, candidates, client_heights, site_heights)
+    client_margins = links['margin_db']
+    backbone = None
+    if args.repeaters > 1:
+        backbone = pair_margins(predictor, candidates, site_heights)
+    evaluated = client_margins.size + (len(candidates) * (len(candidates) - 1) // 2 if backbone is not None else 0)
+    eval_time = time.perf_counter() - start
+
+    chosen = greedy(client_margins, backbone, args.repeaters)
+    if args.search == 'anneal':
+        chosen = anneal(client_margins, backbone, chosen, args.steps)
+    worst = score(client_margins, backbone, chosen)
+
+    singles = client_margins.min(axis=0)
+    top = np.argsort(-singles, kind='stable')[:args.top].tolist()
+    report = {
+        'radio': radio.describe(),
+        'worst_margin_db': json_round(worst, 2),
+        'repeaters': [dict(candidates[j], antenna_m=float(site_heights[j]),
+                           ground_m=json_round(predictor.elevation(np.array([candidates[j]['latitude']]),
+                                                                   np.array([candidates[j]['longitude']]))[0], 1))
+                      for j in chosen],
+        'links': [],
+        'top_single_sites': [dict(candidates[j], worst_margin_db=json_round(singles[j], 2)) for j in top],
+        'evaluated_links': int(evaluated),
+        'seconds': {'terrain': round(terrain_time, 3), 'links': round(eval_time, 3)},
+        'terrain_cached': cached,
+        'terrain_missing_cells': int(np.isnan(heights).sum()),
+    }
+    for i, client in enumerate(clients):
+        j = chosen[int(np.argmax(client_margins[i, chosen]))]
+        report['links'].append(dict({'from': client['name'], 'to': candidates[j]['name']},
+                                    **link_dict({k: v[i] for k, v in links.items()}, j)))
+    if backbone is not None:
+        backbone_links = link_matrix(predictor, [candidates[j] for j in chosen], [candidates[j] for j in chosen],
+                                     site_heights[chosen], site_heights[chosen])
+        for a in range(len(chosen)):
+            for b in range(a + 1, len(chosen)):
+                report['links'].append(dict({'from': candidates[chosen[a]]['name'], 'to': candidates[chosen[b]]['name']},
+                                            **link_dict({k: v[a] for k, v in backbone_links.items()}, b)))
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return 0
+
+    print("="*80)
+    print(f"REPEATER PLACEMENT  {len(clients)} clients, {len(candidates)} candidates, {radio.preset} {radio.tx_power_dbm:g} dBm")
+    print("="*80)
+    print(f"Terrain: {args.terrain_grid}x{args.terrain_grid} grid {'from cache' if cached else 'looked up'} "
+          f"in {terrain_time:.2f}s; {evaluated} links in {eval_time:.2f}s ({evaluated / max(eval_time, 1e-9):,.0f} links/s)")
+    if report['terrain_missing_cells']:
+        print(f"⚠️  {report['terrain_missing_cells']} of {heights.size} cells without elevation data"
+              f"{' (no tiles in ' + args.dem_dir + '?)' if args.offline else ''}")
+    print()
+    for site in report['repeaters']:
+        ground = f"{site['ground_m']} m" if site['ground_m'] is not None else "unknown"
+        print(f"📡 {site['name']}: {site['latitude']:.5f},{site['longitude']:.5f} "
+              f"(ground {ground}, antenna {site['antenna_m']:g} m)")
+    closes = 'every link closes' if worst >= 0 else 'some links do not close'
+    if report['terrain_missing_cells']:
+        closes += ' over the known terrain'
+    print(f"Worst-case margin: {worst:.1f} dB ({closes})")
+    print()
+    print(f"{'From':<12} {'To':<12} {'km':>7} {'LOS':>4} {'Loss dB':>8} {'SNR dB':>7} {'Margin':>7}")
+    for link in report['links']:
+        print(f"{link['from']:<12} {link['to']:<12} {link['distance_m']/1000:>7.2f} {'yes' if link['los_clear'] else 'no':>4} "
+              f"{link['path_loss_db']:>8.1f} {link['snr_db']:>7.1f} {link['margin_db']:>7.1f}")
+        if link['missing_samples']:
+            print(f"  ⚠️  {link['missing_samples']} profile samples without elevation data")
+    if args.repeaters == 1 and len(top) > 1:
+        print()
+        print("Best single sites:")
+        for site, j in zip(report['top_single_sites'], top):
+            print(f"  {site['name']:<12} {site['latitude']:.5f},{site['longitude']:.5f}  {singles[j]:>6.1f} dB")
+    print("="*80)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
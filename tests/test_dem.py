@@ -0,0 +1,45 @@
+"""DemStore lookups against small synthetic .hgt tiles"""
+
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dem import DemStore  # noqa: E402
+
+SAMPLES = 11
+
+
+def write_tile(directory, name):
+    """A tile whose height is 1000 at the north-west corner, +1 per column east and -10 per row south"""
+    rows, cols = np.mgrid[0:SAMPLES, 0:SAMPLES]
+    heights = (1000 + cols - 10 * rows).astype('>i2')
+    heights.tofile(os.path.join(directory, name + '.hgt'))
+
+
+def test_inside_tile(tmp_path):
+    write_tile(tmp_path, 'N50E030')
+    store = DemStore(str(tmp_path))
+    assert store.elevation(50.5, 30.5) == 1000 + 5 - 50
+    assert np.allclose(store.elevations([50.5, 50.0], [30.5, 30.0]), [955, 900])
+
+
+def test_north_and_east_edges_use_the_neighbouring_tile(tmp_path):
+    write_tile(tmp_path, 'N50E030')
+    store = DemStore(str(tmp_path))
+    # floor() names N51E030, N50E031 and N51E031, which are not on disk
+    assert store.elevation(51.0, 30.0) == 1000
+    assert store.elevation(50.0, 31.0) == 1000 + 10 - 100
+    assert store.elevation(51.0, 31.0) == 1010
+    heights = store.elevations(np.array([51.0, 50.0, 51.0, 51.5]), np.array([30.0, 31.0, 31.0, 30.5]))
+    assert np.allclose(heights[:3], [1000, 910, 1010])
+    assert np.isnan(heights[3])
+
+
+def test_edge_prefers_the_tile_it_floors_to(tmp_path):
+    write_tile(tmp_path, 'N50E030')
+    np.full((SAMPLES, SAMPLES), 5, dtype='>i2').tofile(os.path.join(tmp_path, 'N51E030.hgt'))
+    store = DemStore(str(tmp_path))
+    assert store.elevation(51.0, 30.0) == 5
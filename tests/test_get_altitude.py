@@ -0,0 +1,100 @@
+"""get_altitudes() against a local stub Open-Elevation server"""
+
+import os
+import sys
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from get_altitude import ElevationCache, get_altitudes  # noqa: E402
+
+# A point the stub rejects with 400, as the services do for an invalid location
+BAD_LATITUDE = 50.9
+
+
+class StubServer:
+    """Open-Elevation lookup answering latitude * 10 and recording each request's locations"""
+
+    def __init__(self):
+        self.requests = []
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+                locations = body['locations']
+                stub.requests.append(locations)
+                if any(loc['latitude'] == BAD_LATITUDE for loc in locations):
+                    self.reply(400, {'error': 'invalid location'})
+                else:
+                    self.reply(200, {'results': [dict(loc, elevation=loc['latitude'] * 10) for loc in locations]})
+
+            def reply(self, status, data):
+                payload = json.dumps(data).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/api/v1/lookup"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def stub():
+    server = StubServer()
+    yield server
+    server.close()
+
+
+def lookup(stub, tmp_path, points, cache=None, batch_size=100):
+    return get_altitudes(points, dem_dir=str(tmp_path / 'no-dem'), cache=cache, batch_size=batch_size,
+                         workers=2, urls={'open-elevation': stub.url})
+
+
+def test_batches_several_locations_per_request(stub, tmp_path):
+    points = [(50.0 + i / 100, 30.0) for i in range(5)]
+    results, summary = lookup(stub, tmp_path, points, batch_size=2)
+    assert sorted(len(r) for r in stub.requests) == [1, 2, 2]
+    assert [r['altitude'] for r in results] == pytest.approx([lat * 10 for lat, _ in points])
+    assert summary['open-elevation'] == 5
+    assert summary['failed'] == 0
+
+
+def test_rejected_batch_is_bisected_to_the_bad_point(stub, tmp_path):
+    points = [(50.1, 30.0), (50.2, 30.0), (50.3, 30.0), (BAD_LATITUDE, 30.0)]
+    results, summary = lookup(stub, tmp_path, points)
+    # 4 rejected, [0, 1] answered, [2, 3] rejected, [2] answered, [3] rejected
+    assert [len(r) for r in stub.requests] == [4, 2, 2, 1, 1]
+    assert [r['success'] for r in results] == [True, True, True, False]
+    assert summary['failed'] == 1
+    assert 'HTTP 400' in summary['errors']['open-elevation']
+
+
+def test_second_run_is_served_from_the_cache(stub, tmp_path):
+    points = [(50.1, 30.0), (50.2, 30.1)]
+    cache = ElevationCache(str(tmp_path / 'cache.json'))
+    lookup(stub, tmp_path, points, cache)
+    cache.save()
+    assert len(stub.requests) == 1
+
+    results, summary = lookup(stub, tmp_path, points, ElevationCache(str(tmp_path / 'cache.json')))
+    assert len(stub.requests) == 1
+    assert summary['cached'] == 2
+    assert all(r['cached'] and r['altitude'] == pytest.approx(r['latitude'] * 10) for r in results)